@@ -0,0 +1,53 @@
+"""Partial index for open booking states, booking_state_archive table
+
+Revision ID: d41c7a9e52b8
+Revises: ac5f24cb892f
+Create Date: 2026-10-16 09:41:07.512203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c7a9e52b8'
+down_revision: Union[str, Sequence[str], None] = 'ac5f24cb892f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_STATES = sa.text("current_step <> 'completed'")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('booking_state_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('hotel_id', sa.String(), nullable=False),
+    sa.Column('service_type', sa.String(), nullable=False),
+    sa.Column('current_step', sa.String(), nullable=False),
+    sa.Column('temp_data_json', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_booking_state_archive_hotel_id'), 'booking_state_archive', ['hotel_id'], unique=False)
+
+    # booking_state can be large and is written on every chat turn: build the index without
+    # locking out writes (CONCURRENTLY can't run inside the migration transaction)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_booking_state_active', 'booking_state', ['hotel_id', 'updated_at'], unique=False,
+            postgresql_where=OPEN_STATES, sqlite_where=OPEN_STATES, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_booking_state_active', table_name='booking_state', postgresql_concurrently=True)
+    op.drop_index(op.f('ix_booking_state_archive_hotel_id'), table_name='booking_state_archive')
+    op.drop_table('booking_state_archive')
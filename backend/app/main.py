@@ -1,16 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database import engine
+from app.database import engine, async_engine
 from app import models
+from app.services.nvidia_client import nvidia_client
+from app.services.image_resolver import image_resolver
+from app.services.weather_client import weather_cache, forecast_cache
+from app.services.zone_forecast import zone_forecast
+from app.services.booking_retention import booking_retention
+from app.services.session_store import session_store
+from app.services.conversation_history import conversation_writer
 
 # Ensure tables are created (Though Alembic should be used for this)
 models.Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled, keep-alive upstream client per process instead of one per request
+    await nvidia_client.startup()
+    await weather_cache.startup()
+    await forecast_cache.startup()
+    await zone_forecast.startup()
+    await booking_retention.startup()
+    await session_store.startup()
+    await conversation_writer.startup()
+    yield
+    await nvidia_client.shutdown()
+    await image_resolver.shutdown()
+    await weather_cache.shutdown()
+    await zone_forecast.shutdown()
+    await forecast_cache.shutdown()
+    await booking_retention.shutdown()
+    await session_store.shutdown()
+    await conversation_writer.shutdown()
+    await async_engine.dispose()
+
 app = FastAPI(
     title=settings.app_name,
     description="Backend API for the Multilingual AI Hotel Concierge Bot",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
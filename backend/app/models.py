@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, JSON, Index, literal_column, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -67,6 +67,32 @@ class BookingState(Base):
     temp_data_json = Column(JSON, default=dict)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Hot path of /chat/message, /chat/reset and /booking/confirm: the few open states of a hotel
+        Index(
+            "ix_booking_state_active", "hotel_id", "updated_at",
+            postgresql_where=text("current_step <> 'completed'"),
+            sqlite_where=text("current_step <> 'completed'")
+        ),
+    )
+
+# Predicate of ix_booking_state_active. Rendered as a literal rather than a bind parameter so the
+# planner can match the partial index, also for prepared (generic) statements.
+BOOKING_STATE_OPEN = BookingState.current_step != literal_column("'completed'")
+
+class BookingStateArchive(Base):
+    """Completed and abandoned booking states moved out of booking_state by the retention job."""
+    __tablename__ = "booking_state_archive"
+    id = Column(Integer, primary_key=True) # Same id as in booking_state
+    user_id = Column(Integer)
+    hotel_id = Column(String, index=True, nullable=False)
+    service_type = Column(String, nullable=False)
+    current_step = Column(String, nullable=False)
+    temp_data_json = Column(JSON, default=dict)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
     
 class Booking(Base):
     __tablename__ = "bookings"
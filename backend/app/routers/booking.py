@@ -1,8 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.models import BookingState, Booking
+from app.models import BookingState, Booking, BOOKING_STATE_OPEN
+from app.services.booking_retention import booking_retention
+from app.services.session_store import session_store, session_key
 import uuid
 
 router = APIRouter(
@@ -12,17 +16,28 @@ router = APIRouter(
 
 class ConfirmBookingRequest(BaseModel):
     hotel_id: str
+    session_id: Optional[str] = None
 
 @router.post("/confirm")
-async def confirm_booking(request: ConfirmBookingRequest, db: Session = Depends(get_db)):
+async def confirm_booking(request: ConfirmBookingRequest, db: AsyncSession = Depends(get_db)):
     """
     Finalizes an active booking state into a confirmed booking.
     """
-    # Find the current 'ready' booking state
-    active_booking = db.query(BookingState).filter(
-        BookingState.hotel_id == request.hotel_id,
-        BookingState.current_step == "ready"
-    ).first()
+    # Find the current 'ready' booking state: in the chat session, which is written to Postgres
+    # only now, or else among the states persisted earlier (expired sessions, older deployments)
+    key = session_key(request.hotel_id, request.session_id)
+    session_booking = await session_store.get_booking(key)
+    from_session = session_booking is not None and session_booking.current_step == "ready"
+    if from_session:
+        active_booking = session_booking.to_booking_state(request.hotel_id)
+        db.add(active_booking)
+    else:
+        result = await db.execute(select(BookingState).where(
+            BookingState.hotel_id == request.hotel_id,
+            BOOKING_STATE_OPEN, # Implied by "ready", but lets the planner use the partial index
+            BookingState.current_step == "ready"
+        ).limit(1))
+        active_booking = result.scalars().first()
     
     if not active_booking:
         raise HTTPException(status_code=404, detail="No ready booking state found for this user/hotel.")
@@ -42,8 +57,11 @@ async def confirm_booking(request: ConfirmBookingRequest, db: Session = Depends(
         # Mark temp state as completed to clear the context
         active_booking.current_step = "completed"
         
-        db.commit()
-        db.refresh(new_booking)
+        await db.commit()
+        await db.refresh(new_booking)
+        if from_session:
+            # A booking still in progress in the session is unrelated to an older persisted one
+            await session_store.clear(key)
         
         return {
             "status": "success", 
@@ -52,7 +70,14 @@ async def confirm_booking(request: ConfirmBookingRequest, db: Session = Depends(
             "details": active_booking.temp_data_json
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/retention/stats")
+async def booking_retention_stats():
+    """
+    Runs and archived row counts of the booking_state retention job.
+    """
+    return booking_retention.stats()
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
+from fastapi.responses import Response, StreamingResponse, FileResponse, RedirectResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.services.nvidia_client import nvidia_client
+from app.services.nvidia_client import nvidia_client, TTS_MODEL, TTS_VOICE
+from app.services.audio_cache import audio_cache
+from app.services.tts_stream import stream_speech
+from app.services.speech_segmenter import transcribe_stream
+from app.services.audio_preprocess import audio_preprocessor
+from app.services.image_resolver import image_resolver, IMAGES_PER_CARD
+from app.services.translation_cache import translation_cache
+from app.services.translation_batcher import translation_batcher
+from app.config import settings
 from app.database import get_db
-from app.models import BookingState
-import re
+from app.models import BookingState, BOOKING_STATE_OPEN
+from app.services.session_store import session_store, session_key, BookingSession
+from app.services.conversation_history import conversation_history
+from app.services.response_cache import response_cache
+from app.services.tag_parser import (
+    extract_tags, rebuild, render_tag, Recommendation, TagHoldback,
+    RECOMMENDATIONS, BOOKING_STATE, ITINERARY_PLAN
+)
 import json
 import base64
-from datetime import datetime, timedelta
+import urllib.parse
 
 router = APIRouter(
     prefix="/chat",
@@ -18,62 +33,146 @@ router = APIRouter(
 
 class TTSRequest(BaseModel):
     text: str
+    voice: Optional[str] = None
+    stream: bool = False # Sentence-by-sentence chunked audio, playback starts after the first sentence
 
 @router.post("/audio/speech-to-text")
 async def speech_to_text(file: UploadFile = File(...)):
     """
     Accepts an audio file upload (webm, wav, etc.) from the frontend and transcribes it using NVIDIA STT.
+    The upload is read in chunks; WAV recordings are split at silences and transcribed in parallel.
     """
+    async def upload_chunks():
+        while True:
+            chunk = await file.read(settings.stt_upload_chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+
     try:
-        audio_bytes = await file.read()
-        transcription = await nvidia_client.transcribe_audio(audio_bytes=audio_bytes)
+        transcription = await transcribe_stream(upload_chunks())
         
-        if not transcription:
+        if transcription is None:
             raise HTTPException(status_code=500, detail="Failed to transcribe audio via AI model")
             
         return {"text": transcription}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/audio/speech-to-text/stats")
+async def stt_preprocess_stats():
+    """
+    Bytes and seconds of audio before/after normalization, and the time spent normalizing.
+    """
+    return audio_preprocessor.stats()
+
+def cached_audio_response(path: str, key: str, http_request: Request) -> Response:
+    """Serves a cached clip from disk: strong content-hash ETag, 304 revalidation, Range requests."""
+    etag = f'"{key}"'
+    if http_request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(
+        path,
+        media_type="audio/wav",
+        headers={"ETag": etag, "Cache-Control": "public, max-age=86400, immutable", "X-Audio-Key": key}
+    )
+
+async def streamed_audio_response(text: str, voice: str) -> StreamingResponse:
+    chunks = stream_speech(text, voice)
+    # Wait for the first sentence so a failed synthesis can still be reported as an error status
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="Failed to synthesize speech via AI model")
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    media_type = "audio/wav" if first[:4] == b"RIFF" else "application/octet-stream"
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-store"})
+
 @router.post("/audio/text-to-speech")
-async def text_to_speech(request: TTSRequest):
+async def text_to_speech(request: TTSRequest, http_request: Request):
     """
     Accepts text and returns a synthesized speech audio file (WAV format) from NVIDIA TTS.
+    Clips are cached on disk by content, so repeated phrases skip the upstream call entirely.
     """
+    voice = request.voice or TTS_VOICE
+    key = audio_cache.key(request.text, voice, TTS_MODEL)
     try:
-        audio_content = await nvidia_client.synthesize_speech(text=request.text)
+        cached_path = await audio_cache.alookup(key)
+        if cached_path:
+            return cached_audio_response(cached_path, key, http_request)
+
+        if request.stream:
+            return await streamed_audio_response(request.text, voice)
+
+        audio_content = await nvidia_client.synthesize_speech(text=request.text, voice=voice)
         
         if not audio_content:
             raise HTTPException(status_code=500, detail="Failed to synthesize speech via AI model")
-            
-        # Return raw audio bytes to the client
-        return Response(content=audio_content, media_type="audio/wav")
+
+        path = await audio_cache.astore(key, audio_content)
+        return cached_audio_response(path, key, http_request)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/audio/text-to-speech/stats")
+async def tts_cache_stats():
+    """
+    Hit / miss / eviction counters of the on-disk speech cache.
+    """
+    return audio_cache.stats()
+
+@router.get("/audio/text-to-speech/{key}")
+async def cached_text_to_speech(key: str, http_request: Request):
+    """
+    Fetches a previously synthesized clip by its content key (the X-Audio-Key header), so audio
+    elements can GET, seek with Range requests and revalidate with If-None-Match.
+    """
+    if len(key) != 64 or any(c not in "0123456789abcdef" for c in key):
+        raise HTTPException(status_code=400, detail="Invalid audio key")
+    path = await audio_cache.alookup(key)
+    if not path:
+        raise HTTPException(status_code=404, detail="Audio clip not cached")
+    return cached_audio_response(path, key, http_request)
+
 class TranslationRequest(BaseModel):
     text: str
     target_language: str
 
+class BatchTranslationRequest(BaseModel):
+    texts: List[str]
+    target_language: str
+
 class ChatMessage(BaseModel):
     role: str
     content: str
     
 class ChatRequest(BaseModel):
-    messages: List[ChatMessage]
+    messages: List[ChatMessage] = [] # Full history; not needed when sending `message` with a session_id
+    message: Optional[str] = None # Only the new message: earlier turns come from the session's stored history
     hotel_id: str
+    session_id: Optional[str] = None
     user_location: Optional[str] = None
+    language: Optional[str] = None # UI language (e.g. "hi-IN"); part of the response cache key
 
 class ResetRequest(BaseModel):
     hotel_id: str
+    session_id: Optional[str] = None
 
 @router.post("/translate")
 async def translate_text(request: TranslationRequest):
     """
     Translates text into the target language using Mistral Large model via NVIDIA.
+    Concurrent calls for the same language are coalesced into one upstream request.
     """
     try:
-        translated_text = await nvidia_client.translate_text(
+        translated_text = await translation_batcher.translate(
             text=request.text,
             target_language=request.target_language
         )
@@ -84,118 +183,264 @@ async def translate_text(request: TranslationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/translate/batch")
+async def translate_batch(request: BatchTranslationRequest):
+    """
+    Translates many strings into one target language in a single call.
+    Failed strings come back as null rather than failing the whole batch.
+    """
+    if len(request.texts) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 texts per batch")
+    try:
+        translations = await translation_batcher.translate_many(request.texts, request.target_language)
+        return {"translations": translations}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/translate/cache-stats")
+async def translation_cache_stats():
+    """
+    Hit / miss / eviction counters of the translation cache.
+    """
+    return translation_cache.stats()
+
+@router.get("/translate/batch/stats")
+async def translation_batch_stats():
+    """
+    Micro-batching counters: requests, upstream calls and multi-string batches.
+    """
+    return translation_batcher.stats()
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def begin_chat_turn(request: ChatRequest) -> Optional[BookingSession]:
+    """Records the turn in the session store and returns the open booking (none once the expiry flusher persisted it)."""
+    booking = await session_store.begin_turn(
+        session_key(request.hotel_id, request.session_id),
+        request.hotel_id,
+        meta={"user_location": request.user_location}
+    )
+    return booking if booking is not None and booking.current_step != "completed" else None
+
+async def conversation_for(request: ChatRequest) -> List[dict]:
+    """The messages to send to the model: the stored window plus the new message, or the client's full list."""
+    if request.message is not None:
+        history = await conversation_history.window(request.session_id) if request.session_id else []
+        return history + [{"role": "user", "content": request.message}]
+    if not request.messages:
+        raise HTTPException(status_code=400, detail="Either `message` or `messages` is required")
+    return [{"role": msg.role, "content": msg.content} for msg in request.messages]
+
+def record_turn(request: ChatRequest, response_text: str):
+    """Appends the guest's message and the reply to the session history (written to the DB in the background)."""
+    if not request.session_id:
+        return
+    if request.message is not None:
+        conversation_history.append(request.session_id, "user", request.message)
+    elif request.messages and request.messages[-1].role == "user":
+        conversation_history.append(request.session_id, "user", request.messages[-1].content)
+    conversation_history.append(request.session_id, "bot", response_text)
+
+def booking_context_for(active_booking: Optional[BookingSession]) -> Optional[str]:
+    if not active_booking:
+        return None
+    return f"Service: {active_booking.service_type}, Status: {active_booking.current_step}, Data: {json.dumps(active_booking.temp_data_json)}"
+
+def recommendation_proxy_urls(recommendations: List[Recommendation]) -> None:
+    """Points every recommendation card at the async image proxy instead of real-time image URLs."""
+    for idx, rec in enumerate(recommendations):
+        safe_name = urllib.parse.quote(rec.name)
+        safe_city = urllib.parse.quote(rec.city or "India")
+        safe_category = urllib.parse.quote(rec.category or "tourism")
+        
+        # Apply a per-card offset to ensure unique images across the entire response
+        # Card 0: indices 0,1,2 | Card 1: indices 3,4,5 | Card 2: indices 6,7,8 etc.
+        offset = idx * IMAGES_PER_CARD
+        base_proxy = f"http://127.0.0.1:8000/api/v1/chat/recommendation-image?name={safe_name}&category={safe_category}&city={safe_city}"
+        rec.image_url = f"{base_proxy}&index={offset}"
+        rec.images = [
+            f"{base_proxy}&index={offset}",
+            f"{base_proxy}&index={offset + 1}",
+            f"{base_proxy}&index={offset + 2}"
+        ]
+
+async def apply_structured_tags(response_text: str, request: ChatRequest, active_booking: Optional[BookingSession]) -> str:
+    """
+    Post-processes the structured tags of a complete LLM response in one pass: rewrites
+    recommendation images to the proxy URLs, saves the booking state to the session store and
+    normalizes the itinerary plan. Tags that fail validation are left untouched. Returns the updated response.
+    """
+    tags = extract_tags(response_text)
+    replacements = {}
+    for idx, tag in enumerate(tags):
+        if not tag.valid:
+            print(f"Invalid {tag.name} tag from model: {tag.error}")
+            continue
+
+        if tag.name == RECOMMENDATIONS:
+            # Fast Response: Replace real-time images with a proxy URL
+            # The frontend will load these images asynchronously
+            recommendation_proxy_urls(tag.data)
+            # Resolve the whole set upstream now, before the browser requests the images
+            image_resolver.schedule_prefetch(tag.data)
+            replacements[idx] = render_tag(tag)
+
+        elif tag.name == BOOKING_STATE:
+            # Parse internal Booking State and save it to the session (Postgres gets it at confirm / expiry)
+            try:
+                await session_store.save_booking(
+                    session_key(request.hotel_id, request.session_id),
+                    request.hotel_id,
+                    service_type=tag.data.type or "booking",
+                    current_step=tag.data.status or "gathering_info",
+                    data=tag.dump(),
+                    created_at=active_booking.created_at if active_booking else None
+                )
+            except Exception as store_err:
+                print(f"Error saving booking state: {store_err}")
+
+        elif tag.name == ITINERARY_PLAN:
+            replacements[idx] = render_tag(tag)
+
+    return rebuild(response_text, replacements, tags)
+
 @router.post("/message")
-async def send_message(request: ChatRequest, db: Session = Depends(get_db)):
+async def send_message(request: ChatRequest, http_request: Request):
     """
     Sends a message to the AI agent and gets a response using Llama3-70b via NVIDIA.
+    Clients sending `Accept: text/event-stream` get the streaming variant (see /message/stream).
     """
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        return await stream_message(request)
+
     # Convert pydantic models to dicts for the NVIDIA client
-    dict_messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
-    
-    # Check for active booking state context (only if updated in last 2 hours)
-    two_hours_ago = datetime.utcnow() - timedelta(hours=2)
-    active_booking = db.query(BookingState).filter(
-        BookingState.hotel_id == request.hotel_id,
-        BookingState.current_step != "completed",
-        BookingState.updated_at >= two_hours_ago
-    ).first()
+    dict_messages = await conversation_for(request)
     
-    booking_context_str = None
-    if active_booking:
-        booking_context_str = f"Service: {active_booking.service_type}, Status: {active_booking.current_step}, Data: {json.dumps(active_booking.temp_data_json)}"
+    active_booking = await begin_chat_turn(request)
+    booking_context_str = booking_context_for(active_booking)
         
     try:
         response_text = await nvidia_client.generate_response(
             messages=dict_messages,
             booking_context=booking_context_str,
-            user_location=request.user_location
+            user_location=request.user_location,
+            hotel_id=request.hotel_id,
+            language=request.language
         )
         if not response_text:
             raise HTTPException(status_code=500, detail="Failed to get response from AI model")
             
-        # Fast Response: Replace real-time images with a proxy URL
-        # The frontend will load these images asynchronously
-        rec_match = re.search(r"\[RECOMMENDATIONS:\s*(\[.*\])\]", response_text, re.DOTALL | re.IGNORECASE)
-        if rec_match:
-            try:
-                rec_json_str = rec_match.group(1)
-                recommendations = json.loads(rec_json_str)
-                
-                for idx, rec in enumerate(recommendations):
-                    import urllib.parse
-                    name = rec.get("name", "Unknown")
-                    city = rec.get("city", "India")
-                    category = rec.get("category", "tourism")
-                    
-                    safe_name = urllib.parse.quote(name)
-                    safe_city = urllib.parse.quote(city)
-                    safe_category = urllib.parse.quote(category)
-                    
-                    # Apply a per-card offset to ensure unique images across the entire response
-                    # Card 0: indices 0,1,2 | Card 1: indices 3,4,5 | Card 2: indices 6,7,8 etc.
-                    offset = idx * 3
-                    base_proxy = f"http://127.0.0.1:8000/api/v1/chat/recommendation-image?name={safe_name}&category={safe_category}&city={safe_city}"
-                    rec["image_url"] = f"{base_proxy}&index={offset}"
-                    rec["images"] = [
-                        f"{base_proxy}&index={offset}",
-                        f"{base_proxy}&index={offset + 1}",
-                        f"{base_proxy}&index={offset + 2}"
-                    ]
-                
-                # Update the tag with internal proxy URLs
-                updated_rec_tag = f"[RECOMMENDATIONS: {json.dumps(recommendations)}]"
-                response_text = response_text.replace(rec_match.group(0), updated_rec_tag)
-                
-            except Exception as parse_err:
-                print(f"Error setting proxy URLs: {parse_err}")
-            
-        # Parse internal Booking State and save to Postgres
-        booking_match = re.search(r"\[BOOKING_STATE:\s*(\{.*\})\]", response_text, re.DOTALL | re.IGNORECASE)
-        if booking_match:
-            try:
-                booking_json_str = booking_match.group(1)
-                booking_json = json.loads(booking_json_str)
-                service_type = booking_json.get("type", "booking")
-                status = booking_json.get("status", "gathering_info")
+        response_text = await apply_structured_tags(response_text, request, active_booking)
+        record_turn(request, response_text)
                 
-                if not active_booking:
-                    active_booking = BookingState(
-                        hotel_id=request.hotel_id,
-                        service_type=service_type,
-                        current_step=status,
-                        temp_data_json=booking_json
-                    )
-                    db.add(active_booking)
-                else:
-                    active_booking.service_type = service_type
-                    active_booking.current_step = status
-                    active_booking.temp_data_json = booking_json
-                db.commit()
-            except Exception as parse_err:
-                print(f"Error parsing booking state JSON: {parse_err}")
-                
-        return {"response": response_text}
+        return {"response": response_text, "session_id": request.session_id}
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/message/stream")
+async def stream_message(request: ChatRequest):
+    """
+    Streaming variant of /message over Server-Sent Events.
+    Emits `delta` events with conversational text as the model generates it, then a single
+    `final` event carrying the processed structured tag and the full response, then `done`.
+    """
+    dict_messages = await conversation_for(request)
+
+    active_booking = await begin_chat_turn(request)
+    booking_context_str = booking_context_for(active_booking)
+
+    async def event_stream():
+        holdback = TagHoldback()
+        try:
+            async for delta in nvidia_client.stream_response(
+                messages=dict_messages,
+                booking_context=booking_context_str,
+                user_location=request.user_location,
+                hotel_id=request.hotel_id,
+                language=request.language
+            ):
+                text = holdback.feed(delta)
+                if text:
+                    yield sse_event("delta", {"text": text})
+            text = holdback.flush()
+            if text:
+                yield sse_event("delta", {"text": text})
+
+            full_text = await apply_structured_tags(holdback.text + holdback.tag, request, active_booking)
+            tag = full_text[len(holdback.text):] if holdback.tag else ""
+            record_turn(request, full_text)
+            yield sse_event("final", {"tag": tag.strip(), "response": full_text})
+            yield sse_event("done", {})
+        except Exception as e:
+            print(f"Error streaming NVIDIA API response: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/reset")
-async def reset_chat(request: ResetRequest, db: Session = Depends(get_db)):
+async def reset_chat(request: ResetRequest, db: AsyncSession = Depends(get_db)):
     """
-    Clears any active (non-completed) booking states for the user.
+    Clears the chat session, its stored history and any active (non-completed) booking states for the user.
     """
     try:
-        db.query(BookingState).filter(
+        await session_store.clear(session_key(request.hotel_id, request.session_id))
+        if request.session_id:
+            await conversation_history.clear(request.session_id)
+        await db.execute(delete(BookingState).where(
             BookingState.hotel_id == request.hotel_id,
-            BookingState.current_step != "completed"
-        ).delete()
-        db.commit()
+            BOOKING_STATE_OPEN
+        ))
+        await db.commit()
         return {"status": "success", "message": "Chat context reset successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/session/stats")
+async def session_stats():
+    """
+    Backend (redis / memory), live session count and turn / write-behind counters of the session store.
+    """
+    return await session_store.stats()
+
+class ResponseCacheInvalidateRequest(BaseModel):
+    hotel_id: str
+
+@router.get("/response-cache/stats")
+async def response_cache_stats():
+    """
+    Hit rate, size and bypass counters of the LLM response cache.
+    """
+    return response_cache.stats()
+
+@router.post("/response-cache/invalidate")
+async def invalidate_response_cache(request: ResponseCacheInvalidateRequest):
+    """
+    Drops the cached answers of one hotel, e.g. after its recommendations or services changed.
+    """
+    return {"hotel_id": request.hotel_id, "invalidated": response_cache.invalidate(request.hotel_id)}
+
+@router.get("/history/stats")
+async def history_stats():
+    """
+    Window cache hit / miss counters and batched writer counters of the server-side chat history.
+    """
+    return conversation_history.stats()
+
+@router.get("/history/{session_id}")
+async def get_history(session_id: str):
+    """
+    The session's recent messages (oldest first), e.g. to restore the chat after a page reload.
+    """
+    return {"session_id": session_id, "messages": await conversation_history.window(session_id)}
+
 @router.get("/recommendation-image")
 async def get_recommendation_image(name: str, category: str = "tourism", city: str = "Hyderabad", index: int = 0):
     """
@@ -203,85 +448,14 @@ async def get_recommendation_image(name: str, category: str = "tourism", city: s
     1. WikiData (SPARQL): 100% accurate entity-verified photos (Primary).
     2. Unsplash (Professional): Official API for stunning visuals.
     3. LoremFlickr: Final search fallback.
+    Resolved lookups (including "no image" answers) are cached, so repeat cards redirect immediately.
     """
-    from fastapi.responses import RedirectResponse
-    import httpx
-    import re
-    from app.config import settings
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    }
-    
-    clean_name = name.strip()
-    
-    async with httpx.AsyncClient() as client:
-        # TIER 1: WikiData (Structured Database - 100% Accurate)
-        try:
-            # Flexible case-insensitive query for the item and its image
-            # We try both the original name and the name with underscores
-            l_name = clean_name.lower()
-            u_name = l_name.replace(" ", "_")
-            sparql = f"""
-            SELECT ?image WHERE {{
-              ?item rdfs:label ?label.
-              FILTER(LCASE(STR(?label)) IN ("{l_name}", "{u_name}"))
-              ?item wdt:P18 ?image.
-              SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-            }} LIMIT 1
-            """
-            wiki_url = "https://query.wikidata.org/sparql"
-            w_resp = await client.get(wiki_url, params={"query": sparql, "format": "json"}, headers=headers, timeout=5.0)
-            if w_resp.status_code == 200:
-                w_data = w_resp.json()
-                bindings = w_data.get("results", {}).get("bindings", [])
-                if bindings:
-                    # If we have multiple images in WikiData, we can use the index
-                    # but usually it only has 1 main P18 image.
-                    # We'll use WikiData only for index 0 to ensure 100% accuracy for the main shot.
-                    if index == 0:
-                        img_url = bindings[0]["image"]["value"]
-                        if img_url:
-                            return RedirectResponse(url=img_url)
-        except Exception as e:
-            print(f"WikiData Proxy Error: {e}")
+    image_url, _ = await image_resolver.resolve(name, category, city, index)
+    return RedirectResponse(url=image_url)
 
-        # TIER 2: Unsplash (Professional API)
-        try:
-            # Improve query for relevance by adding category
-            u_query = f"{clean_name} {category} {city}"
-            if settings.unsplash_access_key:
-                # Official API - pull more (20) to ensure uniqueness across multiple cards 
-                unsplash_url = f"https://api.unsplash.com/search/photos?query={u_query}&per_page=20"
-                u_headers = {**headers, "Authorization": f"Client-ID {settings.unsplash_access_key}"}
-                u_resp = await client.get(unsplash_url, headers=u_headers, timeout=5.0)
-                
-                if u_resp.status_code == 200:
-                    u_data = u_resp.json()
-                    u_results = u_data.get("results", [])
-                    if len(u_results) > index:
-                        u_img = u_results[index].get("urls", {}).get("regular")
-                        if u_img:
-                            return RedirectResponse(url=u_img)
-            else:
-                # Fallback NAPI (Public endpoint)
-                unsplash_url = f"https://unsplash.com/napi/search/photos?query={u_query}&per_page=20"
-                u_resp = await client.get(unsplash_url, headers=headers, timeout=5.0)
-
-                if u_resp.status_code == 200:
-                    u_data = u_resp.json()
-                    u_results = u_data.get("results", [])
-                    # The public NAPI sometimes returns fewer results or a different structure
-                    # We ensure we modulo the index against available results so it doesn't crash
-                    if u_results:
-                        safe_index = index % len(u_results)
-                        u_img = u_results[safe_index].get("urls", {}).get("regular")
-                        if u_img:
-                            return RedirectResponse(url=u_img)
-        except Exception as e:
-            print(f"Unsplash Proxy Error: {e}")
-
-    # TIER 3: Final Fallback (LoremFlickr)
-    safe_name = re.sub(r'[^a-zA-Z0-9]', '', clean_name.lower())
-    fallback_url = f"https://loremflickr.com/600/400/{city.lower()},{safe_name}/all?lock={index}"
-    return RedirectResponse(url=fallback_url)
+@router.get("/recommendation-image/stats")
+async def recommendation_image_stats():
+    """
+    Hit / miss counters of the resolved-image cache and upstream calls per tier.
+    """
+    return image_resolver.stats()
@@ -1,8 +1,13 @@
-import uuid
-from typing import List, Dict, Any
-from fastapi import APIRouter, Query, HTTPException
+import asyncio
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Query, HTTPException, Depends
 from pydantic import BaseModel
-from app.services.weather_client import get_current_weather
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_db
+from app.services.weather_client import get_current_weather, weather_cache, forecast_cache
+from app.services.zone_forecast import zone_forecast
+from app.services.zone_scoring import zone_store, score_zones, weather_flags, zone_rows
 
 router = APIRouter(prefix="/zones", tags=["Zones"])
 
@@ -21,73 +26,137 @@ class ZonesContextResponse(BaseModel):
     weather_context: Dict[str, Any]
     zones: List[ZoneResponse]
 
-BASE_ZONES = [
-    {"name": "Old Town", "safety": 85, "crowd": 60, "price": 50, "review": 90},
-    {"name": "Beach District", "safety": 90, "crowd": 70, "price": 65, "review": 85},
-    {"name": "Night Market", "safety": 55, "crowd": 85, "price": 40, "review": 75},
-    {"name": "Industrial Quarter", "safety": 30, "crowd": 20, "price": 80, "review": 25},
-    {"name": "Temple District", "safety": 95, "crowd": 45, "price": 55, "review": 95},
-    {"name": "Harbor Area", "safety": 60, "crowd": 50, "price": 45, "review": 60},
-]
+class ZoneBatchItem(BaseModel):
+    hotel_id: Optional[str] = None
+    lat: float
+    lon: float
 
-def calculate_zone_scores(base_zone: dict, weather_ctx: dict) -> dict:
-    # 1. Weather Score Modifier
-    base_weather = 100
-    if weather_ctx["is_raining"]:
-        base_weather -= 30
-    if weather_ctx["is_extreme_heat"]:
-        base_weather -= 40
-        
-    weather_score = max(0, min(100, base_weather))
-
-    # 2. Crowd Modifier (if raining or extreme heat, crowds drop)
-    crowd = base_zone["crowd"]
-    if weather_ctx["is_raining"] or weather_ctx["is_extreme_heat"]:
-        crowd = max(10, int(crowd * 0.5))
-
-    safety = base_zone["safety"]
-    price = base_zone["price"]
-    review = base_zone["review"]
+class ZoneBatchRequest(BaseModel):
+    items: List[ZoneBatchItem]
 
-    # 3. Overall Score Calculation (Weights: Safety 40%, Weather 20%, Review 20%, Price 10%, Crowd (inversely) 10%)
-    overall = int((safety * 0.4) + (weather_score * 0.2) + (review * 0.2) + (price * 0.1) + ((100 - crowd) * 0.1))
+class ZoneBatchResult(ZonesContextResponse):
+    hotel_id: Optional[str] = None
+    lat: float
+    lon: float
 
-    # 4. Color Classification
-    color = "green"
-    if overall < 40:
-        color = "red"
-    elif overall < 70:
-        color = "yellow"
+class ZoneForecastSeries(BaseModel):
+    id: str
+    name: str
+    safetyScore: int
+    priceScore: int
+    reviewScore: int
+    crowdScore: List[int]
+    weatherScore: List[int]
+    overallScore: List[int]
+    color: List[str]
 
-    return {
-        "id": str(uuid.uuid4())[:8],
-        "name": base_zone["name"],
-        "safetyScore": safety,
-        "crowdScore": crowd,
-        "weatherScore": weather_score,
-        "priceScore": price,
-        "reviewScore": review,
-        "color": color,
-        "overallScore": overall
-    }
+class ZoneForecastResponse(BaseModel):
+    hotel_id: Optional[str] = None
+    hours: List[str]
+    hours_available: int # Fewer than requested when the cached forecast ends sooner
+    weather: List[Dict[str, Any]]
+    forecast_age_seconds: Optional[float] = None
+    stale: bool
+    source: Optional[str] = None
+    zones: List[ZoneForecastSeries]
 
 @router.get("", response_model=ZonesContextResponse)
 async def get_zones(
     lat: float = Query(26.9124, description="Latitude (Default Jaipur)"),
-    lon: float = Query(75.7873, description="Longitude (Default Jaipur)")
+    lon: float = Query(75.7873, description="Longitude (Default Jaipur)"),
+    hotel_id: Optional[str] = Query(None, description="Score this hotel's zones (default areas if omitted)"),
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Get live weather context
         weather_ctx = await get_current_weather(lat, lon)
         
         # Calculate dynamic zones
-        zones = []
-        for bz in BASE_ZONES:
-            zones.append(calculate_zone_scores(bz, weather_ctx))
+        zone_set = await zone_store.get(db, hotel_id)
+        raining, heat = weather_flags([weather_ctx])
+        scores = score_zones(zone_set, raining, heat)
             
         return {
             "weather_context": weather_ctx,
-            "zones": zones
+            "zones": zone_rows(zone_set, scores, 0)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch", response_model=List[ZoneBatchResult])
+async def get_zones_batch(request: ZoneBatchRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Scores many (hotel, location) pairs in one call. Weather is fetched once per geohash bucket,
+    zones are loaded for all hotels in one query, and each hotel's zones are scored against all
+    of its locations' weather in a single vectorized pass.
+    """
+    if len(request.items) > settings.zone_batch_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.zone_batch_max_items} items per batch")
+    try:
+        weather = await asyncio.gather(*(get_current_weather(item.lat, item.lon) for item in request.items))
+        zone_sets = await zone_store.get_many(db, list({item.hotel_id for item in request.items}))
+
+        # hotel -> positions of its items in the request
+        by_hotel: Dict[Optional[str], List[int]] = {}
+        for pos, item in enumerate(request.items):
+            by_hotel.setdefault(item.hotel_id, []).append(pos)
+
+        results: List[Dict[str, Any]] = [None] * len(request.items)
+        for hotel_id, positions in by_hotel.items():
+            zone_set = zone_sets[hotel_id]
+            raining, heat = weather_flags([weather[pos] for pos in positions])
+            scores = score_zones(zone_set, raining, heat)
+            for row, pos in enumerate(positions):
+                item = request.items[pos]
+                results[pos] = {
+                    "hotel_id": item.hotel_id,
+                    "lat": item.lat,
+                    "lon": item.lon,
+                    "weather_context": weather[pos],
+                    "zones": zone_rows(zone_set, scores, row)
+                }
+        return results
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/forecast", response_model=ZoneForecastResponse)
+async def get_zones_forecast(
+    lat: float = Query(26.9124, description="Latitude (Default Jaipur)"),
+    lon: float = Query(75.7873, description="Longitude (Default Jaipur)"),
+    hotel_id: Optional[str] = Query(None, description="Score this hotel's zones (default areas if omitted)"),
+    start_hour: int = Query(0, ge=0, description="First hour, relative to the current hour"),
+    hours: int = Query(24, ge=1, description="Number of hours to return"),
+    zone_id: Optional[str] = Query(None, description="Only this zone's series"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Hourly zone scores from the precomputed (zone x hour) grid of the hotel and weather bucket.
+    Each zone carries one value per returned hour; `hours` holds the matching UTC hour starts
+    (fewer than requested if the cached forecast does not reach that far, see `hours_available`).
+    """
+    if start_hour + hours > settings.weather_forecast_hours:
+        raise HTTPException(status_code=400, detail=f"Forecast covers the next {settings.weather_forecast_hours} hours")
+    try:
+        grid = await zone_forecast.get(db, hotel_id, lat, lon)
+        result = grid.slice(start_hour, hours, zone_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if zone_id is not None and not result["zones"]:
+        raise HTTPException(status_code=404, detail="Zone not found")
+    if not result["hours_available"]:
+        raise HTTPException(status_code=503, detail="Forecast for the requested hours is not available yet")
+    return {"hotel_id": hotel_id, **result}
+
+@router.get("/forecast/stats")
+async def zone_forecast_stats():
+    """
+    Grid hit / miss / rebuild counters and the hourly forecast cache counters.
+    """
+    return {**zone_forecast.stats(), "forecast_cache": forecast_cache.stats()}
+
+@router.get("/weather/stats")
+async def weather_cache_stats():
+    """
+    Hit / stale-hit / miss counters of the geo-bucketed weather cache.
+    """
+    return weather_cache.stats()
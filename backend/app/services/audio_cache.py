@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+class AudioCache:
+    """
+    Content-addressed on-disk cache for synthesized speech. Each clip is stored once under
+    sha256(model, voice, text) and the directory is kept under `max_bytes` by evicting the
+    least recently served clips. The LRU order is rebuilt from file mtimes on startup.
+    Clips served within the last `serve_grace_seconds` are never evicted, so a FileResponse
+    that has not opened its file yet cannot lose it; the cap may be exceeded meanwhile.
+    """
+    def __init__(self, directory: str, max_bytes: int, serve_grace_seconds: float = 30.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.serve_grace_seconds = serve_grace_seconds
+        self._index: "OrderedDict[str, int]" = OrderedDict() # key -> size, least recent first
+        self._served: Dict[str, float] = {} # key -> monotonic time it was last handed out
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text: str, voice: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\0{voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.directory, key[:2], f"{key}.wav")
+
+    def _load_index(self):
+        if self._loaded:
+            return
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".wav"):
+                        continue
+                    stat = os.stat(os.path.join(root, name))
+                    entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.current_bytes += size
+        self._loaded = True
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Returns the file path of a cached clip (marking it recently used), or None."""
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                self.misses += 1
+                return None
+            path = self.path_for(key)
+            try:
+                os.utime(path) # Persist recency for the next startup
+            except FileNotFoundError:
+                self.current_bytes -= self._index.pop(key)
+                self._served.pop(key, None)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self._served[key] = time.monotonic()
+            self.hits += 1
+            return path
+
+    def store(self, key: str, audio: bytes) -> str:
+        """Writes a clip atomically, evicts least recently used clips over the cap, returns its path."""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._load_index()
+            if key in self._index:
+                self.current_bytes -= self._index.pop(key)
+            self._index[key] = len(audio)
+            self._served[key] = time.monotonic()
+            self.current_bytes += len(audio)
+            recent = time.monotonic() - self.serve_grace_seconds
+            while self.current_bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                if self._served.get(oldest, 0.0) > recent:
+                    break # LRU order: every remaining clip was served even more recently
+                size = self._index.pop(oldest)
+                self._served.pop(oldest, None)
+                self.current_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self.path_for(oldest))
+                except FileNotFoundError:
+                    pass
+        return path
+
+    async def alookup(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.lookup, key)
+
+    async def astore(self, key: str, audio: bytes) -> str:
+        return await asyncio.to_thread(self.store, key, audio)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+# Singleton instance
+audio_cache = AudioCache(settings.tts_cache_dir, settings.tts_cache_max_bytes, settings.tts_cache_serve_grace_seconds)
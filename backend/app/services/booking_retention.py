@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import BookingState, BookingStateArchive
+
+ARCHIVED_COLUMNS = ("id", "user_id", "hotel_id", "service_type", "current_step", "temp_data_json", "created_at", "updated_at")
+
+class BookingStateRetention:
+    """
+    Moves completed booking states (and open ones nobody touched for `abandoned_days`) from
+    booking_state into booking_state_archive, `batch_size` rows per transaction, so the
+    hot table only holds the states the chat can still pick up.
+    """
+    def __init__(self, interval_seconds: float, completed_days: float, abandoned_days: float, batch_size: int):
+        self.interval_seconds = interval_seconds
+        self.completed_days = completed_days
+        self.abandoned_days = abandoned_days
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.archived = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_archived = 0
+        self.errors = 0
+
+    async def startup(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _expired(self, now: datetime):
+        return or_(
+            (BookingState.current_step == "completed") & (BookingState.updated_at < now - timedelta(days=self.completed_days)),
+            (BookingState.current_step != "completed") & (BookingState.updated_at < now - timedelta(days=self.abandoned_days)),
+        )
+
+    async def archive_batch(self, db: AsyncSession, now: datetime) -> int:
+        """Archives up to batch_size expired states in one transaction; returns how many."""
+        # SKIP LOCKED: several workers can run the job without archiving the same rows twice
+        ids = (await db.execute(
+            select(BookingState.id).where(self._expired(now)).order_by(BookingState.id)
+            .limit(self.batch_size).with_for_update(skip_locked=True)
+        )).scalars().all()
+        if not ids:
+            return 0
+        columns = [getattr(BookingState, c) for c in ARCHIVED_COLUMNS]
+        await db.execute(
+            insert(BookingStateArchive).from_select(ARCHIVED_COLUMNS, select(*columns).where(BookingState.id.in_(ids)))
+        )
+        await db.execute(delete(BookingState).where(BookingState.id.in_(ids)))
+        await db.commit()
+        return len(ids)
+
+    async def run(self, db: Optional[AsyncSession] = None) -> int:
+        """One full pass: archives batches until no expired state is left."""
+        if db is None:
+            async with AsyncSessionLocal() as own_db:
+                return await self.run(own_db)
+        now = datetime.now(timezone.utc)
+        total = 0
+        try:
+            while True:
+                archived = await self.archive_batch(db, now)
+                total += archived
+                if archived < self.batch_size:
+                    break
+        except Exception:
+            await db.rollback()
+            raise
+        finally:
+            self.runs += 1
+            self.archived += total
+            self.last_run_at = now
+            self.last_run_archived = total
+        return total
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run()
+            except Exception as e:
+                self.errors += 1
+                print(f"Booking state retention error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "archived": self.archived,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_archived": self.last_run_archived,
+            "errors": self.errors,
+        }
+
+# Singleton instance
+booking_retention = BookingStateRetention(
+    interval_seconds=settings.booking_retention_interval_seconds,
+    completed_days=settings.booking_retention_completed_days,
+    abandoned_days=settings.booking_retention_abandoned_days,
+    batch_size=settings.booking_retention_batch_size
+)
@@ -0,0 +1,222 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Conversation, RoleEnum
+
+# Chat roles as the frontend sends them ("bot" for the concierge); anything else is not stored
+ROLES = {"user": RoleEnum.USER, "bot": RoleEnum.BOT, "assistant": RoleEnum.BOT}
+
+def utc(timestamp: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC, so timestamps read back from SQLite (naive) and Postgres (aware) compare equal."""
+    if timestamp is not None and timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+class ConversationWriter:
+    """
+    Write-behind for the conversations table: appends are queued without waiting and inserted
+    in bulk (one multi-row INSERT per `batch_size` rows, or every `interval_seconds`), off the
+    response path. Failed batches are retried; past `max_pending` queued rows new ones are dropped.
+    """
+    def __init__(self, batch_size: int, interval_seconds: float, max_pending: int, max_retries: int = 3):
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._pending: List[Dict[str, Any]] = [] # Queued or in the batch being inserted
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Serializes batch inserts with ConversationHistory.clear (not held by loaders or back-off)
+        self.lock = asyncio.Lock()
+        self.appended = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+
+    async def startup(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            while self._pending:
+                if not await self._write_batch():
+                    break
+        except Exception as e:
+            print(f"Conversation write error: {e}")
+
+    def append(self, session_id: str, role: RoleEnum, message: str, user_id: Optional[int] = None):
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.appended += 1
+        self._pending.append({
+            "session_id": session_id,
+            "user_id": user_id,
+            "role": role,
+            "message": message,
+            "timestamp": datetime.now(timezone.utc),
+        })
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_for(self, session_id: str) -> List[Dict[str, Any]]:
+        return [row for row in self._pending if row["session_id"] == session_id]
+
+    def discard(self, session_id: str):
+        self._pending = [row for row in self._pending if row["session_id"] != session_id]
+
+    async def _write_batch(self) -> bool:
+        for attempt in range(self.max_retries):
+            if attempt:
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+            async with self.lock:
+                batch = self._pending[:self.batch_size]
+                if not batch:
+                    return True
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await db.execute(insert(Conversation), batch)
+                        await db.commit()
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Conversation write error (attempt {attempt + 1}): {e}")
+                    continue
+                # Only rows of this batch: appends made while it was written stay queued
+                written = {id(row) for row in batch}
+                self._pending = [row for row in self._pending if id(row) not in written]
+                self.written += len(batch)
+                self.batches += 1
+                return True
+        return False # Keep the rows pending for the next round
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while self._pending and await self._write_batch() and len(self._pending) >= self.batch_size:
+                    pass
+            except Exception as e:
+                print(f"Conversation write error: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "appended": self.appended,
+            "written": self.written,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+class ConversationHistory:
+    """
+    Recent messages per chat session (newest `window` of them), so clients send only the new
+    message plus a session_id. Windows are cached in process (LRU over `max_sessions`, reloaded
+    after `ttl_seconds`) and loaded from the conversations table on a miss; new messages go to
+    the cached window immediately and to the table through the ConversationWriter.
+    """
+    def __init__(self, writer: ConversationWriter, window: int, max_sessions: int, ttl_seconds: float):
+        self.writer = writer
+        self.window_size = window
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._windows: "OrderedDict[str, Tuple[float, Deque[Dict[str, str]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def window(self, session_id: str) -> List[Dict[str, str]]:
+        """The session's recent messages, oldest first, as {"role": "user" | "bot", "content": ...}."""
+        cached = self._windows.get(session_id)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+            self.hits += 1
+            self._windows.move_to_end(session_id)
+            return list(cached[1])
+        self.misses += 1
+        messages = await self._load(session_id)
+        self._windows[session_id] = (time.monotonic(), messages)
+        self._windows.move_to_end(session_id)
+        while len(self._windows) > self.max_sessions:
+            self._windows.popitem(last=False)
+        return list(messages)
+
+    async def _load(self, session_id: str) -> Deque[Dict[str, str]]:
+        # No lock against the writer: a row committed while the query runs is in the snapshot
+        # taken before it, one appended meanwhile in the snapshot after; rows the query did see
+        # are dropped from both by their (timestamp, role, message)
+        pending = self.writer.pending_for(session_id)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Conversation.timestamp, Conversation.role, Conversation.message)
+                .where(Conversation.session_id == session_id)
+                .order_by(Conversation.id.desc())
+                .limit(self.window_size)
+            )
+            rows = list(reversed(result.all()))
+        seen = {id(row) for row in pending}
+        pending += [row for row in self.writer.pending_for(session_id) if id(row) not in seen]
+        stored = {(utc(timestamp), role, message) for timestamp, role, message in rows}
+        messages = deque(maxlen=self.window_size)
+        messages.extend({"role": role.value, "content": message} for _, role, message in rows)
+        messages.extend(
+            {"role": row["role"].value, "content": row["message"]} for row in pending
+            if (utc(row["timestamp"]), row["role"], row["message"]) not in stored
+        )
+        return messages
+
+    def append(self, session_id: str, role: str, content: str):
+        """Records a message without waiting: cached window now, conversations table in the next batch."""
+        stored_role = ROLES.get(role)
+        if stored_role is None or not content:
+            return
+        cached = self._windows.get(session_id)
+        if cached is not None:
+            cached[1].append({"role": stored_role.value, "content": content})
+        self.writer.append(session_id, stored_role, content)
+
+    async def clear(self, session_id: str):
+        """Forgets a session: cached window, queued appends and stored rows."""
+        self._windows.pop(session_id, None)
+        async with self.writer.lock:
+            self.writer.discard(session_id)
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(Conversation).where(Conversation.session_id == session_id))
+                await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "sessions_cached": len(self._windows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writer": self.writer.stats(),
+        }
+
+# Singleton instances
+conversation_writer = ConversationWriter(
+    batch_size=settings.history_write_batch_size,
+    interval_seconds=settings.history_write_interval_ms / 1000,
+    max_pending=settings.history_write_max_pending
+)
+conversation_history = ConversationHistory(
+    conversation_writer,
+    window=settings.history_window_messages,
+    max_sessions=settings.history_cache_max_sessions,
+    ttl_seconds=settings.history_cache_ttl_seconds
+)
@@ -1,56 +1,335 @@
 import csv
+import hashlib
+import math
 import os
-from typing import List, Dict
+import re
+import time
+from collections import defaultdict
+from typing import Iterable, List, Dict, Optional, Tuple
 
-class TourismDataLoader:
+import numpy as np
+
+from app.services.gazetteer import gazetteer, parse_coordinates
+
+# Fields indexed for retrieval and how much a term hit in each one counts (BM25F-style)
+INDEXED_FIELDS = {"name": 3, "city": 3, "state": 2, "type": 2, "category": 1}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Bonus (as a fraction of the best text score) for places in a city the guest is in or near
+NEAR_CITY_BOOST = 0.5
+
+STOPWORDS = frozenset("""
+a an and any are as at be best can do for from get go good how i in is it me my near of on or
+place places please recommend should show some suggest that the there to top trip visit want
+what where which with you your
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+# CSV header aliases per field, in order of preference. "Top Indian Places to Visit.csv" uses
+# the first spelling; places.csv uses Place/Ratings and has no state or fee columns.
+COLUMN_ALIASES = {
+    "name": ("Name", "Place", "place_name", "name"),
+    "city": ("City", "city"),
+    "state": ("State", "state"),
+    "category": ("Significance", "Category", "category"),
+    "type": ("Type", "type"),
+    "rating": ("Google review rating", "Ratings", "Rating", "rating"),
+    "price": ("Entrance Fee in INR", "Entry Fee", "Fee", "price"),
+    "time_needed": ("time needed to visit in hrs", "Time Needed", "time_needed"),
+    "best_time": ("Best Time to visit", "Best Time", "best_time"),
+    "closed_on": ("Weekly Off", "closed_on"),
+}
+CATEGORICAL_FIELDS = ("city", "state", "category", "type", "best_time", "closed_on")
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+def _parse_number(value: str) -> float:
+    """First number in a CSV cell ("4.5", "Rs. 50", "1.5 hrs"), NaN if there is none."""
+    match = _NUMBER_RE.search(value or "")
+    return float(match.group()) if match else math.nan
+
+def _format_number(value: float) -> str:
+    return f"{value:g}" if not math.isnan(value) else ""
+
+class Categorical:
+    """Interned string column: each distinct value is stored once, rows hold int codes."""
     def __init__(self):
-        self.places_db: List[Dict] = []
-        self._load_data()
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class PlaceStore:
+    """
+    Columnar, array-backed store for the tourism dataset. Categorical fields are interned
+    codes, rating / fee / time needed are numeric arrays parsed once at load, and each
+    place's prompt line is rendered once so building the LLM context is a join.
+    """
+    def __init__(self):
+        self.names: List[str] = []
+        self.categoricals = {field: Categorical() for field in CATEGORICAL_FIELDS}
+        self.codes: Dict[str, np.ndarray] = {field: np.empty(0, dtype=np.int32) for field in CATEGORICAL_FIELDS}
+        self.rating = np.empty(0, dtype=np.float32)
+        self.fee = np.empty(0, dtype=np.float32) # INR, 0 = free, NaN = unknown
+        self.time_needed = np.empty(0, dtype=np.float32) # hours
+        self.context_lines: List[str] = []
+        self._keys = set()
+        # Row-wise staging until freeze()
+        self._staged_codes = {field: [] for field in CATEGORICAL_FIELDS}
+        self._staged_numbers: Dict[str, List[float]] = {"rating": [], "fee": [], "time_needed": []}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, row: Dict[str, str]) -> bool:
+        """Stages one place. Returns False if it duplicates a place already in the store."""
+        name = row.get("name", "").strip()
+        city = row.get("city", "").strip()
+        key = (" ".join(tokenize(name)) or name.lower(), city.lower())
+        if not name or key in self._keys:
+            return False
+        self._keys.add(key)
+
+        self.names.append(name)
+        for field in CATEGORICAL_FIELDS:
+            default = "None" if field == "closed_on" else ""
+            self._staged_codes[field].append(self.categoricals[field].code(row.get(field, default).strip() or default))
+        self._staged_numbers["rating"].append(_parse_number(row.get("rating", "")))
+        self._staged_numbers["fee"].append(_parse_number(row.get("price", "")))
+        self._staged_numbers["time_needed"].append(_parse_number(row.get("time_needed", "")))
+        return True
+
+    def freeze(self):
+        """Moves staged rows into the column arrays and renders the per-place context lines."""
+        for field in CATEGORICAL_FIELDS:
+            self.codes[field] = np.array(self._staged_codes[field], dtype=np.int32)
+        self.rating = np.array(self._staged_numbers["rating"], dtype=np.float32)
+        self.fee = np.array(self._staged_numbers["fee"], dtype=np.float32)
+        self.time_needed = np.array(self._staged_numbers["time_needed"], dtype=np.float32)
+        self.context_lines = [self._render_line(i) for i in range(len(self.names))]
+        # Staging and de-duplication keys are only needed while loading
+        self._keys = set()
+        self._staged_codes = {field: [] for field in CATEGORICAL_FIELDS}
+        self._staged_numbers = {"rating": [], "fee": [], "time_needed": []}
+
+    def value(self, field: str, idx: int) -> str:
+        return self.categoricals[field].values[self.codes[field][idx]]
+
+    def row(self, idx: int) -> Dict[str, str]:
+        """Dict view of one place, in the shape the loader used to keep per row."""
+        row = {"name": self.names[idx]}
+        for field in CATEGORICAL_FIELDS:
+            row[field] = self.value(field, idx)
+        rating = float(self.rating[idx])
+        row["rating"] = f"{rating:.1f}" if not math.isnan(rating) else ""
+        row["price"] = _format_number(float(self.fee[idx]))
+        row["time_needed"] = _format_number(float(self.time_needed[idx]))
+        return row
+
+    def _render_line(self, idx: int) -> str:
+        p = self.row(idx)
+        # Rows from places.csv lack some columns; drop those segments rather than print blanks
+        kind = "/".join(v for v in (p['type'], p['category']) if v)
+        segments = [f"- {p['name']} ({p['city']}, {p['state']})"]
+        if kind:
+            segments.append(f"Type: {kind}")
+        if p['rating']:
+            segments.append(f"Rating: {p['rating']}/5")
+        if p['price']:
+            segments.append(f"Fee: Rs. {p['price']}" if p['price'] != '0' else "Fee: Free")
+        if p['best_time']:
+            segments.append(f"Best Time: {p['best_time']}")
+        closed_str = f"(Closed on {p['closed_on']})" if p['closed_on'] and p['closed_on'].lower() != 'none' else ""
+        if p['time_needed']:
+            segments.append(f"Time Needed: {p['time_needed']} hrs {closed_str}")
+        elif closed_str:
+            segments.append(closed_str)
+        return " | ".join(segments) + "\n"
+
+class TourismDataLoader:
+    def __init__(self, load: bool = True):
+        self.store = PlaceStore()
+        # Inverted index: term -> (place indices, weighted term frequencies)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.length_norm = np.empty(0, dtype=np.float32) # Per-place BM25 length normalization
+        self.city_index: Dict[str, np.ndarray] = {}
+        self.index_build_seconds = 0.0
+        self.version = ""
+        if load:
+            self._load_data()
 
     def _load_data(self):
         # Determine the absolute path to the datasets
         # Assuming we are running from backend/ directory and dataset is in ../dataset
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
         dataset_dir = os.path.join(base_dir, "dataset")
-        
+
         file1_path = os.path.join(dataset_dir, "Top Indian Places to Visit.csv")
         file2_path = os.path.join(dataset_dir, "places.csv")
 
-        # Load File 1: Top Indian Places
-        try:
-            with open(file1_path, mode='r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    self.places_db.append({
-                        "name": row.get('Name', '').strip(),
-                        "city": row.get('City', '').strip(),
-                        "state": row.get('State', '').strip(),
-                        "category": row.get('Significance', '').strip(),
-                        "type": row.get('Type', '').strip(),
-                        "rating": row.get('Google review rating', '').strip(),
-                        "price": row.get('Entrance Fee in INR', '0').strip(),
-                        "time_needed": row.get('time needed to visit in hrs', '').strip(),
-                        "best_time": row.get('Best Time to visit', '').strip(),
-                        "closed_on": row.get('Weekly Off', 'None').strip()
-                    })
-        except Exception as e:
-            print(f"Failed to load {file1_path}: {e}")
-
-        # If we need more data, we could load file2_path, but file1 usually has enough rich data for Hyderabad.
-        
-    def get_context_for_llm(self, limit: int = 400) -> str:
-        """Returns a string representation of the real places database to inject into the LLM prompt"""
-        if not self.places_db:
+        # File 1 (Top Indian Places) goes first: it has the richest rows, so it wins duplicates
+        rows = []
+        for path in (file1_path, file2_path):
+            try:
+                with open(path, mode='r', encoding='utf-8') as f:
+                    rows.extend(self._normalize_rows(csv.DictReader(f)))
+            except Exception as e:
+                print(f"Failed to load {path}: {e}")
+        self.load_rows(rows)
+
+    @staticmethod
+    def _normalize_rows(reader: csv.DictReader) -> Iterable[Dict[str, str]]:
+        headers = reader.fieldnames or []
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            columns[field] = next((a for a in aliases if a in headers), None)
+        for row in reader:
+            normalized = {field: (row.get(col) or "").strip() if col else "" for field, col in columns.items()}
+            if columns["price"] and not normalized["price"]:
+                normalized["price"] = "0" # A blank fee cell means free; a missing column means unknown
+            yield normalized
+
+    def load_rows(self, rows: Iterable[Dict[str, str]]):
+        """Loads normalized rows (de-duplicating on name + city) and builds the retrieval index."""
+        rows = list(rows)
+        # places.csv has no state column: fill it from rows that do, then from the gazetteer
+        city_states = {r["city"].lower(): r["state"] for r in rows if r.get("city") and r.get("state")}
+        for entry in gazetteer.entries:
+            city_states.setdefault(entry.name.lower(), entry.state)
+        for row in rows:
+            if not row.get("state"):
+                row["state"] = city_states.get(row.get("city", "").lower(), "")
+            self.store.add(row)
+        self.store.freeze()
+        # Changes whenever the loaded places change, so caches of grounded answers can key on it
+        self.version = hashlib.sha1("\n".join(self.store.context_lines).encode("utf-8")).hexdigest()[:12]
+        self.build_index()
+
+    def build_index(self):
+        """Builds the in-memory BM25 inverted index over name, city, state, type and significance."""
+        started = time.perf_counter()
+        store = self.store
+        n_docs = len(store)
+        # Categorical values are tokenized once per distinct value, not once per row
+        vocab_tokens = {
+            field: [tokenize(v) for v in store.categoricals[field].values]
+            for field in INDEXED_FIELDS if field in store.categoricals
+        }
+        postings_ids = defaultdict(list)
+        postings_tfs = defaultdict(list)
+        doc_lengths = np.zeros(n_docs, dtype=np.float32)
+        for doc_id in range(n_docs):
+            term_freqs = defaultdict(float)
+            for term in tokenize(store.names[doc_id]):
+                term_freqs[term] += INDEXED_FIELDS["name"]
+            for field, tokens in vocab_tokens.items():
+                weight = INDEXED_FIELDS[field]
+                for term in tokens[store.codes[field][doc_id]]:
+                    term_freqs[term] += weight
+            for term, tf in term_freqs.items():
+                postings_ids[term].append(doc_id)
+                postings_tfs[term].append(tf)
+            doc_lengths[doc_id] = sum(term_freqs.values())
+
+        self.postings = {
+            term: (np.array(ids, dtype=np.int32), np.array(postings_tfs[term], dtype=np.float32))
+            for term, ids in postings_ids.items()
+        }
+        avg_doc_length = float(doc_lengths.mean()) if n_docs else 0.0
+        self.length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / (avg_doc_length or 1.0))
+
+        city_codes = store.codes["city"]
+        order = np.argsort(city_codes, kind="stable")
+        bounds = np.searchsorted(city_codes[order], np.arange(len(store.categoricals["city"].values) + 1))
+        self.city_index = {
+            city.lower(): order[bounds[code]:bounds[code + 1]]
+            for code, city in enumerate(store.categoricals["city"].values) if city
+        }
+        self.index_build_seconds = time.perf_counter() - started
+
+    def query_terms(self, messages: List[Dict[str, str]], user_location: Optional[str] = None) -> Dict[str, float]:
+        """
+        Builds the weighted retrieval query for a conversation: the latest user message counts
+        fully, the two before it progressively less (so "what about food?" keeps the city from
+        the previous turn), plus any free-text location.
+        """
+        terms: Dict[str, float] = defaultdict(float)
+        user_turns = [m["content"] for m in messages if m.get("role") == "user"]
+        for weight, content in zip((1.0, 0.5, 0.25), reversed(user_turns)):
+            for term in tokenize(content):
+                terms[term] = max(terms[term], weight)
+        if user_location and not parse_coordinates(user_location):
+            for term in tokenize(user_location):
+                terms[term] = max(terms[term], 0.5)
+        return dict(terms)
+
+    def search(
+        self,
+        query_terms: Dict[str, float],
+        limit: int = 15,
+        near_cities: Optional[List[str]] = None
+    ) -> List[int]:
+        """
+        Returns the indices of the top `limit` places for a weighted bag of query terms,
+        scored with BM25 and boosted for places in `near_cities`.
+        """
+        n_docs = len(self.store)
+        if not n_docs:
+            return []
+
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term, query_weight in query_terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            ids, tfs = posting
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            # ids are unique within a posting list, so fancy-index accumulation is safe
+            scores[ids] += query_weight * idf * tfs * (BM25_K1 + 1) / (tfs + self.length_norm[ids])
+
+        if near_cities:
+            best = float(scores.max())
+            boost = NEAR_CITY_BOOST * (best if best > 0 else 1.0)
+            for rank, city in enumerate(near_cities):
+                # Closer cities (earlier in the list) get a slightly larger bonus
+                ids = self.city_index.get(city.lower())
+                if ids is not None:
+                    scores[ids] += boost / (1 + rank)
+
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        return hits[np.argsort(-scores[hits], kind="stable")].tolist()
+
+    def get_context_for_llm(
+        self,
+        limit: int = 400,
+        query_terms: Optional[Dict[str, float]] = None,
+        near_cities: Optional[List[str]] = None
+    ) -> str:
+        """
+        Returns a string representation of the real places database to inject into the LLM prompt.
+        With query terms and/or nearby cities, only the top `limit` matching places are included;
+        otherwise (or if nothing matches) the head of the dataset is used.
+        """
+        if not len(self.store):
             return "No real dataset context available."
-            
-        context_str = "Verified Indian Tourism Data:\n"
-        for idx, p in enumerate(self.places_db[:limit]):
-            price_str = f"Rs. {p['price']}" if p['price'] and p['price'] != '0' else "Free"
-            closed_str = f"(Closed on {p['closed_on']})" if p['closed_on'] and p['closed_on'].lower() != 'none' else ""
-            
-            context_str += f"- {p['name']} ({p['city']}, {p['state']}) | Type: {p['type']}/{p['category']} | Rating: {p['rating']}/5 | Fee: {price_str} | Best Time: {p['best_time']} | Time Needed: {p['time_needed']} hrs {closed_str}\n"
-            
-        return context_str
+
+        lines = self.store.context_lines
+        selected = lines[:limit]
+        if query_terms or near_cities:
+            hits = self.search(query_terms or {}, limit=limit, near_cities=near_cities)
+            if hits:
+                selected = [lines[i] for i in hits]
+        return "Verified Indian Tourism Data:\n" + "".join(selected)
 
 # Singleton instance
 data_loader = TourismDataLoader()
@@ -0,0 +1,199 @@
+import csv
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+GRID_CELL_DEG = 0.5 # ~55 km cells over India's bounding box
+GRID_MARGIN_DEG = 2.0 # Grid extends this far beyond the outermost entries
+MAX_GRID_K = 5 # Candidate lists guarantee exact answers for k up to this
+BATCH_CHUNK = 65536 # Queries per vectorized block in nearest_batch, bounds peak memory
+KINDS = (None, "city", "landmark") # None = any kind
+
+_COORDS_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+def parse_coordinates(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parses a "lat, lon" string (as sent by the frontend) into floats, or None."""
+    if not text:
+        return None
+    match = _COORDS_RE.match(text)
+    if not match:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    return lat, lon
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class GazetteerEntry:
+    __slots__ = ("name", "kind", "state", "lat", "lon")
+
+    def __init__(self, name: str, kind: str, state: str, lat: float, lon: float):
+        self.name = name
+        self.kind = kind # "city" or "landmark"
+        self.state = state
+        self.lat = lat
+        self.lon = lon
+
+def _unit_vectors(lats_deg: np.ndarray, lons_deg: np.ndarray) -> np.ndarray:
+    lat = np.radians(lats_deg)
+    lon = np.radians(lons_deg)
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+def _haversine_np(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class Gazetteer:
+    """
+    Offline India city/landmark gazetteer (app/data/india_gazetteer.csv).
+
+    Single lookups use a precomputed 0.5-degree grid: every cell stores the few entries that
+    can be among the MAX_GRID_K nearest to any point inside it, so a lookup is a cell index
+    plus a handful of distance computations. Batches use unit vectors and one matrix product
+    (largest dot product = smallest great-circle distance).
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "india_gazetteer.csv")
+        self.entries: List[GazetteerEntry] = []
+        self.lats = np.empty(0)
+        self.lons = np.empty(0)
+        self.vectors = np.empty((0, 3))
+        self._trig: List[Tuple[float, float, float]] = []
+        self.kind_masks: Dict[Optional[str], np.ndarray] = {}
+        # kind -> flattened (row-major) grid of candidate entry indices per cell
+        self.candidates: Dict[Optional[str], List[Tuple[int, ...]]] = {}
+        self.min_lat = self.min_lon = 0.0
+        self.n_rows = self.n_cols = 0
+        self._load_data()
+        self._build_index()
+
+    def _load_data(self):
+        try:
+            with open(self.path, mode='r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self.entries.append(GazetteerEntry(
+                        name=row["name"].strip(),
+                        kind=row["kind"].strip(),
+                        state=row["state"].strip(),
+                        lat=float(row["lat"]),
+                        lon=float(row["lon"])
+                    ))
+        except Exception as e:
+            print(f"Failed to load {self.path}: {e}")
+
+    def _build_index(self):
+        if not self.entries:
+            return
+        self.lats = np.array([e.lat for e in self.entries], dtype=np.float64)
+        self.lons = np.array([e.lon for e in self.entries], dtype=np.float64)
+        self.vectors = _unit_vectors(self.lats, self.lons)
+        self._trig = [(math.radians(e.lat), math.radians(e.lon), math.cos(math.radians(e.lat))) for e in self.entries]
+        kinds = np.array([e.kind for e in self.entries])
+        self.kind_masks = {kind: (kinds == kind) if kind else np.ones(len(self.entries), dtype=bool) for kind in KINDS}
+
+        self.min_lat = math.floor(self.lats.min() - GRID_MARGIN_DEG)
+        self.min_lon = math.floor(self.lons.min() - GRID_MARGIN_DEG)
+        self.n_rows = int(math.ceil((self.lats.max() + GRID_MARGIN_DEG - self.min_lat) / GRID_CELL_DEG))
+        self.n_cols = int(math.ceil((self.lons.max() + GRID_MARGIN_DEG - self.min_lon) / GRID_CELL_DEG))
+
+        rows, cols = np.meshgrid(np.arange(self.n_rows), np.arange(self.n_cols), indexing="ij")
+        c_lat = (self.min_lat + (rows.ravel() + 0.5) * GRID_CELL_DEG)
+        c_lon = (self.min_lon + (cols.ravel() + 0.5) * GRID_CELL_DEG)
+        half = GRID_CELL_DEG / 2
+        # Half-diagonal of each cell (widest on the equator-facing edge)
+        radius = _haversine_np(c_lat, c_lon, c_lat - np.sign(c_lat) * half, c_lon + half)[:, None]
+        center_dists = _haversine_np(c_lat[:, None], c_lon[:, None], self.lats[None, :], self.lons[None, :])
+
+        for kind, mask in self.kind_masks.items():
+            dists = np.where(mask[None, :], center_dists, np.inf)
+            k = min(MAX_GRID_K, int(mask.sum()))
+            if k == 0:
+                self.candidates[kind] = [()] * len(c_lat)
+                continue
+            kth = np.partition(dists, k - 1, axis=1)[:, k - 1:k]
+            # Triangle inequality: for any point p in the cell, d(p, e) >= d(c, e) - r and the
+            # k-th nearest distance at p is <= kth + r, so nothing beyond kth + 2r can qualify.
+            within = dists <= kth + 2 * radius
+            self.candidates[kind] = [tuple(np.flatnonzero(row).tolist()) for row in within]
+
+    def _cell_index(self, lat: float, lon: float) -> int:
+        row = int((lat - self.min_lat) // GRID_CELL_DEG)
+        col = int((lon - self.min_lon) // GRID_CELL_DEG)
+        if 0 <= row < self.n_rows and 0 <= col < self.n_cols:
+            return row * self.n_cols + col
+        return -1
+
+    def nearest(self, lat: float, lon: float, k: int = 3, kind: Optional[str] = None) -> List[Tuple[GazetteerEntry, float]]:
+        """
+        Returns the k nearest entries (optionally only "city" or "landmark") as
+        (entry, distance_km) pairs, closest first.
+        """
+        if not self.entries:
+            return []
+        cell = self._cell_index(lat, lon) if k <= MAX_GRID_K else -1
+        if cell == -1:
+            # Far outside the gazetteer's area, or more neighbours than the grid guarantees
+            idx, dists = self.nearest_batch([lat], [lon], k=k, kind=kind)
+            return [(self.entries[i], float(d)) for i, d in zip(idx[0].tolist(), dists[0].tolist()) if math.isfinite(d)]
+        # Inlined haversine against precomputed radians/cosines: this is the per-turn hot path
+        p1, l1 = math.radians(lat), math.radians(lon)
+        cos_p1 = math.cos(p1)
+        sin, asin, sqrt, trig = math.sin, math.asin, math.sqrt, self._trig
+        scored = []
+        for i in self.candidates[kind][cell]:
+            p2, l2, cos_p2 = trig[i]
+            a = sin((p2 - p1) / 2) ** 2 + cos_p1 * cos_p2 * sin((l2 - l1) / 2) ** 2
+            scored.append((2 * EARTH_RADIUS_KM * asin(sqrt(a) if a < 1.0 else 1.0), i))
+        scored.sort()
+        return [(self.entries[i], dist) for dist, i in scored[:k]]
+
+    def nearest_batch(self, lats, lons, k: int = 1, kind: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized k-nearest lookup for many points at once. Returns (indices, distances_km),
+        both of shape (n, k) and sorted closest first; indices point into self.entries.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        n = lats.shape[0]
+        pool = np.flatnonzero(self.kind_masks.get(kind, self.kind_masks[None])) if self.entries else np.empty(0, dtype=np.int64)
+        k = min(k, len(pool))
+        indices = np.empty((n, k), dtype=np.int64)
+        distances = np.empty((n, k), dtype=np.float64)
+        if k == 0:
+            return indices, distances
+        pool_vectors_t = self.vectors[pool].T.copy()
+        for start in range(0, n, BATCH_CHUNK):
+            stop = min(start + BATCH_CHUNK, n)
+            dots = _unit_vectors(lats[start:stop], lons[start:stop]) @ pool_vectors_t
+            if k == 1:
+                top = np.argmax(dots, axis=1)[:, None]
+            else:
+                top = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+            chosen = pool[top]
+            dists = _haversine_np(lats[start:stop, None], lons[start:stop, None], self.lats[chosen], self.lons[chosen])
+            order = np.argsort(dists, axis=1)
+            indices[start:stop] = np.take_along_axis(chosen, order, axis=1)
+            distances[start:stop] = np.take_along_axis(dists, order, axis=1)
+        return indices, distances
+
+    def resolve(self, user_location: Optional[str], k: int = 3) -> List[Tuple[GazetteerEntry, float]]:
+        """Nearest k cities for a "lat, lon" user_location string; empty if it is not coordinates."""
+        coords = parse_coordinates(user_location)
+        if not coords:
+            return []
+        return self.nearest(coords[0], coords[1], k=k, kind="city")
+
+# Singleton instance
+gazetteer = Gazetteer()
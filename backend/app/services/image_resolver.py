@@ -0,0 +1,355 @@
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from app.config import settings
+from app.services.cache import LRUCache, SQLiteStore
+
+WIKIDATA_SPARQL_URL = "https://query.wikidata.org/sparql"
+UNSPLASH_API_URL = "https://api.unsplash.com/search/photos"
+UNSPLASH_NAPI_URL = "https://unsplash.com/napi/search/photos"
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+}
+# Proxy image indices per recommendation card (card n uses n*3 .. n*3+2); the first is its main shot
+IMAGES_PER_CARD = 3
+_MISS = object()
+
+def _sparql_string(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+def fallback_image_url(name: str, city: str, index: int) -> str:
+    safe_name = re.sub(r'[^a-zA-Z0-9]', '', name.lower())
+    return f"https://loremflickr.com/600/400/{city.lower()},{safe_name}/all?lock={index}"
+
+class ImageResolver:
+    """
+    Resolves recommendation card images through the "Triple Accuracy Chain" (WikiData, then
+    Unsplash, then LoremFlickr). Each tier's answer is cached per place, in memory and in the
+    SQLite cache file, so repeat lookups never touch the network: image URLs for
+    `ttl_seconds`, and definitive "no image" answers (negative entries) for
+    `negative_ttl_seconds`. Upstream errors and timeouts are never cached. Concurrent misses
+    for the same lookup (the 3 images of a card load at once) share one upstream request.
+    """
+    def __init__(
+        self,
+        max_bytes: int,
+        path: Optional[str],
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        deadline_seconds: float
+    ):
+        self.memory = LRUCache(max_bytes)
+        self.store = SQLiteStore(path, "resolved_images") if path else None
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.deadline_seconds = deadline_seconds
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Task] = {} # cache key -> upstream lookup in progress
+        self._background: Set[asyncio.Task] = set()
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = {"wikidata": 0, "unsplash": 0}
+        self.tier_wins = {"wikidata": 0, "unsplash": 0, "fallback": 0}
+        self.deadline_expirations = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(headers=BROWSER_HEADERS, timeout=settings.image_upstream_timeout)
+        return self._client
+
+    async def shutdown(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # --- Cache -------------------------------------------------------------------------
+
+    async def _get(self, key: str) -> Any:
+        """Cached JSON value for key (None is a cached negative answer), or _MISS."""
+        raw = self.memory.get(key)
+        if raw is None and self.store is not None:
+            try:
+                raw = await asyncio.to_thread(self.store.get, key)
+            except Exception as e:
+                print(f"Image cache read error: {e}")
+            if raw is not None:
+                self.disk_hits += 1
+                # The entry's remaining disk TTL is unknown here; the short TTL bounds the overshoot
+                self.memory.set(key, raw, ttl_seconds=self.negative_ttl_seconds)
+        if raw is None:
+            self.misses += 1
+            return _MISS
+        value = json.loads(raw)
+        if not value:
+            self.negative_hits += 1
+        return value
+
+    async def _set(self, key: str, value: Any):
+        raw = json.dumps(value)
+        ttl = self.ttl_seconds if value else self.negative_ttl_seconds
+        self.memory.set(key, raw, ttl_seconds=ttl)
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(self.store.set, key, raw, ttl)
+            except Exception as e:
+                print(f"Image cache write error: {e}")
+
+    async def _single_flight(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs fetch() once per key at a time: callers arriving while it is in flight await the
+        same task. The task is shielded so one guest disconnecting doesn't cancel it for the rest.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._flight_done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _flight_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception() # Mark retrieved: every waiter may have gone away
+
+    # --- Tiers ---------------------------------------------------------------------------
+
+    @staticmethod
+    def _wikidata_key(name: str) -> str:
+        return f"wikidata:{name.strip().lower()}"
+
+    async def wikidata_image(self, name: str) -> Optional[str]:
+        """Main P18 image of the WikiData item labelled `name`, or None if it has none."""
+        key = self._wikidata_key(name)
+        cached = await self._get(key)
+        if cached is not _MISS:
+            return cached
+        return await self._single_flight(key, lambda: self._query_wikidata_one(name))
+
+    async def _query_wikidata_one(self, name: str) -> Optional[str]:
+        return (await self._query_wikidata([name]))[name.strip().lower()]
+
+    async def _query_wikidata(self, names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        One SPARQL query for every name, caching each answer. Labels are matched exactly via
+        VALUES (an index lookup on WikiData's side, unlike a FILTER(LCASE(...)) scan) against the
+        common casings of each name, so labels in any other casing (e.g. "Golconda fort" for
+        "GOLCONDA Fort") are not found and fall through to the next tier.
+        Returns lowercased name -> image URL or None.
+        """
+        variants: Dict[str, str] = {} # label literal -> lowercased name
+        for name in names:
+            name = name.strip()
+            lowered = name.lower()
+            for label in (name, lowered, name.title(), lowered.capitalize(), lowered.replace(" ", "_")):
+                variants.setdefault(label, lowered)
+        values = " ".join(f'"{_sparql_string(label)}"@en' for label in variants)
+        sparql = f"""
+        SELECT ?label (SAMPLE(?img) AS ?image) WHERE {{
+          VALUES ?label {{ {values} }}
+          ?item rdfs:label ?label.
+          ?item wdt:P18 ?img.
+        }} GROUP BY ?label
+        """
+        self.upstream_calls["wikidata"] += 1
+        resp = await self.client.get(WIKIDATA_SPARQL_URL, params={"query": sparql, "format": "json"})
+        resp.raise_for_status()
+        found: Dict[str, Optional[str]] = {lowered: None for lowered in variants.values()}
+        for binding in resp.json().get("results", {}).get("bindings", []):
+            lowered = variants.get(binding.get("label", {}).get("value"))
+            image = binding.get("image", {}).get("value")
+            if lowered and image and not found[lowered]:
+                found[lowered] = image
+        for lowered, image in found.items():
+            await self._set(self._wikidata_key(lowered), image)
+        return found
+
+    async def prefetch_wikidata(self, names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolves a whole recommendation set with a single WikiData query ahead of the browser's
+        per-card proxy requests. Names already cached or in flight are skipped; per-card
+        requests arriving while the batch runs join it through the single-flight table.
+        """
+        result: Dict[str, Optional[str]] = {}
+        missing: List[str] = []
+        for name in dict.fromkeys(n.strip() for n in names if n and n.strip()):
+            key = self._wikidata_key(name)
+            cached = await self._get(key)
+            if cached is not _MISS:
+                result[name.lower()] = cached
+            elif key not in self._inflight:
+                missing.append(name)
+        if not missing:
+            return result
+
+        batch = asyncio.create_task(self._query_wikidata(missing))
+        for name in missing:
+            key = self._wikidata_key(name)
+            task = asyncio.create_task(self._from_batch(batch, name.lower()))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._flight_done(key, t))
+        try:
+            result.update(await asyncio.shield(batch))
+        except Exception as e:
+            print(f"WikiData batch prefetch error: {e}")
+        return result
+
+    @staticmethod
+    async def _from_batch(batch: asyncio.Task, lowered: str) -> Optional[str]:
+        return (await asyncio.shield(batch))[lowered]
+
+    def schedule_prefetch(self, recommendations: List[Any]):
+        """
+        Fire-and-forget warm-up for a recommendation set (objects with name / category / city,
+        as passed to the proxy URLs): one batched WikiData query plus each card's Unsplash search.
+        """
+        cards = [(r.name.strip(), r.category or "tourism", r.city or "India") for r in recommendations if r.name and r.name.strip()]
+        if not cards:
+            return
+
+        async def warm():
+            searches = [self._unsplash_tier(name, category, city, 0) for name, category, city in cards]
+            await asyncio.gather(self.prefetch_wikidata([name for name, _, _ in cards]), *searches)
+
+        task = asyncio.get_running_loop().create_task(warm())
+        self._background.add(task) # Keep a reference until done
+        task.add_done_callback(self._background.discard)
+
+    async def unsplash_images(self, name: str, category: str, city: str) -> List[str]:
+        """Up to 20 Unsplash photo URLs for the place (empty if the search found nothing)."""
+        # Improve query for relevance by adding category
+        query = f"{name} {category} {city}"
+        source = "api" if settings.unsplash_access_key else "napi"
+        key = f"unsplash:{source}:{query.lower()}"
+        cached = await self._get(key)
+        if cached is not _MISS:
+            return cached or []
+
+        return await self._single_flight(key, lambda: self._search_unsplash(query, key))
+
+    async def _search_unsplash(self, query: str, key: str) -> List[str]:
+        self.upstream_calls["unsplash"] += 1
+        params = {"query": query, "per_page": 20} # Pull 20 to ensure uniqueness across multiple cards
+        if settings.unsplash_access_key:
+            # Official API
+            headers = {"Authorization": f"Client-ID {settings.unsplash_access_key}"}
+            resp = await self.client.get(UNSPLASH_API_URL, params=params, headers=headers)
+        else:
+            # Fallback NAPI (Public endpoint)
+            resp = await self.client.get(UNSPLASH_NAPI_URL, params=params)
+        resp.raise_for_status()
+        urls = [r.get("urls", {}).get("regular") for r in resp.json().get("results", [])]
+        urls = [u for u in urls if u]
+        await self._set(key, urls)
+        return urls
+
+    @staticmethod
+    def pick_unsplash(urls: List[str], index: int) -> Optional[str]:
+        if not urls:
+            return None
+        if settings.unsplash_access_key:
+            return urls[index] if index < len(urls) else None
+        # The public NAPI sometimes returns fewer results, so wrap the index around
+        return urls[index % len(urls)]
+
+    async def _wikidata_tier(self, name: str) -> Optional[str]:
+        try:
+            return await self.wikidata_image(name)
+        except Exception as e:
+            print(f"WikiData Proxy Error: {e}")
+            return None
+
+    async def _unsplash_tier(self, name: str, category: str, city: str, index: int) -> Optional[str]:
+        try:
+            return self.pick_unsplash(await self.unsplash_images(name, category, city), index)
+        except Exception as e:
+            print(f"Unsplash Proxy Error: {e}")
+            return None
+
+    async def resolve(self, name: str, category: str, city: str, index: int) -> Tuple[str, str]:
+        """
+        Returns (image URL, tier that supplied it). The tiers run concurrently: the
+        highest-priority tier with an image wins as soon as every tier above it has answered
+        (without one). When deadline_seconds expires, the best image found so far is served,
+        or the LoremFlickr fallback. Losing waits are cancelled; their shared upstream lookups
+        still finish in the background and land in the cache for the next request.
+        """
+        name = name.strip()
+        tiers: List[Tuple[str, asyncio.Task]] = []
+        # WikiData usually has a single main P18 image: use it only for each card's main shot
+        if index % IMAGES_PER_CARD == 0:
+            tiers.append(("wikidata", asyncio.create_task(self._wikidata_tier(name))))
+        tiers.append(("unsplash", asyncio.create_task(self._unsplash_tier(name, category, city, index))))
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_seconds
+        try:
+            while True:
+                pending = None
+                for tier, task in tiers:
+                    if not task.done():
+                        pending = task # A higher-priority tier may still answer
+                        break
+                    if task.result():
+                        self.tier_wins[tier] += 1
+                        return task.result(), tier
+                if pending is None:
+                    break # Every tier answered, none with an image
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.deadline_expirations += 1
+                    for tier, task in tiers:
+                        if task.done() and task.result():
+                            self.tier_wins[tier] += 1
+                            return task.result(), tier
+                    break
+                await asyncio.wait(
+                    [task for _, task in tiers if not task.done()],
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for _, task in tiers:
+                task.cancel()
+
+        self.tier_wins["fallback"] += 1
+        return fallback_image_url(name, city, index), "fallback"
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "upstream_calls": dict(self.upstream_calls),
+            "tier_wins": dict(self.tier_wins),
+            "deadline_expirations": self.deadline_expirations,
+            "memory_entries": memory["entries"],
+            "memory_bytes": memory["bytes"],
+            "expirations": memory["expirations"],
+            "evictions": memory["evictions"],
+        }
+
+# Singleton instance
+image_resolver = ImageResolver(
+    max_bytes=settings.image_cache_max_bytes,
+    path=settings.cache_db_path or None,
+    ttl_seconds=settings.image_cache_ttl_seconds,
+    negative_ttl_seconds=settings.image_cache_negative_ttl_seconds,
+    deadline_seconds=settings.image_resolve_deadline_seconds
+)
@@ -1,11 +1,25 @@
 import httpx
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from app.config import settings
 from app.services.data_loader import data_loader
+from app.services.gazetteer import gazetteer
+from app.services.token_budget import message_tokens, trim_history
+from app.services.translation_cache import translation_cache
+from app.services.response_cache import response_cache
 import base64
 import json
 
+TRANSLATION_MODEL = "mistralai/mistral-large-3-675b-instruct-2512"
+TTS_MODEL = "nvidia/fastpitch-hifi-gan"
+TTS_VOICE = "en-US-JennyNeural" # Example typical voice namespace
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support for httpx is an optional extra)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 class NVIDIAClient:
     def __init__(self):
         self.api_key = settings.nvidia_api_key
@@ -15,24 +29,73 @@ class NVIDIAClient:
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
+        self._client: Optional[httpx.AsyncClient] = None
 
-    async def generate_response(
-        self, 
-        messages: List[Dict[str, str]], 
-        model: str = "meta/llama3-70b-instruct",
-        temperature: float = 0.5,
-        max_tokens: int = 1024,
-        booking_context: Optional[str] = None,
-        user_location: Optional[str] = None
-    ) -> Optional[str]:
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.nvidia_max_connections,
+            max_keepalive_connections=settings.nvidia_max_keepalive_connections,
+            keepalive_expiry=settings.nvidia_keepalive_expiry
+        )
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            limits=limits,
+            timeout=httpx.Timeout(settings.nvidia_chat_timeout, connect=settings.nvidia_connect_timeout),
+            http2=settings.nvidia_http2 and HTTP2_AVAILABLE
+        )
+
+    def _timeout(self, read_timeout: float) -> httpx.Timeout:
+        return httpx.Timeout(read_timeout, connect=settings.nvidia_connect_timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
         """
-        Calls the NVIDIA standard Chat Completions endpoint for general text-to-text.
+        The shared, keep-alive connection pool to the NVIDIA API.
+        Created by startup(); lazily created here so scripts outside the FastAPI app still work.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def startup(self):
+        """Opens the pooled upstream client. Called once from the FastAPI lifespan."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+
+    async def shutdown(self):
+        """Closes the pooled upstream client and all its keep-alive connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _build_chat_payload(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        booking_context: Optional[str],
+        user_location: Optional[str]
+    ) -> Dict:
+        """
+        Builds the Chat Completions payload (system persona + grounding data + history).
         """
-        # Fetch the loaded Kaggle tourism dataset
-        factual_context = data_loader.get_context_for_llm(limit=15)
+        # Retrieve the places from the Kaggle tourism dataset relevant to this conversation
+        # Resolve live GPS coordinates to the nearest known cities so retrieval can favour them
+        nearby = gazetteer.resolve(user_location, k=settings.geo_nearby_cities)
+        query_terms = data_loader.query_terms(messages, user_location)
+        factual_context = data_loader.get_context_for_llm(
+            limit=settings.retrieval_top_k,
+            query_terms=query_terms,
+            near_cities=[entry.name for entry, _ in nearby]
+        )
         
         booking_prompt = f"\n\nActive Booking Context:\n{booking_context}\n" if booking_context else ""
         location_prompt = f"\n\n[SYSTEM DATA] Live User Geolocation: {user_location}\n" if user_location else ""
+        if nearby:
+            nearby_str = ", ".join(f"{entry.name}, {entry.state} ({dist:.0f} km)" for entry, dist in nearby)
+            location_prompt += f"[SYSTEM DATA] Nearest Cities: {nearby_str}\n"
 
         # Inject the system persona prompt at the beginning of the conversation history
         system_prompt = {
@@ -78,34 +141,118 @@ class NVIDIAClient:
         for msg in messages:
             role = "assistant" if msg["role"] == "bot" else msg["role"]
             normalized_messages.append({"role": role, "content": msg["content"]})
+
+        # Keep the request under the token budget: the system prompt always goes in, then the
+        # latest turns (and the active booking turn); older turns are summarized into the prompt
+        normalized_messages, history_summary = trim_history(
+            normalized_messages,
+            budget_tokens=settings.llm_prompt_token_budget - message_tokens(system_prompt),
+            min_recent=settings.history_min_recent_messages,
+            keep_booking_turn=booking_context is not None,
+            summary_max_tokens=settings.history_summary_max_tokens
+        )
+        if history_summary:
+            system_prompt["content"] += f"\n{history_summary}\n"
         
         # Ensure the system prompt is always the first message
         formatted_messages = [system_prompt] + normalized_messages
         
-        payload = {
+        return {
             "model": model,
             "messages": formatted_messages,
             "temperature": temperature,
             "max_tokens": max_tokens
         }
+
+    async def generate_response(
+        self, 
+        messages: List[Dict[str, str]], 
+        model: str = "meta/llama3-70b-instruct",
+        temperature: float = 0.5,
+        max_tokens: int = 1024,
+        booking_context: Optional[str] = None,
+        user_location: Optional[str] = None,
+        hotel_id: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Calls the NVIDIA standard Chat Completions endpoint for general text-to-text.
+        With a hotel_id, repeatable answers are served from the response cache without an upstream call.
+        """
+        cache_key = response_cache.key(hotel_id, messages, booking_context, language, user_location, model, temperature, max_tokens)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        payload = self._build_chat_payload(messages, model, temperature, max_tokens, booking_context, user_location)
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                if "choices" in data and len(data["choices"]) > 0:
-                    return data["choices"][0]["message"]["content"]
-                return None
-            except Exception as e:
-                print(f"Error calling NVIDIA API: {e}")
-                # Log this error properly in production
-                return None
+        try:
+            response = await self.client.post(
+                "/chat/completions",
+                json=payload,
+                timeout=self._timeout(settings.nvidia_chat_timeout)
+            )
+            response.raise_for_status()
+            data = response.json()
+            if "choices" in data and len(data["choices"]) > 0:
+                content = data["choices"][0]["message"]["content"]
+                response_cache.set(cache_key, content)
+                return content
+            return None
+        except Exception as e:
+            print(f"Error calling NVIDIA API: {e}")
+            # Log this error properly in production
+            return None
+
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "meta/llama3-70b-instruct",
+        temperature: float = 0.5,
+        max_tokens: int = 1024,
+        booking_context: Optional[str] = None,
+        user_location: Optional[str] = None,
+        hotel_id: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Same as generate_response, but calls the upstream with stream=True and yields
+        the text deltas as they arrive. Errors propagate to the caller.
+        A cached answer is yielded as a single delta.
+        """
+        cache_key = response_cache.key(hotel_id, messages, booking_context, language, user_location, model, temperature, max_tokens)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        payload = self._build_chat_payload(messages, model, temperature, max_tokens, booking_context, user_location)
+        payload["stream"] = True
+
+        async with self.client.stream(
+            "POST",
+            "/chat/completions",
+            json=payload,
+            headers={"Accept": "text/event-stream"},
+            timeout=self._timeout(settings.nvidia_chat_timeout)
+        ) as response:
+            response.raise_for_status()
+            deltas = []
+            async for line in response.aiter_lines():
+                # OpenAI-compatible SSE framing: "data: {...}" lines, terminated by "data: [DONE]"
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                choices = chunk.get("choices") or []
+                if choices:
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        deltas.append(delta)
+                        yield delta
+            response_cache.set(cache_key, "".join(deltas))
                 
     async def translate_text(
         self,
@@ -115,8 +262,24 @@ class NVIDIAClient:
     ) -> Optional[str]:
         """
         Uses the Mistral Large model as requested by the user for translation tasks.
+        Repeated strings are served from the translation cache without an upstream call.
+        """
+        cached = await translation_cache.get(text, target_language, TRANSLATION_MODEL, temperature)
+        if cached is not None:
+            return cached
+        return await self.translate_upstream(text, target_language, temperature)
+
+    async def translate_upstream(
+        self,
+        text: str,
+        target_language: str,
+        temperature: float = 0.15,
+    ) -> Optional[str]:
         """
-        model = "mistralai/mistral-large-3-675b-instruct-2512"
+        translate_text without the cache lookup, for callers that already missed the cache
+        (the translation batcher). The result is still stored in the cache.
+        """
+        model = TRANSLATION_MODEL
         messages = [
             {"role": "system", "content": f"You are a professional translator. Translate the following text into {target_language}. Respond ONLY with the translated text without any conversational filler or quotes."},
             {"role": "user", "content": text}
@@ -133,22 +296,77 @@ class NVIDIAClient:
             "stream": False
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                if "choices" in data and len(data["choices"]) > 0:
-                    return data["choices"][0]["message"]["content"]
+        try:
+            response = await self.client.post(
+                "/chat/completions",
+                json=payload,
+                timeout=self._timeout(settings.nvidia_translate_timeout)
+            )
+            response.raise_for_status()
+            data = response.json()
+            if "choices" in data and len(data["choices"]) > 0:
+                translated = data["choices"][0]["message"]["content"]
+                if translated:
+                    await translation_cache.set(text, target_language, model, temperature, translated)
+                return translated
+            return None
+        except Exception as e:
+            print(f"Error calling NVIDIA API (Translation): {e}")
+            return None
+
+    async def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        temperature: float = 0.15,
+    ) -> Optional[List[str]]:
+        """
+        Translates several strings into the same language with a single structured Mistral call.
+        Returns the translations in input order, or None if the reply is not a matching JSON array
+        (callers fall back to translate_upstream per string). Successful results are cached individually.
+        """
+        model = TRANSLATION_MODEL
+        messages = [
+            {"role": "system", "content": f"You are a professional translator. Translate every string in the JSON array you receive into {target_language}. Respond ONLY with a JSON array of the translated strings, in the same order and with the same number of elements, without any conversational filler."},
+            {"role": "user", "content": json.dumps(texts, ensure_ascii=False)}
+        ]
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": min(8192, 512 + 2 * sum(len(t) for t in texts)),
+            "top_p": 1.00,
+            "frequency_penalty": 0.00,
+            "presence_penalty": 0.00,
+            "stream": False
+        }
+
+        try:
+            response = await self.client.post(
+                "/chat/completions",
+                json=payload,
+                timeout=self._timeout(settings.nvidia_translate_timeout)
+            )
+            response.raise_for_status()
+            data = response.json()
+            if not data.get("choices"):
                 return None
-            except Exception as e:
-                print(f"Error calling NVIDIA API (Translation): {e}")
+            content = data["choices"][0]["message"]["content"].strip()
+            # Models sometimes wrap JSON in a markdown fence
+            if content.startswith("```"):
+                content = content.strip("`").partition("\n")[2]
+            translated = json.loads(content[content.index("["):content.rindex("]") + 1])
+            if not isinstance(translated, list) or len(translated) != len(texts) or not all(isinstance(t, str) for t in translated):
+                print(f"Batch translation reply did not match the request ({len(texts)} strings)")
                 return None
+            for text, result in zip(texts, translated):
+                if result:
+                    await translation_cache.set(text, target_language, model, temperature, result)
+            return translated
+        except Exception as e:
+            print(f"Error calling NVIDIA API (Batch Translation): {e}")
+            return None
                 
     async def transcribe_audio(self, audio_bytes: bytes) -> Optional[str]:
         """
@@ -164,56 +382,52 @@ class NVIDIAClient:
             "language": "en" 
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                # Assuming the standard aio path for STT endpoints on NV API
-                response = await client.post(
-                    f"{self.base_url}/audio/transcriptions",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=60.0 # Transcription can take a bit longer
-                )
-                response.raise_for_status()
-                data = response.json()
-                if "text" in data:
-                    return data["text"]
-                return None
-            except Exception as e:
-                print(f"Error calling NVIDIA API (STT): {e}")
-                return None
+        try:
+            # Assuming the standard aio path for STT endpoints on NV API
+            response = await self.client.post(
+                "/audio/transcriptions",
+                json=payload,
+                timeout=self._timeout(settings.nvidia_stt_timeout) # Transcription can take a bit longer
+            )
+            response.raise_for_status()
+            data = response.json()
+            if "text" in data:
+                return data["text"]
+            return None
+        except Exception as e:
+            print(f"Error calling NVIDIA API (STT): {e}")
+            return None
 
-    async def synthesize_speech(self, text: str) -> Optional[bytes]:
+    async def synthesize_speech(self, text: str, voice: str = TTS_VOICE) -> Optional[bytes]:
         """
         Uses NVIDIA TTS model (e.g., nvidia/fastpitch-hifi-gan) to synthesize speech.
         Returns the raw audio bytes (usually WAV format).
         """
         payload = {
-            "model": "nvidia/fastpitch-hifi-gan",
+            "model": TTS_MODEL,
             "text": text,
-            "voice": "en-US-JennyNeural" # Example typical voice namespace
+            "voice": voice
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/audio/speech",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                # Assuming the API returns raw bytes for audio content, or base64 if it's JSON
-                if response.headers.get("content-type", "").startswith("audio/"):
-                    return response.content
-                else:
-                    # If it returns JSON with a base64 string
-                    data = response.json()
-                    if "audioContent" in data:
-                        return base64.b64decode(data["audioContent"])
-                return None
-            except Exception as e:
-                print(f"Error calling NVIDIA API (TTS): {e}")
-                return None
+        try:
+            response = await self.client.post(
+                "/audio/speech",
+                json=payload,
+                timeout=self._timeout(settings.nvidia_tts_timeout)
+            )
+            response.raise_for_status()
+            # Assuming the API returns raw bytes for audio content, or base64 if it's JSON
+            if response.headers.get("content-type", "").startswith("audio/"):
+                return response.content
+            else:
+                # If it returns JSON with a base64 string
+                data = response.json()
+                if "audioContent" in data:
+                    return base64.b64decode(data["audioContent"])
+            return None
+        except Exception as e:
+            print(f"Error calling NVIDIA API (TTS): {e}")
+            return None
 
 # Singleton instance
 nvidia_client = NVIDIAClient()
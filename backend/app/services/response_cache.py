@@ -0,0 +1,119 @@
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.cache import LRUCache
+from app.services.data_loader import data_loader
+from app.services.gazetteer import parse_coordinates
+from app.services.tag_parser import BOOKING_STATE
+from app.services.weather_client import geohash_encode
+
+_WORD_RE = re.compile(r"\w+")
+
+def normalize_message(text: str) -> str:
+    """Case, spacing and punctuation insensitive form: "Top places in Hyderabad?" == "top places in hyderabad"."""
+    return " ".join(_WORD_RE.findall(unicodedata.normalize("NFKC", text).casefold()))
+
+class ResponseCache:
+    """
+    In-process cache of chat answers (LRU bounded in bytes, with TTL), keyed per hotel on the
+    normalized latest user message, language, a coarse location bucket (geohash cell of the
+    guest's GPS position), the dataset version and the model parameters. Everything said before
+    the latest message (user and bot turns) is digested into the key as well, so only standalone
+    questions are shared across guests: "Yes please" or "2" mean something different after every
+    bot reply. Turns with an active booking, and answers that start a booking, are never cached.
+    """
+    def __init__(self, max_bytes: int, ttl_seconds: float, geohash_precision: int, enabled: bool = True):
+        self.enabled = enabled
+        self.geohash_precision = geohash_precision
+        self.memory = LRUCache(max_bytes, ttl_seconds=ttl_seconds)
+        self.stores = 0
+        self.bypassed_booking = 0
+        self.uncacheable = 0 # Answers carrying a booking tag
+        self.invalidated = 0
+
+    def location_bucket(self, user_location: Optional[str]) -> str:
+        if not user_location:
+            return ""
+        coords = parse_coordinates(user_location)
+        if coords:
+            return geohash_encode(coords[0], coords[1], self.geohash_precision)
+        return normalize_message(user_location)
+
+    def key(
+        self,
+        hotel_id: Optional[str],
+        messages: List[Dict[str, str]],
+        booking_context: Optional[str],
+        language: Optional[str],
+        user_location: Optional[str],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Optional[str]:
+        """The cache key for this turn, or None when it must go to the model."""
+        if not self.enabled or not hotel_id:
+            return None
+        if booking_context:
+            self.bypassed_booking += 1
+            return None
+        last_user = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].get("role") == "user"), None)
+        if last_user is None:
+            return None
+        latest = normalize_message(messages[last_user]["content"])
+        if not latest:
+            return None
+        # Empty for a standalone question; otherwise the answer depends on the whole exchange
+        earlier = hashlib.sha256(json.dumps(
+            [["bot" if m.get("role") == "assistant" else m.get("role"), m.get("content")] for m in messages[:last_user]], ensure_ascii=False
+        ).encode("utf-8")).hexdigest() if last_user else ""
+        parts = (
+            latest, (language or "").strip().lower(), self.location_bucket(user_location),
+            data_loader.version, earlier, model, f"{temperature:.3f}", str(max_tokens)
+        )
+        digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+        return f"{hotel_id}\x1f{digest}"
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        return self.memory.get(key) if key else None
+
+    def set(self, key: Optional[str], response_text: str):
+        if not key or not response_text:
+            return
+        if f"[{BOOKING_STATE}" in response_text.upper():
+            self.uncacheable += 1
+            return
+        self.memory.set(key, response_text)
+        self.stores += 1
+
+    def invalidate(self, hotel_id: str) -> int:
+        """Drops every cached answer of a hotel; returns how many."""
+        removed = self.memory.delete_prefix(f"{hotel_id}\x1f")
+        self.invalidated += removed
+        return removed
+
+    def clear(self):
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        return {
+            "enabled": self.enabled,
+            "dataset_version": data_loader.version,
+            **memory,
+            "stores": self.stores,
+            "bypassed_booking": self.bypassed_booking,
+            "uncacheable": self.uncacheable,
+            "invalidated": self.invalidated,
+        }
+
+# Singleton instance
+response_cache = ResponseCache(
+    max_bytes=settings.llm_cache_max_bytes,
+    ttl_seconds=settings.llm_cache_ttl_seconds,
+    geohash_precision=settings.llm_cache_geohash_precision,
+    enabled=settings.llm_cache_enabled
+)
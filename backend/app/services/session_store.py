@@ -0,0 +1,375 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import BookingState
+
+try:
+    import redis.asyncio as aioredis  # Optional: without it sessions live in process memory
+    from redis.exceptions import WatchError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Hash fields of the session's booking; the expiry flusher takes them out when it claims a session
+BOOKING_FIELDS = ("service_type", "current_step", "booking", "booking_created_at", "booking_updated_at")
+
+def session_key(hotel_id: str, session_id: Optional[str] = None) -> str:
+    """Guests without a session id share the hotel's session (the prototype frontend sends none)."""
+    return f"{hotel_id}:{session_id}" if session_id else hotel_id
+
+class BookingSession:
+    """The in-progress booking of a chat session, as stored in the session hash."""
+    __slots__ = ("service_type", "current_step", "temp_data_json", "created_at", "updated_at")
+
+    def __init__(self, service_type: str, current_step: str, temp_data_json: Dict[str, Any], created_at: float, updated_at: float):
+        self.service_type = service_type
+        self.current_step = current_step
+        self.temp_data_json = temp_data_json
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_hash(cls, fields: Dict[str, str]) -> Optional["BookingSession"]:
+        if "booking" not in fields:
+            return None
+        return cls(
+            fields["service_type"],
+            fields["current_step"],
+            json.loads(fields["booking"]),
+            float(fields["booking_created_at"]),
+            float(fields["booking_updated_at"]),
+        )
+
+    def to_booking_state(self, hotel_id: str) -> BookingState:
+        return BookingState(
+            hotel_id=hotel_id,
+            service_type=self.service_type,
+            current_step=self.current_step,
+            temp_data_json=self.temp_data_json,
+            created_at=datetime.fromtimestamp(self.created_at, timezone.utc),
+            updated_at=datetime.fromtimestamp(self.updated_at, timezone.utc)
+        )
+
+class MemorySessionBackend:
+    """In-process stand-in for Redis: same hash-per-session layout and expiry semantics, one worker only."""
+    name = "memory"
+
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, str]] = {}
+        self._expires: Dict[str, float] = {} # key -> logical expiry (unix time)
+        self._lock = asyncio.Lock()
+
+    async def update(self, key: str, fields: Dict[str, str], incr: Optional[str], expires_at: float, grace: float) -> Dict[str, str]:
+        async with self._lock:
+            session = self._sessions.setdefault(key, {})
+            session.update(fields)
+            if incr:
+                session[incr] = str(int(session.get(incr, 0)) + 1)
+            self._expires[key] = expires_at
+            return dict(session)
+
+    async def get(self, key: str) -> Dict[str, str]:
+        return dict(self._sessions.get(key, {}))
+
+    async def delete(self, key: str):
+        async with self._lock:
+            self._sessions.pop(key, None)
+            self._expires.pop(key, None)
+
+    async def claim_expired(self, now: float, limit: Optional[int]) -> List[Tuple[str, Dict[str, str]]]:
+        async with self._lock:
+            keys = [k for k, expires_at in self._expires.items() if expires_at <= now][:limit]
+            claimed = []
+            for k in keys:
+                del self._expires[k]
+                session = self._sessions.get(k, {})
+                claimed.append((k, dict(session)))
+                for field in BOOKING_FIELDS: # A chat turn reviving the session starts without it
+                    session.pop(field, None)
+            return claimed
+
+    async def delete_claimed(self, keys: List[str], now: float):
+        async with self._lock:
+            for k in keys:
+                if k not in self._expires: # Not revived by a chat turn since the claim
+                    self._sessions.pop(k, None)
+
+    async def release_claimed(self, claimed: List[Tuple[str, Dict[str, str]]]):
+        async with self._lock:
+            for k, fields in claimed:
+                session = self._sessions.get(k)
+                if session is None: # Cleared meanwhile
+                    continue
+                if "booking" not in session: # Unless the revived session started a new one
+                    session.update({f: fields[f] for f in BOOKING_FIELDS if f in fields})
+                if k not in self._expires:
+                    self._expires[k] = float(fields.get("expires_at", 0))
+
+    async def count(self) -> Optional[int]:
+        return len(self._sessions)
+
+    async def close(self):
+        pass
+
+class RedisSessionBackend:
+    """
+    One Redis hash per session (key prefix + session key) plus a sorted set of logical expiry
+    times. The hash itself lives `grace` seconds longer than its logical expiry, so the expiry
+    flusher can still read it and persist the booking before Redis drops it.
+    """
+    name = "redis"
+
+    def __init__(self, client, prefix: str):
+        self.client = client
+        self.prefix = prefix
+        self.expiry_key = f"{prefix}expiry"
+
+    async def update(self, key: str, fields: Dict[str, str], incr: Optional[str], expires_at: float, grace: float) -> Dict[str, str]:
+        redis_key = self.prefix + key
+        # MULTI/EXEC: the write, the TTL and the expiry index move together; the read rides the same round trip
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(redis_key, mapping=fields)
+            if incr:
+                pipe.hincrby(redis_key, incr, 1)
+            pipe.expireat(redis_key, int(expires_at + grace))
+            pipe.zadd(self.expiry_key, {key: expires_at})
+            pipe.hgetall(redis_key)
+            results = await pipe.execute()
+        return results[-1]
+
+    async def get(self, key: str) -> Dict[str, str]:
+        return await self.client.hgetall(self.prefix + key)
+
+    async def delete(self, key: str):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(self.prefix + key)
+            pipe.zrem(self.expiry_key, key)
+            await pipe.execute()
+
+    async def claim_expired(self, now: float, limit: Optional[int]) -> List[Tuple[str, Dict[str, str]]]:
+        """
+        Takes expired sessions out of the expiry index and their booking out of the hash; the
+        rest of the hash stays until delete_claimed.
+        """
+        claimed = []
+        for key in await self.client.zrangebyscore(self.expiry_key, "-inf", now, start=0, num=limit or -1):
+            # ZREM succeeds for exactly one worker, which then owns the session
+            if not await self.client.zrem(self.expiry_key, key):
+                continue
+            redis_key = self.prefix + key
+            # WATCH: reading the booking and removing it from the hash is atomic against chat turns
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(redis_key)
+                    fields = await pipe.hgetall(redis_key)
+                    expires_at = float(fields.get("expires_at", 0))
+                    if expires_at > now:
+                        # Updated between ZRANGEBYSCORE and ZREM: still live, put it back
+                        await pipe.zadd(self.expiry_key, {key: expires_at})
+                        continue
+                    pipe.multi()
+                    pipe.hdel(redis_key, *BOOKING_FIELDS)
+                    await pipe.execute()
+                except WatchError:
+                    continue # Revived by a chat turn, which put it back in the index itself
+            claimed.append((key, fields))
+        return claimed
+
+    async def delete_claimed(self, keys: List[str], now: float):
+        for key in keys:
+            redis_key = self.prefix + key
+            # WATCH: a chat turn reviving the session between the check and the DELETE aborts it
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(redis_key)
+                    if float(await pipe.hget(redis_key, "expires_at") or 0) > now:
+                        continue
+                    pipe.multi()
+                    pipe.delete(redis_key)
+                    await pipe.execute()
+                except WatchError:
+                    pass
+
+    async def release_claimed(self, claimed: List[Tuple[str, Dict[str, str]]]):
+        """
+        Puts claimed bookings back in their session (unless the revived session started a new
+        one) and the sessions back in the expiry index, so the next flush retries them.
+        """
+        for key, fields in claimed:
+            redis_key = self.prefix + key
+            booking = {f: fields[f] for f in BOOKING_FIELDS if f in fields}
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(redis_key)
+                    current = await pipe.hgetall(redis_key)
+                    if not current: # Cleared meanwhile
+                        continue
+                    pipe.multi()
+                    if booking and "booking" not in current:
+                        pipe.hset(redis_key, mapping=booking)
+                    pipe.zadd(self.expiry_key, {key: float(fields.get("expires_at", 0))}, nx=True)
+                    await pipe.execute()
+                except WatchError:
+                    # A chat turn changed the session meanwhile: it is in the index again, keep its state
+                    continue
+
+    async def count(self) -> Optional[int]:
+        return await self.client.zcard(self.expiry_key)
+
+    async def close(self):
+        await self.client.aclose()
+
+class SessionStore:
+    """
+    Conversational session state (the in-progress booking plus per-session metadata) kept in
+    Redis, or in process memory when Redis is not installed or not reachable. Every chat turn
+    is one atomic update that also slides the session TTL; Postgres is only written when a
+    booking is confirmed or when a session with an open booking expires (write-behind).
+    """
+    def __init__(self, url: Optional[str], prefix: str, ttl_seconds: float, grace_seconds: float, flush_interval_seconds: float):
+        self.url = url
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.grace_seconds = grace_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.backend = MemorySessionBackend()
+        self._flusher: Optional[asyncio.Task] = None
+        self.turns = 0
+        self.booking_saves = 0
+        self.expired = 0
+        self.persisted = 0
+        self.errors = 0
+
+    async def startup(self):
+        if self.url and REDIS_AVAILABLE:
+            client = aioredis.from_url(self.url, decode_responses=True)
+            try:
+                await client.ping()
+                self.backend = RedisSessionBackend(client, self.prefix)
+            except Exception as e:
+                print(f"Redis unavailable ({e}), keeping chat sessions in memory")
+                await client.aclose()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def shutdown(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if isinstance(self.backend, MemorySessionBackend):
+            # In-memory sessions end with the process: persist their open bookings like an expiry
+            try:
+                await self.flush_expired(now=float("inf"), limit=None)
+            except Exception as e:
+                print(f"Session expiry flush error: {e}")
+        await self.backend.close()
+
+    async def _update(self, key: str, fields: Dict[str, str], incr: Optional[str] = None) -> Dict[str, str]:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        fields = {**fields, "updated_at": str(now), "expires_at": str(expires_at)}
+        return await self.backend.update(key, fields, incr, expires_at, self.grace_seconds)
+
+    async def begin_turn(self, key: str, hotel_id: str, meta: Optional[Dict[str, Any]] = None) -> Optional[BookingSession]:
+        """
+        Records a chat turn (turn counter, metadata, TTL refresh) and returns the session's open
+        booking, in a single round trip. Store failures degrade to "no booking context".
+        A session past its TTL keeps its booking until the expiry flusher claims it (a turn
+        before that revives both); once claimed, the booking belongs to booking_state and the
+        session goes on without it.
+        """
+        self.turns += 1
+        fields = {"hotel_id": hotel_id}
+        fields.update({f"meta:{k}": str(v) for k, v in (meta or {}).items() if v is not None})
+        try:
+            return BookingSession.from_hash(await self._update(key, fields, incr="turns"))
+        except Exception as e:
+            self.errors += 1
+            print(f"Session store error: {e}")
+            return None
+
+    async def save_booking(self, key: str, hotel_id: str, service_type: str, current_step: str, data: Dict[str, Any], created_at: Optional[float] = None):
+        now = time.time()
+        self.booking_saves += 1
+        await self._update(key, {
+            "hotel_id": hotel_id,
+            "service_type": service_type,
+            "current_step": current_step,
+            "booking": json.dumps(data),
+            "booking_created_at": str(created_at or now),
+            "booking_updated_at": str(now),
+        })
+
+    async def get_booking(self, key: str) -> Optional[BookingSession]:
+        """The session's booking without recording a turn (same rule as begin_turn: None once claimed on expiry)."""
+        return BookingSession.from_hash(await self.backend.get(key))
+
+    async def clear(self, key: str):
+        await self.backend.delete(key)
+
+    async def flush_expired(self, now: Optional[float] = None, limit: Optional[int] = 500) -> int:
+        """
+        Persists the open bookings of expired sessions to booking_state; returns how many.
+        Claiming takes the booking out of the session, so a chat turn arriving during the commit
+        cannot keep a copy of a booking that is also persisted. Sessions are only deleted once the
+        commit succeeded; on failure the bookings are put back and the next flush retries them.
+        """
+        now = now or time.time()
+        claimed = await self.backend.claim_expired(now, limit)
+        if not claimed:
+            return 0
+        states = []
+        try:
+            for key, fields in claimed:
+                booking = BookingSession.from_hash(fields)
+                if booking is not None and booking.current_step != "completed":
+                    states.append(booking.to_booking_state(fields.get("hotel_id") or key.split(":", 1)[0]))
+            if states:
+                async with AsyncSessionLocal() as db:
+                    db.add_all(states)
+                    await db.commit()
+        except BaseException:
+            await self.backend.release_claimed(claimed)
+            raise
+        await self.backend.delete_claimed([key for key, _ in claimed], now)
+        self.expired += len(claimed)
+        self.persisted += len(states)
+        return len(states)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush_expired()
+            except Exception as e:
+                self.errors += 1
+                print(f"Session expiry flush error: {e}")
+
+    async def stats(self) -> Dict[str, Any]:
+        try:
+            sessions = await self.backend.count()
+        except Exception:
+            sessions = None
+        return {
+            "backend": self.backend.name,
+            "sessions": sessions,
+            "turns": self.turns,
+            "booking_saves": self.booking_saves,
+            "expired": self.expired,
+            "persisted_on_expiry": self.persisted,
+            "errors": self.errors,
+        }
+
+# Singleton instance
+session_store = SessionStore(
+    url=settings.redis_url,
+    prefix=settings.session_key_prefix,
+    ttl_seconds=settings.session_ttl_seconds,
+    grace_seconds=settings.session_expiry_grace_seconds,
+    flush_interval_seconds=settings.session_flush_interval_seconds
+)
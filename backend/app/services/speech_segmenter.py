@@ -0,0 +1,211 @@
+import asyncio
+import struct
+from typing import AsyncIterator, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.audio_preprocess import (
+    WavFormat, SAMPLE_DTYPES, audio_preprocessor, frame_levels_dbfs, pcm_to_float
+)
+from app.services.nvidia_client import nvidia_client
+
+FRAME_MS = 30
+# Silence kept before the first voiced frame of a segment, so word onsets are not clipped
+LEAD_PAD_MS = 200
+# Largest RIFF header we are willing to buffer while looking for the data chunk
+MAX_HEADER_BYTES = 64 * 1024
+
+def parse_wav_header(buf: bytes):
+    """
+    Incrementally parses the start of a PCM WAV upload. Returns (WavFormat, offset of the
+    first PCM byte, data chunk size) once the data chunk header has arrived, None if more
+    bytes are needed, and raises ValueError if this is not a PCM WAV we can segment. The size
+    is None when the writer left it open (0 or 0xFFFFFFFF, as streaming recorders do).
+    """
+    if len(buf) < 12:
+        return None
+    if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+    fmt: Optional[WavFormat] = None
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id = buf[pos:pos + 4]
+        size = struct.unpack_from("<I", buf, pos + 4)[0]
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            return fmt, pos + 8, size if 0 < size < 0xFFFFFFFF else None
+        if pos + 8 + size > len(buf):
+            return None
+        if chunk_id == b"fmt ":
+            audio_format, channels, framerate = struct.unpack_from("<HHI", buf, pos + 8)
+            sampwidth = struct.unpack_from("<H", buf, pos + 22)[0] // 8
+            # 1 = PCM, 0xFFFE = WAVE_FORMAT_EXTENSIBLE (PCM subformat in practice)
+            if audio_format not in (1, 0xFFFE) or sampwidth not in SAMPLE_DTYPES or channels < 1:
+                raise ValueError("Unsupported WAV encoding")
+            fmt = WavFormat(channels, sampwidth, framerate)
+        pos += 8 + size + (size & 1)
+    return None
+
+def frame_energy_dbfs(pcm: bytes, fmt: WavFormat, frame_samples: int) -> np.ndarray:
+    """RMS level in dBFS of each complete frame of interleaved PCM, channels averaged."""
+    return frame_levels_dbfs(pcm_to_float(pcm, fmt).mean(axis=1), frame_samples)
+
+class SilenceSegmenter:
+    """
+    Energy-based voice activity segmentation over a stream of PCM bytes. Frames quieter than
+    `threshold_dbfs` count as silence; a segment is closed once `min_silence_ms` of silence
+    follows speech, or forcibly at `max_seconds`. Only the open segment is buffered, and
+    leading silence is trimmed to a short pad, so memory stays bounded by max_seconds.
+    """
+    def __init__(self, fmt: WavFormat, threshold_dbfs: float, min_silence_ms: int, max_seconds: float):
+        self.fmt = fmt
+        self.threshold_dbfs = threshold_dbfs
+        self.frame_samples = max(1, fmt.framerate * FRAME_MS // 1000)
+        self.frame_bytes = self.frame_samples * fmt.block_align
+        self.min_silence_frames = max(1, min_silence_ms // FRAME_MS)
+        self.max_frames = max(1, int(max_seconds * 1000 // FRAME_MS))
+        self.lead_pad_frames = LEAD_PAD_MS // FRAME_MS
+        self._remainder = b"" # Bytes of an incomplete trailing frame
+        self._segment = bytearray()
+        self._frames = 0 # Frames in the open segment
+        self._voiced = False # Open segment contains speech
+        self._silence_run = 0
+
+    def _close(self) -> Optional[bytes]:
+        segment = bytes(self._segment) if self._voiced else None
+        self._segment = bytearray()
+        self._frames = 0
+        self._voiced = False
+        self._silence_run = 0
+        return segment
+
+    def feed(self, pcm: bytes) -> List[bytes]:
+        """Consumes PCM bytes, returns the raw PCM of every segment completed by them."""
+        data = self._remainder + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._remainder = data[usable:]
+        if not usable:
+            return []
+        voiced = frame_energy_dbfs(data[:usable], self.fmt, self.frame_samples) > self.threshold_dbfs
+
+        completed: List[bytes] = []
+        fb = self.frame_bytes
+        for idx, is_voiced in enumerate(voiced.tolist()):
+            self._segment += data[idx * fb:(idx + 1) * fb]
+            self._frames += 1
+            if is_voiced:
+                self._voiced = True
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+                if not self._voiced and self._frames > self.lead_pad_frames:
+                    # Still waiting for speech: keep only the lead pad
+                    del self._segment[:fb]
+                    self._frames -= 1
+            if (self._voiced and self._silence_run >= self.min_silence_frames) or self._frames >= self.max_frames:
+                segment = self._close()
+                if segment:
+                    completed.append(segment)
+        return completed
+
+    def finish(self) -> Optional[bytes]:
+        """The final open segment (plus any trailing partial frame), if it contains speech."""
+        self._segment += self._remainder
+        self._remainder = b""
+        return self._close()
+
+async def transcribe_stream(chunks: AsyncIterator[bytes]) -> Optional[str]:
+    """
+    Transcribes an uploaded recording read chunk by chunk. PCM WAV audio is split at silences
+    and each segment is normalized (16 kHz mono, trimmed) and sent to STT as soon as it is
+    complete, at most stt_max_concurrency at a time (reading pauses while all slots are busy,
+    which bounds memory per request); the transcripts are stitched back in order. Compressed
+    containers (webm, mp3, ...) are decoded with ffmpeg when available and segmented the same
+    way, otherwise they go upstream whole, as before.
+    """
+    head = b""
+    parsed = None
+    async for chunk in chunks:
+        head += chunk
+        try:
+            parsed = parse_wav_header(head)
+        except ValueError:
+            break
+        if parsed is not None or len(head) > MAX_HEADER_BYTES:
+            break
+    if parsed is not None:
+        fmt, data_offset, data_size = parsed
+        # Chunks after the audio (LIST, id3, ...) are not PCM: stop at the declared data size
+        return await _transcribe_pcm(fmt, head[data_offset:], chunks, data_size)
+
+    rest = [head]
+    async for chunk in chunks:
+        rest.append(chunk)
+    audio = b"".join(rest)
+    if not audio:
+        return None
+    pcm = await audio_preprocessor.decode(audio)
+    if pcm is None:
+        # Not decodable here: fall back to one request with the whole file
+        return await nvidia_client.transcribe_audio(audio_bytes=audio)
+    return await _transcribe_pcm(audio_preprocessor.target_format, pcm, None)
+
+async def _transcribe_pcm(
+    fmt: WavFormat,
+    first: bytes,
+    chunks: Optional[AsyncIterator[bytes]],
+    data_size: Optional[int] = None
+) -> Optional[str]:
+    segmenter = SilenceSegmenter(
+        fmt,
+        settings.stt_silence_threshold_dbfs,
+        settings.stt_min_silence_ms,
+        settings.stt_segment_max_seconds
+    )
+    semaphore = asyncio.Semaphore(settings.stt_max_concurrency)
+    tasks: List[asyncio.Task] = []
+    # Audio past the duration cap is neither buffered nor transcribed
+    remaining = int(settings.stt_max_duration_seconds * fmt.framerate) * fmt.block_align
+    if data_size is not None:
+        remaining = min(remaining, data_size)
+
+    async def transcribe(pcm: bytes) -> Optional[str]:
+        try:
+            wav = await audio_preprocessor.anormalize_pcm(pcm, fmt)
+            if len(wav) <= 44:
+                return "" # Only silence once trimmed
+            return await nvidia_client.transcribe_audio(audio_bytes=wav)
+        finally:
+            semaphore.release()
+
+    async def dispatch(pcm: bytes):
+        nonlocal remaining
+        pcm = pcm[:remaining]
+        remaining -= len(pcm)
+        for segment in segmenter.feed(pcm):
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(transcribe(segment)))
+
+    try:
+        await dispatch(first)
+        if chunks is not None:
+            async for chunk in chunks:
+                if remaining <= 0:
+                    break
+                await dispatch(chunk)
+        last = segmenter.finish()
+        if last:
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(transcribe(last)))
+        if not tasks:
+            return "" # Nothing but silence
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    if any(r is None for r in results):
+        return None # Don't return a transcript with holes in it
+    return " ".join(r.strip() for r in results if r.strip())
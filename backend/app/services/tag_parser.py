@@ -0,0 +1,243 @@
+import json
+import re
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+from typing import Any, Dict, List, Optional, Union
+
+# Structured tags the LLM appends to its replies (see the system prompt in nvidia_client)
+RECOMMENDATIONS = "RECOMMENDATIONS"
+BOOKING_STATE = "BOOKING_STATE"
+ITINERARY_PLAN = "ITINERARY_PLAN"
+
+# Tag name -> opening bracket of its JSON payload
+TAG_PAYLOAD_OPENERS = {
+    RECOMMENDATIONS: "[",
+    BOOKING_STATE: "{",
+    ITINERARY_PLAN: "{",
+}
+TAG_MARKERS = tuple(f"[{name}" for name in TAG_PAYLOAD_OPENERS)
+_MAX_MARKER_LEN = max(len(m) for m in TAG_MARKERS)
+_CLOSERS = {"[": "]", "{": "}"}
+# Literal alternation + whitespace run, anchored at a "[": nothing to backtrack over
+_MARKER = re.compile(r"\[(" + "|".join(TAG_PAYLOAD_OPENERS) + r"):\s*", re.IGNORECASE)
+_DECODER = json.JSONDecoder()
+
+# --- Payload schemas -------------------------------------------------------------------
+
+class Recommendation(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    name: str = "Unknown"
+    city: Optional[str] = None
+    category: Optional[str] = None
+    image_url: Optional[str] = None
+    images: Optional[List[str]] = None
+    detail: Optional[str] = None
+    price: Optional[Union[str, int, float]] = None
+
+class BookingStatePayload(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    type: Optional[str] = "booking" # Models sometimes send null mid-conversation; kept as sent
+    pickup: Optional[str] = None
+    dropoff: Optional[str] = None
+    time: Optional[str] = None
+    status: Optional[str] = "gathering_info"
+
+class ItineraryItem(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    time: Optional[str] = None
+    activity: str
+    place: Optional[str] = None
+    cost: Optional[Union[int, float, str]] = None
+    category: Optional[str] = None
+    tip: Optional[str] = None
+
+class ItineraryDay(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    day: int
+    theme: Optional[str] = None
+    items: List[ItineraryItem] = []
+
+class ItineraryPlan(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    destination: str
+    days: int
+    budget_total: Optional[Union[int, float, str]] = None
+    budget_currency: str = "INR"
+    generated_at: Optional[str] = None
+    days_plan: List[ItineraryDay] = []
+
+_VALIDATORS = {
+    RECOMMENDATIONS: TypeAdapter(List[Recommendation]),
+    BOOKING_STATE: TypeAdapter(BookingStatePayload),
+    ITINERARY_PLAN: TypeAdapter(ItineraryPlan),
+}
+
+class ExtractedTag:
+    """One structured tag found in an LLM response."""
+    __slots__ = ("name", "start", "end", "raw", "data", "error")
+
+    def __init__(self, name: str, start: int, end: int, raw: str):
+        self.name = name
+        self.start = start # Offset of the opening "[" of the tag
+        self.end = end # Offset just past the closing "]" of the tag
+        self.raw = raw # The JSON payload as emitted by the model
+        self.data: Any = None # Validated payload (model or list of models), None if invalid
+        self.error: Optional[str] = None
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None
+
+    def dump(self) -> Any:
+        """JSON-compatible version of the validated payload (fields the model sent, explicit nulls included)."""
+        return _VALIDATORS[self.name].dump_python(self.data, mode="json", exclude_unset=True)
+
+def _skip_ws(text: str, pos: int) -> int:
+    n = len(text)
+    while pos < n and text[pos].isspace():
+        pos += 1
+    return pos
+
+# Only these characters can change the bracket depth or string state, so the scanner jumps
+# between them instead of stepping through every character in Python.
+_STRUCTURAL = re.compile(r'[\[\]{}"\\]')
+
+def _balanced_end(text: str, pos: int) -> int:
+    """
+    Given text[pos] is "[" or "{", returns the offset just past its matching closer,
+    honouring JSON strings and escapes. Returns -1 if the payload never closes.
+    """
+    stack = [_CLOSERS[text[pos]]]
+    in_string = False
+    skip_to = 0 # End of the last escape sequence inside a string
+    for m in _STRUCTURAL.finditer(text, pos + 1):
+        i = m.start()
+        if i < skip_to:
+            continue
+        ch = text[i]
+        if in_string:
+            if ch == "\\":
+                skip_to = i + 2
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "[" or ch == "{":
+            stack.append(_CLOSERS[ch])
+        elif ch == "]" or ch == "}":
+            if ch != stack[-1]:
+                return -1
+            stack.pop()
+            if not stack:
+                return i + 1
+    return -1
+
+def extract_tags(text: str, validate: bool = True) -> List[ExtractedTag]:
+    """
+    Finds every RECOMMENDATIONS / BOOKING_STATE / ITINERARY_PLAN tag in a single
+    left-to-right scan. Payloads are delimited by JSON decoding from the opening bracket
+    (falling back to bracket balancing for malformed JSON) instead of backtracking regexes,
+    and validated against their schema unless validate is False.
+    """
+    tags: List[ExtractedTag] = []
+    n = len(text)
+    pos = text.find("[")
+    while pos != -1:
+        # str.find jumps between candidate brackets at memchr speed; the marker is anchored there
+        match = _MARKER.match(text, pos)
+        if not match:
+            pos = text.find("[", pos + 1)
+            continue
+        name = match.group(1).upper()
+        payload_start = match.end()
+        if payload_start >= n or text[payload_start] != TAG_PAYLOAD_OPENERS[name]:
+            pos = text.find("[", pos + 1)
+            continue
+
+        data = None
+        try:
+            data, payload_end = _DECODER.raw_decode(text, payload_start)
+        except ValueError:
+            payload_end = _balanced_end(text, payload_start)
+            if payload_end == -1:
+                # Truncated payload: everything after it belongs to the unterminated JSON
+                break
+        close = _skip_ws(text, payload_end)
+        if close >= n or text[close] != "]":
+            pos = text.find("[", payload_end)
+            continue
+
+        tag = ExtractedTag(name, pos, close + 1, text[payload_start:payload_end])
+        if data is None:
+            tag.error = "Malformed JSON payload"
+        elif validate:
+            try:
+                tag.data = _VALIDATORS[name].validate_python(data)
+            except ValidationError as e:
+                tag.error = str(e)
+        tags.append(tag)
+        pos = text.find("[", close + 1)
+    return tags
+
+def render_tag(tag: ExtractedTag) -> str:
+    """Serializes a validated tag back into the single-line format the frontend parses."""
+    payload = _VALIDATORS[tag.name].dump_json(tag.data, exclude_unset=True).decode("utf-8")
+    return f"[{tag.name}: {payload}]"
+
+def rebuild(text: str, replacements: Dict[int, str], tags: List[ExtractedTag]) -> str:
+    """
+    Rebuilds text with tags[i] replaced by replacements[i]. The output is assembled in a
+    single join instead of rewriting the whole string once per replacement.
+    """
+    if not replacements:
+        return text
+    parts = []
+    last = 0
+    for idx, tag in enumerate(tags):
+        if idx in replacements:
+            parts.append(text[last:tag.start])
+            parts.append(replacements[idx])
+            last = tag.end
+    parts.append(text[last:])
+    return "".join(parts)
+
+class TagHoldback:
+    """
+    Splits a stream of LLM text deltas into the conversational text (safe to forward
+    immediately) and the trailing structured tag, which is held back until completion.
+    """
+    def __init__(self):
+        self.text = "" # Conversational text forwarded so far
+        self.pending = ""
+        self.tag = ""
+        self.in_tag = False
+
+    def _emit(self, out: str) -> str:
+        self.text += out
+        return out
+
+    def feed(self, delta: str) -> str:
+        """Returns the part of the text seen so far that can be forwarded to the client."""
+        if self.in_tag:
+            self.tag += delta
+            return ""
+        self.pending += delta
+        pos = self.pending.find("[")
+        while pos != -1:
+            candidate = self.pending[pos:pos + _MAX_MARKER_LEN].upper()
+            if any(candidate.startswith(m) for m in TAG_MARKERS):
+                # A full tag marker: everything from here on is held back
+                out, self.tag, self.in_tag = self.pending[:pos], self.pending[pos:], True
+                self.pending = ""
+                return self._emit(out)
+            if any(m.startswith(candidate) for m in TAG_MARKERS):
+                # Could still become a tag marker once more deltas arrive
+                out, self.pending = self.pending[:pos], self.pending[pos:]
+                return self._emit(out)
+            pos = self.pending.find("[", pos + 1)
+        out, self.pending = self.pending, ""
+        return self._emit(out)
+
+    def flush(self) -> str:
+        """Returns any text still buffered once the upstream stream has ended."""
+        out, self.pending = self.pending, ""
+        return self._emit(out)
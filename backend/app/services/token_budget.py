@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional, Tuple
+
+# Per-message framing overhead of the chat template (role header, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_SNIPPET_CHARS = 120
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate, no tokenizer needed: ~4 characters per token for ASCII text.
+    Non-ASCII (Devanagari, Telugu, ...) is 2-3 UTF-8 bytes per character and tokenizes far
+    worse, so counting bytes keeps the estimate conservative for Indian languages.
+    """
+    if text.isascii():
+        return len(text) // 4 + 1
+    return len(text.encode("utf-8")) // 4 + 1
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+def _summarize(dropped: List[Dict[str, str]], max_tokens: int) -> Optional[str]:
+    """One line per dropped guest request, most recent first, until the summary budget is spent."""
+    lines = []
+    used = 0
+    for msg in reversed(dropped):
+        if msg["role"] != "user":
+            continue
+        snippet = " ".join(msg["content"].split())
+        if len(snippet) > SUMMARY_SNIPPET_CHARS:
+            snippet = snippet[:SUMMARY_SNIPPET_CHARS].rstrip() + "..."
+        line = f"- {snippet}"
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    if not lines:
+        return None
+    return "Earlier in this conversation the guest asked (most recent first):\n" + "\n".join(lines)
+
+def trim_history(
+    messages: List[Dict[str, str]],
+    budget_tokens: int,
+    min_recent: int = 4,
+    keep_booking_turn: bool = False,
+    summary_max_tokens: int = 200
+) -> Tuple[List[Dict[str, str]], Optional[str]]:
+    """
+    Trims a (role-normalized) conversation to fit budget_tokens. Always keeps the latest
+    `min_recent` messages; with keep_booking_turn, also the latest assistant turn carrying a
+    BOOKING_STATE tag (and the guest message it answered). Older turns are dropped and
+    compactly summarized. Returns (kept_messages, summary or None).
+    """
+    if not messages:
+        return messages, None
+    costs = [message_tokens(m) for m in messages]
+    if sum(costs) <= budget_tokens:
+        return messages, None
+
+    budget = budget_tokens - summary_max_tokens
+
+    # The turn holding the active booking state, kept as a (user, assistant) pair so roles alternate
+    pinned: List[int] = []
+    if keep_booking_turn:
+        for idx in range(len(messages) - 1, -1, -1):
+            if messages[idx]["role"] == "assistant" and "[BOOKING_STATE" in messages[idx]["content"].upper():
+                pinned = [idx - 1, idx] if idx > 0 and messages[idx - 1]["role"] == "user" else [idx]
+                break
+
+    # Newest-first suffix: forced up to min_recent, then as far as the budget allows
+    start = len(messages)
+    used = sum(costs[i] for i in pinned)
+    while start > 0:
+        candidate = start - 1
+        in_recent = len(messages) - candidate <= min_recent
+        cost = 0 if candidate in pinned else costs[candidate]
+        if not in_recent and used + cost > budget:
+            break
+        used += cost
+        start = candidate
+    # The kept suffix must open with a guest turn
+    while start < len(messages) - 1 and messages[start]["role"] != "user":
+        start += 1
+
+    pinned = [i for i in pinned if i < start]
+    kept_ids = pinned + list(range(start, len(messages)))
+    kept_set = set(kept_ids)
+    dropped = [m for i, m in enumerate(messages) if i not in kept_set]
+    return [messages[i] for i in kept_ids], _summarize(dropped, summary_max_tokens)
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.nvidia_client import nvidia_client, TRANSLATION_MODEL
+from app.services.translation_cache import translation_cache
+
+class TranslationBatcher:
+    """
+    Coalesces concurrent translation requests for the same target language. Requests arriving
+    within `window_seconds` of the first one (or until `max_batch` distinct strings are queued)
+    go upstream as one structured call, and the results fan back out to every waiting caller.
+    """
+    def __init__(self, window_seconds: float, max_batch: int, temperature: float = 0.15):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.temperature = temperature
+        # target language -> text -> futures of every caller waiting on that text
+        self._pending: Dict[str, Dict[str, List[asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._batches: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.upstream_calls = 0
+        self.batches = 0
+
+    async def translate(self, text: str, target_language: str) -> Optional[str]:
+        self.requests += 1
+        cached = await translation_cache.get(text, target_language, TRANSLATION_MODEL, self.temperature)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(target_language, {})
+        pending.setdefault(text, []).append(future)
+        if len(pending) >= self.max_batch:
+            self._flush(target_language)
+        elif target_language not in self._timers:
+            self._timers[target_language] = loop.call_later(self.window_seconds, self._flush, target_language)
+        return await future
+
+    async def translate_many(self, texts: List[str], target_language: str) -> List[Optional[str]]:
+        return list(await asyncio.gather(*(self.translate(t, target_language) for t in texts)))
+
+    def _flush(self, target_language: str):
+        timer = self._timers.pop(target_language, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(target_language, None)
+        if pending:
+            task = asyncio.get_running_loop().create_task(self._run_batch(target_language, list(pending.items())))
+            self._batches.add(task) # Keep a reference until done
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, target_language: str, items: List[Tuple[str, List[asyncio.Future]]]):
+        texts = [text for text, _ in items]
+        # Every text here already missed the cache in translate(): go straight upstream
+        try:
+            if len(texts) == 1:
+                self.upstream_calls += 1
+                results = [await nvidia_client.translate_upstream(texts[0], target_language, temperature=self.temperature)]
+            else:
+                self.batches += 1
+                self.upstream_calls += 1
+                results = await nvidia_client.translate_batch(texts, target_language, temperature=self.temperature)
+                if results is None:
+                    # Structured reply unusable: translate each string on its own, concurrently
+                    self.upstream_calls += len(texts)
+                    results = await asyncio.gather(*(
+                        nvidia_client.translate_upstream(t, target_language, temperature=self.temperature) for t in texts
+                    ))
+        except Exception as e:
+            print(f"Error in translation batch ({target_language}): {e}")
+            results = [None] * len(texts)
+
+        for (_, futures), result in zip(items, results):
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "upstream_calls": self.upstream_calls, "batches": self.batches}
+
+# Singleton instance
+translation_batcher = TranslationBatcher(
+    window_seconds=settings.translation_batch_window_ms / 1000,
+    max_batch=settings.translation_batch_max_size
+)
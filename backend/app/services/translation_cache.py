@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.services.cache import LRUCache, SQLiteStore
+
+class TranslationCache:
+    """
+    Two-level translation cache: an in-process LRU (bounded in bytes) in front of a
+    persistent SQLite table, so hits survive restarts. Keyed on
+    (normalized text hash, target language, model, temperature).
+    """
+    def __init__(self, max_bytes: int, path: Optional[str]):
+        self.memory = LRUCache(max_bytes)
+        self.store = SQLiteStore(path, "translations") if path else None
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, target_language: str, model: str, temperature: float) -> str:
+        normalized = " ".join(text.split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{digest}:{target_language.strip().lower()}:{model}:{temperature:.3f}"
+
+    async def get(self, text: str, target_language: str, model: str, temperature: float) -> Optional[str]:
+        key = self.key(text, target_language, model, temperature)
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.store is not None:
+            try:
+                value = await asyncio.to_thread(self.store.get, key)
+            except Exception as e:
+                print(f"Translation cache read error: {e}")
+                value = None
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, target_language: str, model: str, temperature: float, translated: str):
+        key = self.key(text, target_language, model, temperature)
+        self.memory.set(key, translated)
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(self.store.set, key, translated)
+            except Exception as e:
+                print(f"Translation cache write error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": memory["evictions"],
+            "memory_entries": memory["entries"],
+            "memory_bytes": memory["bytes"],
+            "memory_max_bytes": memory["max_bytes"],
+        }
+
+# Singleton instance
+translation_cache = TranslationCache(
+    max_bytes=settings.translation_cache_max_bytes,
+    path=settings.cache_db_path or None
+)
@@ -0,0 +1,132 @@
+import asyncio
+import re
+import struct
+from typing import AsyncIterator, List, Optional, Tuple
+
+from app.config import settings
+from app.services.audio_cache import audio_cache
+from app.services.nvidia_client import nvidia_client, TTS_MODEL
+
+# Sentence ends: Latin punctuation plus the Devanagari danda, or a line break
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+|\n+")
+_SOFT_BREAK = re.compile(r"(?<=[,;:])\s+|\s+")
+# Fragments shorter than this are merged into the next sentence rather than sent alone
+MIN_SENTENCE_CHARS = 24
+# Placeholder RIFF / data sizes for a WAV whose total length is unknown while streaming
+STREAMING_SIZE = 0xFFFFFFFF
+
+def split_sentences(text: str, max_chars: int = 300) -> List[str]:
+    """Splits a reply into sentence-sized pieces for synthesis, none longer than max_chars."""
+    pieces: List[str] = []
+    carry = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        sentence = f"{carry} {sentence}" if carry else sentence
+        if len(sentence) < MIN_SENTENCE_CHARS:
+            carry = sentence
+            continue
+        carry = ""
+        while len(sentence) > max_chars:
+            # Break overlong sentences at the last clause/word boundary that fits
+            cut = max((m.start() for m in _SOFT_BREAK.finditer(sentence, 0, max_chars)), default=max_chars)
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+    if carry:
+        if pieces and len(pieces[-1]) + len(carry) < max_chars:
+            pieces[-1] = f"{pieces[-1]} {carry}"
+        else:
+            pieces.append(carry)
+    return pieces
+
+def split_wav(audio: bytes) -> Optional[Tuple[bytes, bytes]]:
+    """
+    Splits a RIFF/WAVE clip into (header up to and including the data chunk header, PCM data).
+    Returns None if the bytes are not a WAV file.
+    """
+    if len(audio) < 12 or audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return None
+    pos = 12
+    while pos + 8 <= len(audio):
+        chunk_id = audio[pos:pos + 4]
+        size = struct.unpack_from("<I", audio, pos + 4)[0]
+        if chunk_id == b"data":
+            end = min(len(audio), pos + 8 + size)
+            return audio[:pos + 8], audio[pos + 8:end]
+        pos += 8 + size + (size & 1) # Chunks are word aligned
+    return None
+
+def streaming_header(header: bytes) -> bytes:
+    """Rewrites a WAV header's RIFF and data sizes to the 'unknown length' placeholder."""
+    patched = bytearray(header)
+    struct.pack_into("<I", patched, 4, STREAMING_SIZE)
+    struct.pack_into("<I", patched, len(patched) - 4, STREAMING_SIZE)
+    return bytes(patched)
+
+async def synthesize_cached(text: str, voice: str) -> Optional[bytes]:
+    """One sentence through the on-disk speech cache, synthesizing and storing it on a miss."""
+    key = audio_cache.key(text, voice, TTS_MODEL)
+    path = await audio_cache.alookup(key)
+    if path:
+        try:
+            return await asyncio.to_thread(_read_file, path)
+        except FileNotFoundError:
+            pass # Evicted between lookup and read
+    audio = await nvidia_client.synthesize_speech(text=text, voice=voice)
+    if audio:
+        await audio_cache.astore(key, audio)
+    return audio
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+async def stream_speech(
+    text: str,
+    voice: str,
+    concurrency: Optional[int] = None,
+    max_chars: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Synthesizes a reply sentence by sentence, at most `concurrency` requests in flight, and
+    yields the audio in sentence order as soon as each next sentence is ready. WAV clips are
+    stitched into one stream: the first clip's header (with streaming sizes), then raw PCM.
+    Other formats (e.g. MP3 frames) are forwarded clip by clip. Sentences that fail to
+    synthesize are skipped.
+    """
+    sentences = split_sentences(text, max_chars or settings.tts_sentence_max_chars)
+    semaphore = asyncio.Semaphore(concurrency or settings.tts_stream_concurrency)
+
+    async def synthesize(sentence: str) -> Optional[bytes]:
+        async with semaphore:
+            return await synthesize_cached(sentence, voice)
+
+    # All tasks are created up front; the FIFO semaphore starts them in sentence order
+    tasks = [asyncio.create_task(synthesize(s)) for s in sentences]
+    wav_format: Optional[bytes] = None # fmt chunk of the first WAV clip
+    try:
+        for idx, task in enumerate(tasks):
+            audio = await task
+            if not audio:
+                print(f"TTS stream: sentence {idx} failed to synthesize, skipping")
+                continue
+            parts = split_wav(audio)
+            if parts is None:
+                yield audio
+                continue
+            header, pcm = parts
+            if wav_format is None:
+                wav_format = header[12:-8]
+                yield streaming_header(header)
+            elif header[12:-8] != wav_format:
+                print(f"TTS stream: sentence {idx} has a different WAV format, skipping")
+                continue
+            if pcm:
+                yield pcm
+    finally:
+        # Client went away (or we finished): don't keep synthesizing for nobody
+        for task in tasks:
+            task.cancel()
@@ -1,49 +1,375 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
 import httpx
-from typing import Dict, Any
 
-async def get_current_weather(lat: float, lon: float) -> Dict[str, Any]:
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,precipitation,weather_code"
-    
-    async with httpx.AsyncClient() as client:
+from app.config import settings
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Fallback safe weather
+FALLBACK_WEATHER = {
+    "temperature": 28.0,
+    "condition": "Clear (Fallback)",
+    "precipitation_mm": 0.0,
+    "is_raining": False,
+    "is_extreme_heat": False
+}
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    """Standard base-32 geohash; precision 5 is a ~4.9 x 4.9 km cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True # Bits alternate longitude, latitude
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+def geohash_center(geohash: str) -> Tuple[float, float]:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = _GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (bits >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+def classify_weather(temp: float, precip: float, wmo_code: int) -> Dict[str, Any]:
+    # WMO Code Mapping (Simplified)
+    condition = "Clear"
+    if wmo_code in [1, 2, 3]:
+        condition = "Partly Cloudy"
+    elif wmo_code in [45, 48]:
+        condition = "Foggy"
+    elif wmo_code in [51, 53, 55, 56, 57]:
+        condition = "Drizzle"
+    elif wmo_code in [61, 63, 65, 66, 67, 80, 81, 82]:
+        condition = "Rain"
+    elif wmo_code in [71, 73, 75, 77, 85, 86]:
+        condition = "Snow"
+    elif wmo_code >= 95:
+        condition = "Thunderstorm"
+
+    return {
+        "temperature": temp,
+        "condition": condition,
+        "precipitation_mm": precip,
+        "is_raining": "Rain" in condition or "Drizzle" in condition or precip > 0.5,
+        "is_extreme_heat": temp > 38.0
+    }
+
+def parse_current_weather(data: Dict[str, Any]) -> Dict[str, Any]:
+    current = data.get("current", {})
+    return classify_weather(
+        current.get("temperature_2m", 25.0),
+        current.get("precipitation", 0.0),
+        current.get("weather_code", 0)
+    )
+
+def parse_hourly_forecast(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Open-Meteo hourly block (requested with timeformat=unixtime) as
+    {"time": [unix hour starts], "hours": [one weather context per hour]}.
+    """
+    hourly = data.get("hourly", {})
+    times = hourly.get("time", [])
+    temps = hourly.get("temperature_2m", [])
+    precips = hourly.get("precipitation", [])
+    codes = hourly.get("weather_code", [])
+    hours = []
+    for i in range(len(times)):
+        # Open-Meteo pads missing model steps with null
+        temp = temps[i] if i < len(temps) and temps[i] is not None else 25.0
+        precip = precips[i] if i < len(precips) and precips[i] is not None else 0.0
+        code = codes[i] if i < len(codes) and codes[i] is not None else 0
+        hours.append(classify_weather(temp, precip, code))
+    return {"time": [int(t) for t in times], "hours": hours}
+
+def fallback_forecast(hours: int) -> Dict[str, Any]:
+    """FALLBACK_WEATHER for every hour starting with the current one."""
+    start = int(time.time()) // 3600 * 3600
+    return {
+        "time": [start + 3600 * i for i in range(hours)],
+        "hours": [dict(FALLBACK_WEATHER) for _ in range(hours)]
+    }
+
+class WeatherEntry:
+    __slots__ = ("weather", "fetched_at", "last_access", "failed_at")
+
+    def __init__(self):
+        self.weather: Optional[Dict[str, Any]] = None
+        self.fetched_at = 0.0
+        self.last_access = 0.0
+        self.failed_at = 0.0 # Last failed refresh, for backoff
+
+class WeatherCache:
+    """
+    Current weather per geohash bucket (every guest within a few km shares one upstream call),
+    with stale-while-revalidate: fresh entries (younger than ttl_seconds) are served as is,
+    stale ones (up to max_stale_seconds) are served immediately while a background task
+    refreshes them, and only cold or expired buckets wait for Open-Meteo. Buckets requested
+    within hot_window_seconds are refreshed proactively before they go stale.
+    """
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_stale_seconds: float,
+        precision: int,
+        hot_window_seconds: float,
+        max_buckets: int,
+        failure_backoff_seconds: float
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.precision = precision
+        self.hot_window_seconds = hot_window_seconds
+        self.max_buckets = max_buckets
+        self.failure_backoff_seconds = failure_backoff_seconds
+        self._entries: "OrderedDict[str, WeatherEntry]" = OrderedDict() # least recently used first
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._refresher: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.proactive_refreshes = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=settings.weather_upstream_timeout)
+        return self._client
+
+    async def startup(self):
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_hot_buckets())
+
+    async def shutdown(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+        for task in list(self._background):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def bucket(self, lat: float, lon: float) -> str:
+        return geohash_encode(lat, lon, self.precision)
+
+    def _params(self, lat: float, lon: float) -> Dict[str, Any]:
+        return {
+            "latitude": round(lat, 4),
+            "longitude": round(lon, 4),
+            "current": "temperature_2m,precipitation,weather_code"
+        }
+
+    def _parse(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return parse_current_weather(data)
+
+    def _fallback(self) -> Dict[str, Any]:
+        return FALLBACK_WEATHER
+
+    async def _fetch(self, bucket: str) -> Dict[str, Any]:
+        """One upstream call for the bucket centre; updates the entry, raises on failure."""
+        params = self._params(*geohash_center(bucket))
+        entry = self._entries.get(bucket)
+        self.upstream_calls += 1
         try:
-            response = await client.get(url, timeout=5.0)
+            response = await self.client.get(OPEN_METEO_URL, params=params)
             response.raise_for_status()
-            data = response.json()
-            
-            current = data.get("current", {})
-            temp = current.get("temperature_2m", 25.0)
-            precip = current.get("precipitation", 0.0)
-            wmo_code = current.get("weather_code", 0)
-            
-            # WMO Code Mapping (Simplified)
-            condition = "Clear"
-            if wmo_code in [1, 2, 3]:
-                condition = "Partly Cloudy"
-            elif wmo_code in [45, 48]:
-                condition = "Foggy"
-            elif wmo_code in [51, 53, 55, 56, 57]:
-                condition = "Drizzle"
-            elif wmo_code in [61, 63, 65, 66, 67, 80, 81, 82]:
-                condition = "Rain"
-            elif wmo_code in [71, 73, 75, 77, 85, 86]:
-                condition = "Snow"
-            elif wmo_code >= 95:
-                condition = "Thunderstorm"
-                
-            return {
-                "temperature": temp,
-                "condition": condition,
-                "precipitation_mm": precip,
-                "is_raining": "Rain" in condition or "Drizzle" in condition or precip > 0.5,
-                "is_extreme_heat": temp > 38.0
-            }
-        except Exception as e:
-            print(f"Weather API Error: {e}")
-            # Fallback safe weather
-            return {
-                "temperature": 28.0,
-                "condition": "Clear (Fallback)",
-                "precipitation_mm": 0.0,
-                "is_raining": False,
-                "is_extreme_heat": False
-            }
+            weather = self._parse(response.json())
+        except Exception:
+            self.upstream_errors += 1
+            if entry is not None:
+                entry.failed_at = time.monotonic()
+            raise
+        if entry is not None:
+            entry.weather = weather
+            entry.fetched_at = time.monotonic()
+            entry.failed_at = 0.0
+        return weather
+
+    def _refresh(self, bucket: str) -> asyncio.Task:
+        """Single-flight refresh: concurrent callers share the in-progress task."""
+        task = self._inflight.get(bucket)
+        if task is None:
+            task = asyncio.create_task(self._fetch(bucket))
+            self._inflight[bucket] = task
+            task.add_done_callback(lambda t: self._refresh_done(bucket, t))
+        return task
+
+    def _refresh_done(self, bucket: str, task: asyncio.Task):
+        if self._inflight.get(bucket) is task:
+            del self._inflight[bucket]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Weather API Error: {task.exception()}")
+
+    def _entry(self, bucket: str) -> WeatherEntry:
+        entry = self._entries.get(bucket)
+        if entry is None:
+            entry = WeatherEntry()
+            self._entries[bucket] = entry
+            while len(self._entries) > self.max_buckets:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(bucket)
+        return entry
+
+    @staticmethod
+    def _response(weather: Dict[str, Any], age: Optional[float], stale: bool, source: str) -> Dict[str, Any]:
+        return {
+            **weather,
+            "cache_age_seconds": round(age, 1) if age is not None else None,
+            "stale": stale,
+            "source": source, # "live" (fetched for this request), "cache" or "fallback"
+        }
+
+    async def get(self, lat: float, lon: float) -> Dict[str, Any]:
+        return await self.get_bucket(self.bucket(lat, lon))
+
+    async def get_bucket(self, bucket: str) -> Dict[str, Any]:
+        entry = self._entry(bucket)
+        now = time.monotonic()
+        entry.last_access = now
+
+        if entry.weather is not None:
+            age = now - entry.fetched_at
+            if age < self.ttl_seconds:
+                self.hits += 1
+                return self._response(entry.weather, age, False, "cache")
+            if age < self.max_stale_seconds:
+                # Serve stale now, revalidate in the background
+                self.stale_hits += 1
+                if now - entry.failed_at >= self.failure_backoff_seconds:
+                    self._refresh(bucket)
+                return self._response(entry.weather, age, True, "cache")
+
+        self.misses += 1
+        if now - entry.failed_at < self.failure_backoff_seconds:
+            # Upstream just failed for this bucket: don't make every request wait for it again
+            return self._stale_or_fallback(entry, now)
+        try:
+            # Shielded so a disconnecting client doesn't cancel the fetch for everyone else
+            weather = await asyncio.shield(self._refresh(bucket))
+            return self._response(weather, 0.0, False, "live")
+        except Exception:
+            return self._stale_or_fallback(entry, time.monotonic())
+
+    def _stale_or_fallback(self, entry: WeatherEntry, now: float) -> Dict[str, Any]:
+        if entry.weather is not None:
+            return self._response(entry.weather, now - entry.fetched_at, True, "cache")
+        return self._response(self._fallback(), None, True, "fallback")
+
+    async def _refresh_hot_buckets(self):
+        """Background loop: refreshes recently requested buckets shortly before they go stale."""
+        interval = max(1.0, self.ttl_seconds / 5)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for bucket, entry in list(self._entries.items()):
+                if now - entry.last_access > self.hot_window_seconds:
+                    continue
+                if entry.weather is not None and now - entry.fetched_at < self.ttl_seconds - interval:
+                    continue
+                if now - entry.failed_at < self.failure_backoff_seconds or bucket in self._inflight:
+                    continue
+                self.proactive_refreshes += 1
+                task = self._refresh(bucket)
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        now = time.monotonic()
+        return {
+            "buckets": len(self._entries),
+            "hot_buckets": sum(1 for e in self._entries.values() if now - e.last_access <= self.hot_window_seconds),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "upstream_calls": self.upstream_calls,
+            "upstream_errors": self.upstream_errors,
+            "proactive_refreshes": self.proactive_refreshes,
+        }
+
+class ForecastCache(WeatherCache):
+    """
+    Hourly forecast for the next `hours` hours per geohash bucket, with the same bucketing,
+    stale-while-revalidate and hot-bucket refresh as the current-weather cache.
+    """
+    def __init__(self, hours: int, **kwargs):
+        super().__init__(**kwargs)
+        self.hours = hours
+        self._fallback_forecast: Optional[Dict[str, Any]] = None
+
+    def _params(self, lat: float, lon: float) -> Dict[str, Any]:
+        return {
+            "latitude": round(lat, 4),
+            "longitude": round(lon, 4),
+            "hourly": "temperature_2m,precipitation,weather_code",
+            "forecast_hours": self.hours,
+            "timeformat": "unixtime"
+        }
+
+    def _parse(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return parse_hourly_forecast(data)
+
+    def _fallback(self) -> Dict[str, Any]:
+        # Rebuilt once per hour so callers can tell (by identity) that nothing changed
+        start = int(time.time()) // 3600 * 3600
+        if self._fallback_forecast is None or self._fallback_forecast["time"][0] != start:
+            self._fallback_forecast = fallback_forecast(self.hours)
+        return self._fallback_forecast
+
+# Singleton instances
+weather_cache = WeatherCache(
+    ttl_seconds=settings.weather_cache_ttl_seconds,
+    max_stale_seconds=settings.weather_cache_max_stale_seconds,
+    precision=settings.weather_geohash_precision,
+    hot_window_seconds=settings.weather_hot_window_seconds,
+    max_buckets=settings.weather_cache_max_buckets,
+    failure_backoff_seconds=settings.weather_failure_backoff_seconds
+)
+forecast_cache = ForecastCache(
+    hours=settings.weather_forecast_hours,
+    ttl_seconds=settings.weather_forecast_ttl_seconds,
+    max_stale_seconds=settings.weather_forecast_max_stale_seconds,
+    precision=settings.weather_geohash_precision,
+    hot_window_seconds=settings.weather_hot_window_seconds,
+    max_buckets=settings.weather_cache_max_buckets,
+    failure_backoff_seconds=settings.weather_failure_backoff_seconds
+)
+
+async def get_current_weather(lat: float, lon: float) -> Dict[str, Any]:
+    return await weather_cache.get(lat, lon)
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.weather_client import forecast_cache
+from app.services.zone_scoring import COLORS, ZoneSet, score_zones, weather_flags, zone_store
+
+class ZoneForecastGrid:
+    """
+    Scores of one hotel's zones under every forecast hour of one weather bucket, stored
+    zone-major: every (Z, H) matrix row is one zone's hourly series, ready to slice.
+    """
+    __slots__ = (
+        "zones", "zones_version", "forecast", "times", "labels", "hours", "crowd", "weather", "overall", "colors",
+        "fetched_at", "stale", "source", "last_access"
+    )
+
+    def __init__(self, zones: ZoneSet, forecast: Dict[str, Any]):
+        self.zones = zones
+        self.zones_version = zones.version
+        self.forecast = forecast["hours"] # Identity tells the refresher whether the forecast changed
+        self.times = np.asarray(forecast["time"], dtype=np.int64)
+        self.labels = [datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%dT%H:%MZ") for t in forecast["time"]]
+        self.hours = forecast["hours"]
+
+        raining, heat = weather_flags(forecast["hours"])
+        scores = score_zones(zones, raining, heat) # (H, Z)
+        self.crowd = np.ascontiguousarray(scores["crowdScore"].T)
+        self.weather = np.ascontiguousarray(scores["weatherScore"].T)
+        self.overall = np.ascontiguousarray(scores["overallScore"].T)
+        self.colors = COLORS[scores["color"].T]
+
+        age = forecast.get("cache_age_seconds")
+        self.fetched_at = time.monotonic() - age if age is not None else None
+        self.stale = forecast.get("stale", False)
+        self.source = forecast.get("source")
+        self.last_access = time.monotonic()
+
+    def slice(self, start_hour: int, hours: int, zone_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        `hours` hours starting `start_hour` hours from now (the current hour is 0). A forecast
+        fetched a while ago ends sooner: the window is cut at its last hour (`hours_available`).
+        """
+        now_hour = int(time.time()) // 3600 * 3600
+        first = min(int(np.searchsorted(self.times, now_hour)) + start_hour, len(self.times))
+        cols = slice(first, min(first + hours, len(self.times)))
+        rows = slice(None) if zone_id is None else [i for i, z in enumerate(self.zones.ids) if z == zone_id]
+        series = zip(
+            self.zones.ids if zone_id is None else [self.zones.ids[i] for i in rows],
+            self.zones.names if zone_id is None else [self.zones.names[i] for i in rows],
+            self.zones.safety[rows].tolist(),
+            self.zones.price[rows].tolist(),
+            self.zones.review[rows].tolist(),
+            self.crowd[rows, cols].tolist(),
+            self.weather[rows, cols].tolist(),
+            self.overall[rows, cols].tolist(),
+            self.colors[rows, cols].tolist(),
+        )
+        return {
+            "hours": self.labels[cols],
+            "hours_available": cols.stop - cols.start,
+            "weather": self.hours[cols],
+            "forecast_age_seconds": round(time.monotonic() - self.fetched_at, 1) if self.fetched_at is not None else None,
+            "stale": self.stale,
+            "source": self.source,
+            "zones": [
+                {
+                    "id": zone_id,
+                    "name": name,
+                    "safetyScore": safety,
+                    "priceScore": price,
+                    "reviewScore": review,
+                    "crowdScore": crowd,
+                    "weatherScore": weather,
+                    "overallScore": overall,
+                    "color": color,
+                }
+                for zone_id, name, safety, price, review, crowd, weather, overall, color in series
+            ],
+        }
+
+class ZoneForecastService:
+    """
+    Keeps a precomputed ZoneForecastGrid per (hotel, weather bucket). Requests only build a grid
+    the first time a pair is seen; after that a background loop swaps in rebuilt grids whenever
+    the bucket's forecast or the hotel's zones change, so serving is a slice of ready arrays.
+    Grids nobody requested within the hot window are dropped.
+    """
+    def __init__(self, refresh_seconds: float, max_grids: int, hot_window_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.max_grids = max_grids
+        self.hot_window_seconds = hot_window_seconds
+        self._grids: "OrderedDict[Tuple[Optional[str], str], ZoneForecastGrid]" = OrderedDict()
+        self._refresher: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+
+    async def startup(self):
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def shutdown(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    async def get(self, db: AsyncSession, hotel_id: Optional[str], lat: float, lon: float) -> ZoneForecastGrid:
+        key = (hotel_id or None, forecast_cache.bucket(lat, lon))
+        grid = self._grids.get(key)
+        if grid is not None:
+            self.hits += 1
+            self._grids.move_to_end(key)
+        else:
+            self.misses += 1
+            forecast = await forecast_cache.get_bucket(key[1])
+            grid = ZoneForecastGrid(await zone_store.get(db, key[0]), forecast)
+            self._grids[key] = grid
+            while len(self._grids) > self.max_grids:
+                self._grids.popitem(last=False)
+        grid.last_access = time.monotonic()
+        return grid
+
+    async def refresh(self):
+        """Rebuilds the grids whose forecast or zones changed since they were built."""
+        now = time.monotonic()
+        for key, grid in list(self._grids.items()):
+            if now - grid.last_access > self.hot_window_seconds:
+                del self._grids[key]
+        if not self._grids:
+            return
+
+        async with AsyncSessionLocal() as db:
+            zone_sets = await zone_store.get_many(db, list({hotel_id for hotel_id, _ in self._grids}))
+        buckets = list({bucket for _, bucket in self._grids})
+        forecasts = dict(zip(buckets, await asyncio.gather(*(forecast_cache.get_bucket(b) for b in buckets))))
+
+        for key, grid in list(self._grids.items()):
+            zone_set = zone_sets[key[0]]
+            forecast = forecasts[key[1]]
+            if grid.zones_version == zone_set.version and grid.forecast is forecast["hours"]:
+                continue
+            rebuilt = ZoneForecastGrid(zone_set, forecast)
+            rebuilt.last_access = grid.last_access
+            if key in self._grids: # Not evicted while the forecasts were awaited
+                self._grids[key] = rebuilt
+                self.rebuilds += 1
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Zone forecast refresh error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "grids": len(self._grids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rebuilds": self.rebuilds,
+        }
+
+# Singleton instance
+zone_forecast = ZoneForecastService(
+    refresh_seconds=settings.zone_forecast_refresh_seconds,
+    max_grids=settings.zone_forecast_max_grids,
+    hot_window_seconds=settings.weather_hot_window_seconds
+)
@@ -0,0 +1,177 @@
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Zone
+
+# Default areas scored when a hotel has no zones of its own in the database
+BASE_ZONES = [
+    {"name": "Old Town", "safety": 85, "crowd": 60, "price": 50, "review": 90},
+    {"name": "Beach District", "safety": 90, "crowd": 70, "price": 65, "review": 85},
+    {"name": "Night Market", "safety": 55, "crowd": 85, "price": 40, "review": 75},
+    {"name": "Industrial Quarter", "safety": 30, "crowd": 20, "price": 80, "review": 25},
+    {"name": "Temple District", "safety": 95, "crowd": 45, "price": 55, "review": 95},
+    {"name": "Harbor Area", "safety": 60, "crowd": 50, "price": 45, "review": 60},
+]
+COLORS = np.array(["red", "yellow", "green"])
+
+class ZoneSet:
+    """The zones of one hotel as parallel NumPy columns (one entry per zone)."""
+    __slots__ = ("hotel_id", "ids", "names", "safety", "crowd", "price", "review", "loaded_at", "version")
+
+    def __init__(self, hotel_id: Optional[str], ids: List[str], names: List[str], safety, crowd, price, review):
+        self.hotel_id = hotel_id
+        self.ids = ids
+        self.names = names
+        self.safety = np.asarray(safety, dtype=np.int64)
+        self.crowd = np.asarray(crowd, dtype=np.int64)
+        self.price = np.asarray(price, dtype=np.int64)
+        self.review = np.asarray(review, dtype=np.int64)
+        self.loaded_at = time.monotonic()
+        # Content hash: equal for reloads of unchanged rows, so precomputed scores can be kept
+        digest = hashlib.sha1("\x1f".join(self.ids + self.names).encode("utf-8"))
+        for column in (self.safety, self.crowd, self.price, self.review):
+            digest.update(column.tobytes())
+        self.version = digest.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def for_hotel(self, hotel_id: str) -> "ZoneSet":
+        """Same zones (arrays shared, not copied) registered under another hotel."""
+        return ZoneSet(hotel_id, self.ids, self.names, self.safety, self.crowd, self.price, self.review)
+
+    @classmethod
+    def from_rows(cls, hotel_id: str, rows: Sequence[Zone]) -> "ZoneSet":
+        return cls(
+            hotel_id,
+            [str(z.id) for z in rows],
+            [z.area_name for z in rows],
+            [z.safety_score if z.safety_score is not None else 100 for z in rows],
+            [z.crowd_score if z.crowd_score is not None else 50 for z in rows],
+            [z.price_score if z.price_score is not None else 50 for z in rows],
+            [z.review_score if z.review_score is not None else 50 for z in rows],
+        )
+
+DEFAULT_ZONES = ZoneSet(
+    None,
+    [f"base-{i}" for i in range(len(BASE_ZONES))],
+    [z["name"] for z in BASE_ZONES],
+    [z["safety"] for z in BASE_ZONES],
+    [z["crowd"] for z in BASE_ZONES],
+    [z["price"] for z in BASE_ZONES],
+    [z["review"] for z in BASE_ZONES],
+)
+
+def weather_flags(weather_contexts: Sequence[Dict[str, Any]]):
+    """(is_raining, is_extreme_heat) boolean vectors, one entry per weather context."""
+    raining = np.fromiter((bool(w["is_raining"]) for w in weather_contexts), dtype=bool, count=len(weather_contexts))
+    heat = np.fromiter((bool(w["is_extreme_heat"]) for w in weather_contexts), dtype=bool, count=len(weather_contexts))
+    return raining, heat
+
+def score_zones(zones: ZoneSet, raining: np.ndarray, heat: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Scores every zone under every weather context in one vectorized pass.
+    raining / heat have shape (W,); every returned array has shape (W, Z).
+    """
+    raining = raining[:, None]
+    heat = heat[:, None]
+    shape = (len(raining), len(zones))
+
+    # 1. Weather Score Modifier
+    weather = np.clip(100 - 30 * raining - 40 * heat, 0, 100)
+
+    # 2. Crowd Modifier (if raining or extreme heat, crowds drop)
+    crowd = np.where(raining | heat, np.maximum(10, (zones.crowd * 0.5).astype(np.int64)), zones.crowd)
+
+    # 3. Overall Score Calculation (Weights: Safety 40%, Weather 20%, Review 20%, Price 10%, Crowd (inversely) 10%)
+    overall = ((zones.safety * 0.4) + (weather * 0.2) + (zones.review * 0.2) + (zones.price * 0.1) + ((100 - crowd) * 0.1))
+    overall = overall.astype(np.int64) # Truncates like int()
+
+    # 4. Color Classification: <40 red, <70 yellow, else green
+    color = (overall >= 40).astype(np.int8) + (overall >= 70)
+
+    return {
+        "safetyScore": np.broadcast_to(zones.safety, shape),
+        "crowdScore": np.broadcast_to(crowd, shape),
+        "weatherScore": np.broadcast_to(weather, shape),
+        "priceScore": np.broadcast_to(zones.price, shape),
+        "reviewScore": np.broadcast_to(zones.review, shape),
+        "overallScore": overall,
+        "color": color,
+    }
+
+def zone_rows(zones: ZoneSet, scores: Dict[str, np.ndarray], context: int) -> List[Dict[str, Any]]:
+    """The response dicts of one weather context (row `context` of the score matrices)."""
+    columns = zip(
+        zones.ids,
+        zones.names,
+        scores["safetyScore"][context].tolist(),
+        scores["crowdScore"][context].tolist(),
+        scores["weatherScore"][context].tolist(),
+        scores["priceScore"][context].tolist(),
+        scores["reviewScore"][context].tolist(),
+        COLORS[scores["color"][context]].tolist(),
+        scores["overallScore"][context].tolist(),
+    )
+    return [
+        {
+            "id": zone_id,
+            "name": name,
+            "safetyScore": safety,
+            "crowdScore": crowd,
+            "weatherScore": weather,
+            "priceScore": price,
+            "reviewScore": review,
+            "color": color,
+            "overallScore": overall,
+        }
+        for zone_id, name, safety, crowd, weather, price, review, color, overall in columns
+    ]
+
+class ZoneStore:
+    """Per-hotel ZoneSets loaded from the Zone table, reloaded after `ttl_seconds`."""
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._sets: Dict[str, ZoneSet] = {}
+
+    async def get(self, db: AsyncSession, hotel_id: Optional[str]) -> ZoneSet:
+        if not hotel_id:
+            return DEFAULT_ZONES
+        zone_set = self._sets.get(hotel_id)
+        if zone_set is None or time.monotonic() - zone_set.loaded_at > self.ttl_seconds:
+            result = await db.execute(select(Zone).where(Zone.hotel_id == hotel_id).order_by(Zone.id))
+            rows = result.scalars().all()
+            zone_set = ZoneSet.from_rows(hotel_id, rows) if rows else DEFAULT_ZONES.for_hotel(hotel_id)
+            self._sets[hotel_id] = zone_set
+        return zone_set
+
+    async def get_many(self, db: AsyncSession, hotel_ids: Sequence[str]) -> Dict[str, ZoneSet]:
+        """Loads every stale or missing hotel in one query."""
+        now = time.monotonic()
+        to_load = {
+            h for h in hotel_ids
+            if h and (h not in self._sets or now - self._sets[h].loaded_at > self.ttl_seconds)
+        }
+        if to_load:
+            grouped: Dict[str, List[Zone]] = {h: [] for h in to_load}
+            result = await db.execute(select(Zone).where(Zone.hotel_id.in_(to_load)).order_by(Zone.id))
+            for zone in result.scalars():
+                grouped[zone.hotel_id].append(zone)
+            for hotel_id, rows in grouped.items():
+                self._sets[hotel_id] = ZoneSet.from_rows(hotel_id, rows) if rows else DEFAULT_ZONES.for_hotel(hotel_id)
+        return {h: (self._sets[h] if h else DEFAULT_ZONES) for h in hotel_ids}
+
+    def invalidate(self, hotel_id: Optional[str] = None):
+        if hotel_id is None:
+            self._sets.clear()
+        else:
+            self._sets.pop(hotel_id, None)
+
+# Singleton instance
+zone_store = ZoneStore(ttl_seconds=settings.zone_cache_ttl_seconds)
@@ -0,0 +1,138 @@
+"""
+Benchmark: /chat/message throughput with the previous synchronous Session (queries run on the
+event loop) vs. the async engine, under concurrent load with a slow upstream.
+
+The database is a temporary SQLite file whose connections sleep DB_LATENCY_S on every statement,
+standing in for a Postgres round trip; the NVIDIA API is a local stub that answers after
+UPSTREAM_LATENCY_S. The sync variant sleeps on the event loop thread (as a blocking driver
+does), the async one in the driver's worker thread.
+
+Run from backend/:  python -m benchmarks.bench_async_db
+"""
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import models
+from app.database import get_db
+from app.routers import chat
+from app.routers.chat import ChatRequest, booking_context_for
+from app.services.nvidia_client import nvidia_client
+
+REQUESTS = 400
+CONCURRENCY = 100
+DB_LATENCY_S = 0.010
+UPSTREAM_LATENCY_S = 0.250
+
+class SlowCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):
+        time.sleep(DB_LATENCY_S)
+        return super().execute(*args, **kwargs)
+
+class SlowConnection(sqlite3.Connection):
+    def cursor(self, factory=SlowCursor):
+        return super().cursor(factory)
+
+async def slow_upstream(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(UPSTREAM_LATENCY_S)
+    return httpx.Response(200, json={"choices": [{"message": {"content": "Happy to help with your stay!"}}]})
+
+def legacy_app(path: str) -> FastAPI:
+    """send_message as it was: a sync Session queried from inside the async endpoint."""
+    # Pool as large as the concurrency: a sync checkout waiting for a free connection would block the loop
+    engine = create_engine(
+        f"sqlite:///{path}", pool_size=CONCURRENCY, max_overflow=0,
+        connect_args={"factory": SlowConnection, "check_same_thread": False}
+    )
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_sync_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+
+    @app.post("/api/v1/chat/message")
+    async def send_message(request: ChatRequest, db: Session = Depends(get_sync_db)):
+        two_hours_ago = datetime.utcnow() - timedelta(hours=2)
+        active_booking = db.query(models.BookingState).filter(
+            models.BookingState.hotel_id == request.hotel_id,
+            models.BookingState.current_step != "completed",
+            models.BookingState.updated_at >= two_hours_ago
+        ).first()
+        response_text = await nvidia_client.generate_response(
+            messages=[{"role": m.role, "content": m.content} for m in request.messages],
+            booking_context=booking_context_for(active_booking),
+            user_location=request.user_location
+        )
+        return {"response": response_text}
+
+    return app
+
+def async_app(path: str) -> FastAPI:
+    """The real chat router, with get_db pointed at the slow SQLite file."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", pool_size=CONCURRENCY, max_overflow=0,
+        connect_args={"factory": SlowConnection}
+    )
+    AsyncSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = get_async_db
+    return app
+
+async def measure(label: str, app: FastAPI):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    body = {"hotel_id": "H-100", "messages": [{"role": "user", "content": "Any good cafes nearby?"}]}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/v1/chat/message", json=body)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(REQUESTS)))
+        elapsed = time.perf_counter() - started
+
+    q = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<18} | {REQUESTS / elapsed:>6.1f} req/s | p50 {q[49] * 1e3:>7.1f} ms"
+        f" | p99 {q[98] * 1e3:>7.1f} ms"
+    )
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    models.Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+    nvidia_client._client = httpx.AsyncClient(base_url=nvidia_client.base_url, transport=httpx.MockTransport(slow_upstream))
+
+    print(
+        f"{REQUESTS} requests, {CONCURRENCY} concurrent, {DB_LATENCY_S * 1e3:.0f} ms per statement,"
+        f" {UPSTREAM_LATENCY_S * 1e3:.0f} ms upstream"
+    )
+    await measure("sync Session", legacy_app(path))
+    await measure("async engine", async_app(path))
+
+if __name__ == "__main__":
+    asyncio.run(main())
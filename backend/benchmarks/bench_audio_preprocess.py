@@ -0,0 +1,74 @@
+"""
+Benchmark: STT upload size and latency with and without normalizing browser audio first.
+
+Browser recordings are typically 48 kHz stereo; the ASR model only consumes 16 kHz mono.
+The upstream is a local stub whose latency is a fixed overhead plus upload time (bytes over a
+fixed bandwidth) plus processing time proportional to the audio duration.
+
+Run from backend/:  python -m benchmarks.bench_audio_preprocess
+"""
+import asyncio
+import base64
+import io
+import json
+import time
+import wave
+
+import httpx
+import numpy as np
+
+from app.services.audio_preprocess import WavFormat, audio_preprocessor, to_wav
+from app.services.nvidia_client import nvidia_client
+
+SOURCE_RATE = 48000
+BASE_LATENCY_S = 0.100
+UPLOAD_BYTES_PER_S = 2_000_000 # ~16 Mbit/s uplink to the API
+REALTIME_FACTOR = 0.02
+
+def browser_recording(seconds: float, lead_s: float = 1.5, tail_s: float = 2.0, seed: int = 5) -> bytes:
+    """48 kHz stereo 16-bit: room-noise lead-in, speech-like tones, room-noise tail."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SOURCE_RATE * seconds)) / SOURCE_RATE
+    speech = 0.2 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    noise = lambda s: 0.001 * rng.standard_normal(int(SOURCE_RATE * s))
+    mono = np.concatenate([noise(lead_s), speech + 0.002 * rng.standard_normal(len(t)), noise(tail_s)])
+    stereo = np.stack([mono, 0.9 * mono], axis=1)
+    return to_wav((stereo * 32767).astype("<i2").tobytes(), WavFormat(2, 2, SOURCE_RATE))
+
+async def stub_stt(request: httpx.Request) -> httpx.Response:
+    audio = base64.b64decode(json.loads(request.content)["audio"])
+    with wave.open(io.BytesIO(audio)) as w:
+        duration = w.getnframes() / w.getframerate()
+    await asyncio.sleep(BASE_LATENCY_S + len(request.content) / UPLOAD_BYTES_PER_S + REALTIME_FACTOR * duration)
+    return httpx.Response(200, json={"text": "ok"})
+
+async def main():
+    nvidia_client._client = httpx.AsyncClient(base_url=nvidia_client.base_url, transport=httpx.MockTransport(stub_stt))
+    try:
+        for seconds in (5, 20, 60):
+            wav = browser_recording(seconds)
+            with wave.open(io.BytesIO(wav)) as w:
+                fmt = WavFormat(w.getnchannels(), w.getsampwidth(), w.getframerate())
+                pcm = w.readframes(w.getnframes())
+
+            started = time.perf_counter()
+            await nvidia_client.transcribe_audio(audio_bytes=wav)
+            t_raw = time.perf_counter() - started
+
+            started = time.perf_counter()
+            normalized = await audio_preprocessor.anormalize_pcm(pcm, fmt)
+            t_prep = time.perf_counter() - started
+            await nvidia_client.transcribe_audio(audio_bytes=normalized)
+            t_norm = time.perf_counter() - started
+
+            print(
+                f"{seconds:>3} s speech | upload {len(wav) / 1e6:>6.2f} MB -> {len(normalized) / 1e6:>5.2f} MB"
+                f" (x{len(wav) / len(normalized):.1f}) | STT {t_raw * 1e3:>7.1f} ms -> {t_norm * 1e3:>7.1f} ms"
+                f" (normalize {t_prep * 1e3:.1f} ms)"
+            )
+        print(audio_preprocessor.stats())
+    finally:
+        await nvidia_client.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
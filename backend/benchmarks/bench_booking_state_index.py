@@ -0,0 +1,171 @@
+"""
+Benchmark: the two booking_state hot-path lookups on a table with millions of rows, with only
+the old single-column hotel_id index, with ix_booking_state_active (the partial index from
+migration d41c7a9e52b8), and after the retention job archived the finished states.
+Prints the query plan (EXPLAIN) and the median latency of each lookup at every stage.
+
+Uses a temporary SQLite file unless a database URL is given (the tables are dropped and
+recreated there, so never point it at a real database):
+
+Run from backend/:  python -m benchmarks.bench_booking_state_index [rows] [database_url]
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import async_database_url
+from app.models import Base, BookingState, BookingStateArchive, BOOKING_STATE_OPEN
+from app.services.booking_retention import BookingStateRetention
+
+HOTELS = 500
+OPEN_SHARE = 0.02 # Rows not completed yet
+CHUNK = 50_000
+REPEAT = 50
+BIG_HOTEL = "H-000" # About a quarter of all rows, with one guest mid-booking
+QUIET_HOTEL = "H-001" # Another quarter, nobody mid-booking: the lookups find nothing
+
+def chat_lookup(hotel_id: str, now: datetime):
+    """get_active_booking in app/routers/chat.py."""
+    return select(BookingState).where(
+        BookingState.hotel_id == hotel_id,
+        BOOKING_STATE_OPEN,
+        BookingState.updated_at >= now - timedelta(hours=2)
+    ).limit(1)
+
+def confirm_lookup(hotel_id: str, now: datetime):
+    """confirm_booking in app/routers/booking.py."""
+    return select(BookingState).where(
+        BookingState.hotel_id == hotel_id,
+        BOOKING_STATE_OPEN,
+        BookingState.current_step == "ready"
+    ).limit(1)
+
+def legacy_chat_lookup(hotel_id: str, now: datetime):
+    """The previous filter: current_step != 'completed' as a bind parameter."""
+    return select(BookingState).where(
+        BookingState.hotel_id == hotel_id,
+        BookingState.current_step != "completed",
+        BookingState.updated_at >= now - timedelta(hours=2)
+    ).limit(1)
+
+def legacy_confirm_lookup(hotel_id: str, now: datetime):
+    return select(BookingState).where(
+        BookingState.hotel_id == hotel_id,
+        BookingState.current_step == "ready"
+    ).limit(1)
+
+def lookups(chat, confirm):
+    return [
+        ("chat, guest mid-booking", chat, BIG_HOTEL),
+        ("chat, nothing open", chat, QUIET_HOTEL),
+        ("confirm, ready state", confirm, BIG_HOTEL),
+        ("confirm, nothing ready", confirm, QUIET_HOTEL),
+    ]
+
+def populate(engine, rows: int, now: datetime):
+    rng = random.Random(7)
+    hotels = [f"H-{i:03d}" for i in range(HOTELS)]
+    weights = [HOTELS / 4, HOTELS / 4] + [1.0] * (HOTELS - 2) # BIG_HOTEL, QUIET_HOTEL ~ 25% each
+    steps = ["gathering_info", "ready"]
+    table = BookingState.__table__
+    with engine.begin() as conn:
+        for start in range(0, rows, CHUNK):
+            batch = []
+            for hotel_id in rng.choices(hotels, weights, k=min(CHUNK, rows - start)):
+                if hotel_id != QUIET_HOTEL and rng.random() < OPEN_SHARE:
+                    step = rng.choice(steps)
+                    updated = now - timedelta(hours=rng.uniform(0, 24 * 14))
+                else:
+                    step = "completed"
+                    updated = now - timedelta(days=rng.uniform(0, 365))
+                batch.append({
+                    "hotel_id": hotel_id, "service_type": "taxi", "current_step": step,
+                    "temp_data_json": {"type": "taxi", "status": step}, "created_at": updated, "updated_at": updated
+                })
+            conn.execute(table.insert(), batch)
+        # The guest whose turn we look up has an open, recent state
+        conn.execute(table.insert(), [{
+            "hotel_id": BIG_HOTEL, "service_type": "taxi", "current_step": "ready",
+            "temp_data_json": {}, "created_at": now - timedelta(minutes=5), "updated_at": now - timedelta(minutes=5)
+        }])
+
+def explain(conn, statement) -> str:
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        lines = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}").scalars().all()
+    else:
+        lines = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    return "\n".join(f"    {line}" for line in lines)
+
+def measure(engine, label: str, lookups):
+    print(f"\n== {label}")
+    with engine.connect() as conn:
+        count = conn.execute(select(func.count()).select_from(BookingState)).scalar()
+        print(f"   booking_state rows: {count:,}")
+        for name, build, hotel_id in lookups:
+            statement = build(hotel_id, datetime.now(timezone.utc))
+            conn.execute(statement).first() # Warm the page cache
+            timings = []
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                conn.execute(statement).first()
+                timings.append(time.perf_counter() - started)
+            print(f"   {name:<28} median {statistics.median(timings) * 1e3:>8.3f} ms | max {max(timings) * 1e3:>8.3f} ms")
+            print(explain(conn, statement))
+
+async def archive(url: str) -> int:
+    engine = create_async_engine(async_database_url(url))
+    retention = BookingStateRetention(interval_seconds=0, completed_days=1, abandoned_days=7, batch_size=5000)
+    try:
+        async with AsyncSession(engine) as db:
+            return await retention.run(db)
+    finally:
+        await engine.dispose()
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    url = sys.argv[2] if len(sys.argv) > 2 else f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')}"
+    engine = create_engine(url)
+    now = datetime.now(timezone.utc)
+
+    tables = [BookingState.__table__, BookingStateArchive.__table__]
+    Base.metadata.drop_all(engine, tables=tables)
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_booking_state_active"))
+
+    started = time.perf_counter()
+    populate(engine, rows, now)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    print(
+        f"Populated {rows:,} rows in {time.perf_counter() - started:.1f} s"
+        f" ({HOTELS} hotels, {BIG_HOTEL} and {QUIET_HOTEL} ~25% each, {OPEN_SHARE:.0%} open)"
+    )
+
+    measure(engine, "before: ix_booking_state_hotel_id only, previous queries", lookups(legacy_chat_lookup, legacy_confirm_lookup))
+
+    started = time.perf_counter()
+    next(i for i in BookingState.__table__.indexes if i.name == "ix_booking_state_active").create(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"\nCreated ix_booking_state_active in {time.perf_counter() - started:.1f} s")
+    measure(engine, "after: partial index on open states", lookups(chat_lookup, confirm_lookup))
+
+    started = time.perf_counter()
+    archived = asyncio.run(archive(url))
+    print(f"\nRetention job archived {archived:,} rows in {time.perf_counter() - started:.1f} s")
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    measure(engine, "after retention: finished states archived", lookups(chat_lookup, confirm_lookup))
+
+if __name__ == "__main__":
+    main()
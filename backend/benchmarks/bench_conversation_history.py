@@ -0,0 +1,118 @@
+"""
+Benchmark: server-side chat history.
+
+1. Request size and JSON parsing of a ChatRequest carrying the full `messages` list (the
+   previous client contract) vs. only the new `message` plus a session_id, as sessions grow.
+2. Time spent on the response path per turn when the two new conversations rows are committed
+   inline vs. handed to the batched ConversationWriter, and how long the writer then needs
+   to get everything into the table.
+
+The database is a temporary SQLite file.
+
+Run from backend/:  python -m benchmarks.bench_conversation_history
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import async_database_url
+from app.models import Base, Conversation, RoleEnum
+from app.routers.chat import ChatRequest
+from app.services import conversation_history as history_module
+from app.services.conversation_history import ConversationWriter
+
+TURN_LENGTHS = (10, 50, 200) # Messages already in the session
+MESSAGE = "Could you recommend a quiet place for dinner near the hotel, somewhere with a rooftop view? " * 3
+REPEAT = 200
+SESSIONS = 50
+TURNS_PER_SESSION = 20
+
+def bench_payloads():
+    print("== Request payload (full history vs. new message + session_id)")
+    for length in TURN_LENGTHS:
+        messages = [{"role": "user" if i % 2 == 0 else "bot", "content": MESSAGE} for i in range(length)]
+        full = ChatRequest(hotel_id="H-001", session_id="s-1", messages=messages + [{"role": "user", "content": MESSAGE}]).model_dump_json()
+        single = ChatRequest(hotel_id="H-001", session_id="s-1", message=MESSAGE).model_dump_json()
+        timings = {}
+        for name, body in (("full", full), ("single", single)):
+            samples = []
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                ChatRequest.model_validate_json(body)
+                samples.append(time.perf_counter() - started)
+            timings[name] = statistics.median(samples)
+        print(
+            f"   {length:>4} messages | full {len(full) / 1024:>7.1f} KiB, parse {timings['full'] * 1e6:>7.1f} us"
+            f" | single {len(single) / 1024:>5.1f} KiB, parse {timings['single'] * 1e6:>5.1f} us"
+        )
+
+async def inline_writes(sessionmaker) -> list:
+    """Both rows of a turn committed before the response is returned."""
+    latencies = []
+    for turn in range(TURNS_PER_SESSION):
+        for session in range(SESSIONS):
+            started = time.perf_counter()
+            async with sessionmaker() as db:
+                db.add(Conversation(session_id=f"s-{session}", role=RoleEnum.USER, message=MESSAGE))
+                db.add(Conversation(session_id=f"s-{session}", role=RoleEnum.BOT, message=MESSAGE))
+                await db.commit()
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+async def batched_writes() -> tuple:
+    """Both rows of a turn queued on the writer; it inserts them in bulk in the background."""
+    writer = ConversationWriter(batch_size=200, interval_seconds=0.25, max_pending=100_000)
+    await writer.startup()
+    latencies = []
+    for turn in range(TURNS_PER_SESSION):
+        for session in range(SESSIONS):
+            started = time.perf_counter()
+            writer.append(f"s-{session}", RoleEnum.USER, MESSAGE)
+            writer.append(f"s-{session}", RoleEnum.BOT, MESSAGE)
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0) # Let the writer run between turns, as it would between requests
+    started = time.perf_counter()
+    await writer.shutdown()
+    return latencies, time.perf_counter() - started, writer.stats()
+
+async def bench_writes(url: str):
+    print(f"\n== Write path ({SESSIONS} sessions x {TURNS_PER_SESSION} turns, 2 rows per turn)")
+    engine = create_async_engine(async_database_url(url))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    history_module.AsyncSessionLocal = sessionmaker
+    try:
+        started = time.perf_counter()
+        latencies = await inline_writes(sessionmaker)
+        total = time.perf_counter() - started
+        print(
+            f"   inline commit  | per turn median {statistics.median(latencies) * 1e3:>7.3f} ms,"
+            f" p99 {sorted(latencies)[int(len(latencies) * 0.99)] * 1e3:>7.3f} ms | total {total:.2f} s"
+        )
+
+        started = time.perf_counter()
+        latencies, drain, stats = await batched_writes()
+        total = time.perf_counter() - started
+        print(
+            f"   batched writer | per turn median {statistics.median(latencies) * 1e3:>7.3f} ms,"
+            f" p99 {sorted(latencies)[int(len(latencies) * 0.99)] * 1e3:>7.3f} ms | total {total:.2f} s"
+            f" (final flush {drain * 1e3:.0f} ms, {stats['batches']} batches)"
+        )
+        async with sessionmaker() as db:
+            rows = (await db.execute(select(func.count()).select_from(Conversation))).scalar()
+        print(f"   conversations rows: {rows:,}")
+    finally:
+        await engine.dispose()
+
+def main():
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')}"
+    Base.metadata.create_all(create_engine(url), tables=[Conversation.__table__])
+    bench_payloads()
+    asyncio.run(bench_writes(url))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: memory per place and prompt-context build time, list-of-dicts vs. the columnar PlaceStore.
+
+Run from backend/:  python -m benchmarks.bench_data_store
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from app.services.data_loader import TourismDataLoader
+from benchmarks.bench_retrieval import synthetic_rows
+
+def legacy_context(places_db, limit: int) -> str:
+    """get_context_for_llm as it was: re-parses every row and concatenates with +=."""
+    context_str = "Verified Indian Tourism Data:\n"
+    for idx, p in enumerate(places_db[:limit]):
+        price_str = f"Rs. {p['price']}" if p['price'] and p['price'] != '0' else "Free"
+        closed_str = f"(Closed on {p['closed_on']})" if p['closed_on'] and p['closed_on'].lower() != 'none' else ""
+        context_str += f"- {p['name']} ({p['city']}, {p['state']}) | Type: {p['type']}/{p['category']} | Rating: {p['rating']}/5 | Fee: {price_str} | Best Time: {p['best_time']} | Time Needed: {p['time_needed']} hrs {closed_str}\n"
+    return context_str
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+def timed(fn, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - started) / number
+
+def main():
+    for size in (1_000, 50_000):
+        # Fresh string objects per row, as csv.DictReader would produce
+        source = [{k: "".join(v) for k, v in row.items()} for row in synthetic_rows(size)]
+
+        legacy, legacy_bytes = measure(lambda: [{k: "".join(v) for k, v in row.items()} for row in source])
+
+        def build_store():
+            loader = TourismDataLoader(load=False)
+            loader.load_rows({k: "".join(v) for k, v in row.items()} for row in source)
+            # Exclude the retrieval index so both sides hold the same information
+            loader.postings = {}
+            loader.city_index = {}
+            return loader
+        loader, store_bytes = measure(build_store)
+
+        lines_bytes = sum(sys.getsizeof(line) for line in loader.store.context_lines) + sys.getsizeof(loader.store.context_lines)
+        print(
+            f"{size:>7,} places | list-of-dicts {legacy_bytes / size:>7.0f} B/place"
+            f" | columnar {(store_bytes - lines_bytes) / size:>7.0f} B/place"
+            f" + {lines_bytes / size:.0f} B/place pre-rendered prompt lines"
+        )
+        for limit in (15, 400):
+            t_legacy = timed(lambda: legacy_context(legacy, limit), 200)
+            t_store = timed(lambda: loader.get_context_for_llm(limit=limit), 200)
+            assert legacy_context(legacy, limit) == loader.get_context_for_llm(limit=limit)
+            print(
+                f"  context limit={limit:<3} | legacy {t_legacy * 1e6:>8.1f} us"
+                f" | columnar {t_store * 1e6:>8.1f} us | x{t_legacy / t_store:.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Benchmark: nearest-city lookups against the offline gazetteer.
+
+Single lookups go through the precomputed candidate grid; batches through the vectorized NumPy path.
+
+Run from backend/:  python -m benchmarks.bench_gazetteer
+"""
+import time
+
+import numpy as np
+
+from app.services.gazetteer import gazetteer
+
+# Roughly India's bounding box
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+
+def random_points(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(*LAT_RANGE, n), rng.uniform(*LON_RANGE, n)
+
+def main():
+    print(f"gazetteer entries: {len(gazetteer.entries)}, grid cells: {gazetteer.n_rows * gazetteer.n_cols}")
+
+    lats, lons = random_points(100_000)
+    for k in (1, 3):
+        started = time.perf_counter()
+        for lat, lon in zip(lats.tolist(), lons.tolist()):
+            gazetteer.nearest(lat, lon, k=k)
+        elapsed = time.perf_counter() - started
+        print(f"single lookups k={k}: {elapsed / len(lats) * 1e6:.2f} us/lookup")
+
+    for n in (1_000_000, 5_000_000):
+        lats, lons = random_points(n)
+        for k in (1, 3):
+            started = time.perf_counter()
+            gazetteer.nearest_batch(lats, lons, k=k)
+            elapsed = time.perf_counter() - started
+            print(f"batch {n:>9,} k={k}: {elapsed:.2f} s total, {elapsed / n * 1e6:.3f} us/lookup, {n / elapsed:,.0f} lookups/s")
+
+if __name__ == "__main__":
+    main()
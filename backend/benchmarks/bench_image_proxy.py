@@ -0,0 +1,104 @@
+"""
+Benchmark: image proxy latency, sequential tier chain vs. concurrent tier racing with a deadline.
+
+WikiData and Unsplash are replaced by local stubs with injected delays (a fast majority, a slow
+minority and a few requests that hang until the 5 s upstream timeout). Every request uses a new
+place name, so this measures cold lookups; cached lookups never reach the tiers at all.
+
+Run from backend/:  python -m benchmarks.bench_image_proxy
+"""
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+from app.config import settings
+from app.services.image_resolver import ImageResolver, fallback_image_url
+
+REQUESTS = 400
+CONCURRENCY = 100
+UPSTREAM_TIMEOUT_S = 5.0
+# (probability, min delay s, max delay s); anything over the timeout hangs until it fires
+DELAYS = {
+    "wikidata": [(0.85, 0.15, 0.40), (0.10, 1.0, 3.0), (0.05, 6.0, 6.0)],
+    "unsplash": [(0.90, 0.10, 0.30), (0.08, 0.5, 1.5), (0.02, 6.0, 6.0)],
+}
+WIKIDATA_HIT_RATE = 0.6
+
+def draw_delay(rng: random.Random, tier: str) -> float:
+    roll = rng.random()
+    for probability, low, high in DELAYS[tier]:
+        if roll < probability:
+            return rng.uniform(low, high)
+        roll -= probability
+    return DELAYS[tier][-1][2]
+
+def make_stub(seed: int):
+    rng = random.Random(seed)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        tier = "wikidata" if "wikidata" in request.url.host else "unsplash"
+        delay = draw_delay(rng, tier)
+        await asyncio.sleep(min(delay, UPSTREAM_TIMEOUT_S))
+        if delay > UPSTREAM_TIMEOUT_S:
+            raise httpx.ReadTimeout("stub timeout", request=request)
+        if tier == "wikidata":
+            bindings = [{"image": {"value": "https://commons.example/p18.jpg"}}] if rng.random() < WIKIDATA_HIT_RATE else []
+            return httpx.Response(200, json={"results": {"bindings": bindings}})
+        return httpx.Response(200, json={"results": [{"urls": {"regular": f"https://unsplash.example/{i}.jpg"}} for i in range(20)]})
+
+    return handler
+
+def new_resolver(seed: int, deadline: float) -> ImageResolver:
+    resolver = ImageResolver(max_bytes=1 << 20, path=None, ttl_seconds=3600, negative_ttl_seconds=600, deadline_seconds=deadline)
+    resolver._client = httpx.AsyncClient(transport=httpx.MockTransport(make_stub(seed)))
+    return resolver
+
+async def sequential_chain(resolver: ImageResolver, name: str, category: str, city: str, index: int) -> str:
+    """The previous behaviour: WikiData, then Unsplash, then LoremFlickr, one after another."""
+    if index == 0:
+        try:
+            image = await resolver.wikidata_image(name)
+            if image:
+                return image
+        except Exception:
+            pass
+    try:
+        image = resolver.pick_unsplash(await resolver.unsplash_images(name, category, city), index)
+        if image:
+            return image
+    except Exception:
+        pass
+    return fallback_image_url(name, city, index)
+
+async def measure(label: str, call):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await call(f"Bench Place {i}", "tourism", "Hyderabad", i % 3)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+    latencies.sort()
+    q = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<32} | p50 {q[49] * 1e3:>7.1f} ms | p95 {q[94] * 1e3:>7.1f} ms"
+        f" | p99 {q[98] * 1e3:>7.1f} ms | max {latencies[-1] * 1e3:>7.1f} ms"
+    )
+
+async def main():
+    print(f"{REQUESTS} cold requests, {CONCURRENCY} concurrent, index 0/1/2 round-robin")
+    resolver = new_resolver(seed=11, deadline=settings.image_resolve_deadline_seconds)
+    await measure("sequential chain", lambda *a: sequential_chain(resolver, *a))
+    for deadline in (0.5, 1.0, settings.image_resolve_deadline_seconds):
+        resolver = new_resolver(seed=11, deadline=deadline)
+        await measure(f"raced tiers, deadline {deadline:.1f} s", resolver.resolve)
+        print(f"{'':<32} | wins {resolver.tier_wins} | deadline expirations {resolver.deadline_expirations}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark: FAQ-style chat traffic through NVIDIAClient.generate_response with the response
+cache disabled vs. enabled.
+
+The NVIDIA API is a local stub that answers after UPSTREAM_LATENCY_S, standing in for a
+multi-second Llama3-70B generation. Guests ask a small set of common questions (Zipf-like
+popularity, varied casing and punctuation) from a few spots in two cities; some are mid-booking
+and always go upstream.
+
+Run from backend/:  python -m benchmarks.bench_response_cache
+"""
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+from app.services.nvidia_client import nvidia_client
+from app.services.response_cache import response_cache
+
+REQUESTS = 400
+CONCURRENCY = 20
+UPSTREAM_LATENCY_S = 2.0
+BOOKING_SHARE = 0.05
+QUESTIONS = [
+    "Top places in Hyderabad", "What to see in Jaipur in 2 days?", "Best street food in Hyderabad",
+    "Is Golconda Fort open on Mondays?", "Plan a 3 day trip to Jaipur under 15000 INR",
+    "Where can I buy pearls?", "What is the entry fee for Charminar", "Nice places for sunset",
+    "Suggest a vegetarian restaurant near the hotel", "Top places in Jaipur",
+    "What to do in the evening", "Museums in Hyderabad", "Any temples nearby?",
+    "How far is the airport", "Shopping malls nearby", "Best biryani in town",
+]
+LOCATIONS = ["17.3850, 78.4867", "17.3871, 78.4912", "26.9124, 75.7873", "26.9150, 75.8010"]
+
+async def slow_upstream(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(UPSTREAM_LATENCY_S)
+    return httpx.Response(200, json={"choices": [{"message": {"content": "Here are a few places you will enjoy!"}}]})
+
+def traffic(seed: int = 11):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(QUESTIONS))]
+    for _ in range(REQUESTS):
+        question = rng.choices(QUESTIONS, weights)[0]
+        if rng.random() < 0.5:
+            question = question.lower().rstrip("?") + rng.choice(["", "?", " ?", "!"])
+        booking = "Service: taxi, Status: gathering_info" if rng.random() < BOOKING_SHARE else None
+        yield question, rng.choice(LOCATIONS), booking
+
+async def measure(label: str, enabled: bool):
+    response_cache.enabled = enabled
+    response_cache.clear()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    hits_before = response_cache.memory.hits
+
+    async def one(question, location, booking):
+        async with semaphore:
+            started = time.perf_counter()
+            await nvidia_client.generate_response(
+                messages=[{"role": "user", "content": question}],
+                booking_context=booking,
+                user_location=location,
+                hotel_id="H-100",
+                language="en-US"
+            )
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*turn) for turn in traffic()))
+    elapsed = time.perf_counter() - started
+
+    q = statistics.quantiles(latencies, n=100)
+    hits = response_cache.memory.hits - hits_before
+    print(
+        f"{label:<14} | {REQUESTS / elapsed:>6.1f} req/s | p50 {q[49] * 1e3:>8.2f} ms | p90 {q[89] * 1e3:>8.1f} ms"
+        f" | p99 {q[98] * 1e3:>8.1f} ms | cache hits {hits}/{REQUESTS}"
+    )
+
+async def main():
+    nvidia_client._client = httpx.AsyncClient(base_url=nvidia_client.base_url, transport=httpx.MockTransport(slow_upstream))
+    print(f"{REQUESTS} requests, {CONCURRENCY} concurrent, {UPSTREAM_LATENCY_S * 1e3:.0f} ms upstream, {len(QUESTIONS)} questions")
+    await measure("cache disabled", False)
+    await measure("cache enabled", True)
+    print(response_cache.stats())
+
+if __name__ == "__main__":
+    asyncio.run(main())
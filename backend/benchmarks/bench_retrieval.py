@@ -0,0 +1,96 @@
+"""
+Benchmark: BM25 index build time and query latency for TourismDataLoader retrieval.
+
+Uses the real dataset if it is present in ../dataset, otherwise synthetic rows shaped like it,
+replicated up to larger sizes.
+
+Run from backend/:  python -m benchmarks.bench_retrieval
+"""
+import random
+import statistics
+import time
+
+from app.services.data_loader import TourismDataLoader, data_loader
+
+CITIES = [
+    ("Hyderabad", "Telangana"), ("Jaipur", "Rajasthan"), ("Udaipur", "Rajasthan"), ("Agra", "Uttar Pradesh"),
+    ("Varanasi", "Uttar Pradesh"), ("Mumbai", "Maharashtra"), ("Pune", "Maharashtra"), ("Kochi", "Kerala"),
+    ("Mysore", "Karnataka"), ("Bangalore", "Karnataka"), ("Chennai", "Tamil Nadu"), ("Madurai", "Tamil Nadu"),
+    ("Delhi", "Delhi"), ("Amritsar", "Punjab"), ("Kolkata", "West Bengal"), ("Goa", "Goa"),
+]
+TYPES = ["Fort", "Temple", "Palace", "Museum", "Lake", "Beach", "Market", "Park", "Monument", "Mosque"]
+SIGNIFICANCE = ["Historical", "Religious", "Cultural", "Nature", "Shopping", "Architectural", "Recreational"]
+
+QUERIES = [
+    "top places in Hyderabad",
+    "what to see in Jaipur in 2 days",
+    "any good beaches in Goa?",
+    "historical forts in Rajasthan",
+    "temples near Madurai",
+    "what about food?",
+]
+
+def synthetic_rows(n: int):
+    rng = random.Random(42)
+    rows = []
+    for i in range(n):
+        city, state = rng.choice(CITIES)
+        place_type = rng.choice(TYPES)
+        rows.append({
+            "name": f"{city} {place_type} {i}",
+            "city": city,
+            "state": state,
+            "category": rng.choice(SIGNIFICANCE),
+            "type": place_type,
+            "rating": f"{rng.uniform(3.5, 5.0):.1f}",
+            "price": str(rng.choice([0, 0, 20, 50, 250])),
+            "time_needed": str(rng.choice([1, 2, 3])),
+            "best_time": rng.choice(["Morning", "Afternoon", "Evening", "All"]),
+            "closed_on": rng.choice(["None", "Monday", "Friday"]),
+        })
+    return rows
+
+def scaled_rows(base, n: int):
+    rows = []
+    for i in range(n):
+        row = dict(base[i % len(base)])
+        if i >= len(base):
+            row["name"] = f"{row['name']} #{i // len(base)}"
+        rows.append(row)
+    return rows
+
+def main():
+    real_rows = [data_loader.store.row(i) for i in range(len(data_loader.store))]
+    base = real_rows or synthetic_rows(325)
+    print(f"base rows: {len(base)} ({'real dataset' if real_rows else 'synthetic'})")
+    legacy_context = None
+
+    for size in (len(base), 10_000, 100_000):
+        loader = TourismDataLoader(load=False)
+        loader.load_rows(scaled_rows(base, size))
+
+        latencies = []
+        for _ in range(20):
+            for q in QUERIES:
+                terms = loader.query_terms([{"role": "user", "content": q}])
+                started = time.perf_counter()
+                loader.search(terms, limit=15)
+                latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1e3
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e3
+        print(
+            f"{size:>7,} places | build {loader.index_build_seconds * 1e3:>8.1f} ms"
+            f" | {len(loader.postings):>6,} terms | query p50 {p50:.3f} ms p99 {p99:.3f} ms"
+        )
+        if legacy_context is None:
+            legacy_context = loader.get_context_for_llm(limit=15)
+            retrieved = loader.get_context_for_llm(
+                limit=15, query_terms=loader.query_terms([{"role": "user", "content": "top places in Jaipur"}])
+            )
+            hits = sum("Jaipur" in line for line in retrieved.splitlines())
+            legacy_hits = sum("Jaipur" in line for line in legacy_context.splitlines())
+            print(f"  'top places in Jaipur': {legacy_hits}/15 Jaipur places with first-15-rows, {hits}/15 retrieved")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: one whole-file STT call vs. silence-segmented parallel transcription of a long voice note.
+
+The upstream is a local stub whose latency grows with the audio duration. Peak Python heap per
+request is measured with tracemalloc.
+
+Run from backend/:  python -m benchmarks.bench_stt_segments
+"""
+import asyncio
+import base64
+import io
+import json
+import time
+import tracemalloc
+import wave
+
+import httpx
+import numpy as np
+
+from app.services.nvidia_client import nvidia_client
+from app.services.audio_preprocess import WavFormat, to_wav
+from app.services.speech_segmenter import transcribe_stream
+
+SAMPLE_RATE = 16000
+BASE_LATENCY_S = 0.150
+# Upstream processing time per second of audio
+REALTIME_FACTOR = 0.05
+CHUNK_BYTES = 64 * 1024
+
+def voice_note(seconds: float, seed: int = 3) -> bytes:
+    """Bursts of 'speech' (noisy tones, 1-8 s) separated by 0.5-1.5 s pauses."""
+    rng = np.random.default_rng(seed)
+    parts, total = [], 0.0
+    while total < seconds:
+        speech = rng.uniform(1.0, 8.0)
+        pause = rng.uniform(0.5, 1.5)
+        t = np.arange(int(SAMPLE_RATE * speech)) / SAMPLE_RATE
+        burst = 0.2 * np.sin(2 * np.pi * rng.uniform(150, 400) * t) + 0.02 * rng.standard_normal(len(t))
+        parts.append((burst * 32767).astype(np.int16))
+        parts.append((0.002 * 32767 * rng.standard_normal(int(SAMPLE_RATE * pause))).astype(np.int16))
+        total += speech + pause
+    return to_wav(np.concatenate(parts).tobytes(), WavFormat(1, 2, SAMPLE_RATE))
+
+async def stub_stt(request: httpx.Request) -> httpx.Response:
+    audio = base64.b64decode(json.loads(request.content)["audio"])
+    with wave.open(io.BytesIO(audio)) as w:
+        duration = w.getnframes() / w.getframerate()
+    await asyncio.sleep(BASE_LATENCY_S + REALTIME_FACTOR * duration)
+    return httpx.Response(200, json={"text": f"[{duration:.1f}s]"})
+
+async def chunked(data: bytes):
+    for start in range(0, len(data), CHUNK_BYTES):
+        yield data[start:start + CHUNK_BYTES]
+
+async def measure(label: str, make_call):
+    tracemalloc.start()
+    started = time.perf_counter()
+    text = await make_call()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<22} | {elapsed * 1e3:>8.1f} ms | peak heap {peak / 1e6:>7.1f} MB | {text.count('[')} upstream segments")
+
+async def main():
+    nvidia_client._client = httpx.AsyncClient(base_url=nvidia_client.base_url, transport=httpx.MockTransport(stub_stt))
+    try:
+        for seconds in (15, 60, 300):
+            audio = voice_note(seconds)
+            print(f"voice note: {seconds} s, {len(audio) / 1e6:.1f} MB WAV")
+            await measure("whole file, 1 request", lambda: nvidia_client.transcribe_audio(audio_bytes=audio))
+            await measure("segmented, parallel", lambda: transcribe_stream(chunked(audio)))
+    finally:
+        await nvidia_client.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+Micro-benchmark: legacy regex tag handling in send_message vs. the single-pass tag parser.
+
+Run from backend/:  python -m benchmarks.bench_tag_parser
+"""
+import json
+import os
+import re
+import timeit
+
+from app.services.tag_parser import extract_tags, rebuild, render_tag
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_recorded_response() -> str:
+    # The recorded response was saved from PowerShell, hence UTF-16
+    with open(os.path.join(BACKEND_DIR, "temp_chat_response.txt"), encoding="utf-16") as f:
+        return f.read()
+
+def legacy(text: str) -> str:
+    """The two greedy re.DOTALL searches + json.loads + str.replace previously in send_message."""
+    rec_match = re.search(r"\[RECOMMENDATIONS:\s*(\[.*\])\]", text, re.DOTALL | re.IGNORECASE)
+    if rec_match:
+        recommendations = json.loads(rec_match.group(1))
+        text = text.replace(rec_match.group(0), f"[RECOMMENDATIONS: {json.dumps(recommendations)}]")
+    booking_match = re.search(r"\[BOOKING_STATE:\s*(\{.*\})\]", text, re.DOTALL | re.IGNORECASE)
+    if booking_match:
+        json.loads(booking_match.group(1))
+    return text
+
+def single_pass(text: str) -> str:
+    tags = extract_tags(text)
+    replacements = {idx: render_tag(tag) for idx, tag in enumerate(tags) if tag.valid}
+    return rebuild(text, replacements, tags)
+
+def main():
+    recorded = load_recorded_response()
+    prose, tag = recorded[:recorded.index("[RECOMMENDATIONS")], recorded[recorded.index("[RECOMMENDATIONS"):]
+    # Scale the conversational text up to mimic long replies (and prose containing brackets)
+    for repeat in (1, 10, 100, 1000):
+        text = (prose + " [see above] ") * repeat + tag
+        number = max(10, 2000 // repeat)
+        t_legacy = timeit.timeit(lambda: legacy(text), number=number) / number
+        t_single = timeit.timeit(lambda: single_pass(text), number=number) / number
+        print(
+            f"{len(text):>9,} chars | legacy regex {t_legacy * 1e6:>10.1f} us"
+            f" | single-pass {t_single * 1e6:>10.1f} us | x{t_legacy / t_single:.2f}"
+        )
+
+    # Truncated replies (max_tokens hit mid-tag) that quote the marker repeatedly make the
+    # greedy DOTALL regex rescan to the end from every candidate start: quadratic.
+    for repeat in (100, 1000, 4000):
+        text = prose + '[RECOMMENDATIONS: [{"name": "x"} ' * repeat
+        number = 5
+        t_legacy = timeit.timeit(lambda: legacy(text), number=number) / number
+        t_single = timeit.timeit(lambda: single_pass(text), number=number) / number
+        print(
+            f"{len(text):>9,} chars truncated | legacy regex {t_legacy * 1e6:>10.1f} us"
+            f" | single-pass {t_single * 1e6:>10.1f} us | x{t_legacy / t_single:.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
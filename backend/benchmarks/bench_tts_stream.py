@@ -0,0 +1,97 @@
+"""
+Benchmark: time-to-first-audio-byte of one whole-reply TTS call vs. sentence-pipelined streaming.
+
+The upstream is a local stub whose latency grows with the text length (fixed overhead plus a
+per-character synthesis cost), returning a WAV clip whose duration is proportional to the text.
+
+Run from backend/:  python -m benchmarks.bench_tts_stream
+"""
+import asyncio
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+import wave
+
+import httpx
+
+from app.services.audio_cache import audio_cache
+from app.services.nvidia_client import nvidia_client
+from app.services.tts_stream import split_sentences, stream_speech
+from benchmarks.bench_tag_parser import load_recorded_response
+
+BASE_LATENCY_S = 0.080
+PER_CHAR_S = 0.002
+SAMPLE_RATE = 22050
+
+def fake_wav(text: str) -> bytes:
+    # ~60 ms of 16-bit mono audio per character
+    frames = int(SAMPLE_RATE * 0.06 * len(text))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(b"\x00\x00" * frames)
+    return buf.getvalue()
+
+async def stub_tts(request: httpx.Request) -> httpx.Response:
+    text = json.loads(request.content)["text"]
+    await asyncio.sleep(BASE_LATENCY_S + PER_CHAR_S * len(text))
+    return httpx.Response(200, content=fake_wav(text), headers={"content-type": "audio/wav"})
+
+def cold_cache():
+    # Every run starts from an empty cache so all sentences hit the stub
+    audio_cache.directory = tempfile.mkdtemp(prefix="bench_tts_")
+    audio_cache._index.clear()
+    audio_cache.current_bytes = 0
+    audio_cache._loaded = False
+
+async def whole_reply(text: str):
+    started = time.perf_counter()
+    audio = await nvidia_client.synthesize_speech(text)
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed, len(audio)
+
+async def streamed(text: str, concurrency: int):
+    started = time.perf_counter()
+    first = None
+    size = 0
+    async for chunk in stream_speech(text, "bench", concurrency=concurrency):
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    return first, time.perf_counter() - started, size
+
+async def run(text: str, repeats: int = 5):
+    print(f"reply: {len(text)} chars, {len(split_sentences(text))} sentences")
+    cases = [("whole reply, 1 request", lambda: whole_reply(text))]
+    for concurrency in (1, 2, 4, 8):
+        cases.append((f"streamed, concurrency {concurrency}", lambda c=concurrency: streamed(text, c)))
+    for label, case in cases:
+        ttfbs, totals = [], []
+        for _ in range(repeats):
+            cold_cache()
+            ttfb, total, _ = await case()
+            ttfbs.append(ttfb)
+            totals.append(total)
+        print(
+            f"{label:<26} | first audio byte {statistics.median(ttfbs) * 1e3:>7.1f} ms"
+            f" | complete {statistics.median(totals) * 1e3:>7.1f} ms"
+        )
+
+async def main():
+    nvidia_client._client = httpx.AsyncClient(base_url=nvidia_client.base_url, transport=httpx.MockTransport(stub_tts))
+    recorded = load_recorded_response()
+    prose = recorded[:recorded.index("[RECOMMENDATIONS")].strip()
+    original_dir = audio_cache.directory
+    try:
+        await run(prose)
+    finally:
+        audio_cache.directory = original_dir
+        await nvidia_client.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
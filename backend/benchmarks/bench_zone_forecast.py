@@ -0,0 +1,72 @@
+"""
+Benchmark: serving /zones/forecast by scoring every zone under every forecast hour per request
+vs. slicing a precomputed ZoneForecastGrid (what the endpoint does once the grid is warm).
+
+Run from backend/:  python -m benchmarks.bench_zone_forecast
+"""
+import time
+
+import numpy as np
+
+from app.services.weather_client import classify_weather
+from app.services.zone_forecast import ZoneForecastGrid
+from app.services.zone_scoring import ZoneSet, score_zones, weather_flags, zone_rows
+
+HOURS = 48
+REQUESTS = 200
+
+def synthetic(n_zones: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    cols = [rng.integers(0, 101, n_zones) for _ in range(4)]
+    zones = ZoneSet("bench", [str(i) for i in range(n_zones)], [f"Zone {i}" for i in range(n_zones)], *cols)
+    start = int(time.time()) // 3600 * 3600
+    forecast = {
+        "time": [start + 3600 * h for h in range(HOURS)],
+        "hours": [
+            classify_weather(float(rng.uniform(25, 42)), float(rng.exponential(0.4)), int(rng.choice([0, 2, 61, 95])))
+            for _ in range(HOURS)
+        ],
+        "cache_age_seconds": 0.0,
+        "stale": False,
+        "source": "cache",
+    }
+    return zones, forecast
+
+def per_request(zones: ZoneSet, forecast, hours: int):
+    """Recomputes the scores of the requested hours and builds per-hour zone rows."""
+    raining, heat = weather_flags(forecast["hours"][:hours])
+    scores = score_zones(zones, raining, heat)
+    return [zone_rows(zones, scores, h) for h in range(hours)]
+
+def timed(call) -> float:
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        call()
+    return (time.perf_counter() - started) / REQUESTS
+
+def main():
+    print(f"{HOURS}-hour forecast, mean of {REQUESTS} requests")
+    for n_zones in (6, 100, 1_000):
+        zones, forecast = synthetic(n_zones)
+        started = time.perf_counter()
+        grid = ZoneForecastGrid(zones, forecast)
+        t_build = time.perf_counter() - started
+
+        # Same numbers either way
+        rows = per_request(zones, forecast, 24)
+        sliced = grid.slice(0, 24)["zones"]
+        for z, series in enumerate(sliced):
+            assert series["overallScore"] == [rows[h][z]["overallScore"] for h in range(24)]
+            assert series["color"] == [rows[h][z]["color"] for h in range(24)]
+
+        for hours in (6, 24):
+            t_compute = timed(lambda: per_request(zones, forecast, hours))
+            t_slice = timed(lambda: grid.slice(0, hours))
+            print(
+                f"{n_zones:>5} zones, {hours:>2} h | recompute {t_compute * 1e3:>7.3f} ms"
+                f" | grid slice {t_slice * 1e3:>7.3f} ms (x{t_compute / t_slice:.1f})"
+                f" | grid build {t_build * 1e3:.3f} ms"
+            )
+
+if __name__ == "__main__":
+    main()
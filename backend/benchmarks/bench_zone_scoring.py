@@ -0,0 +1,70 @@
+"""
+Benchmark: per-dict zone scoring (the previous calculate_zone_scores loop) vs. the vectorized
+zone_scoring.score_zones pass, for growing numbers of zones and weather contexts.
+
+Run from backend/:  python -m benchmarks.bench_zone_scoring
+"""
+import time
+
+import numpy as np
+
+from app.services.zone_scoring import ZoneSet, score_zones, weather_flags, zone_rows
+
+def legacy_score(base_zone: dict, weather_ctx: dict) -> dict:
+    """calculate_zone_scores as it was in app/routers/zones.py (minus the random id)."""
+    base_weather = 100
+    if weather_ctx["is_raining"]:
+        base_weather -= 30
+    if weather_ctx["is_extreme_heat"]:
+        base_weather -= 40
+    weather_score = max(0, min(100, base_weather))
+    crowd = base_zone["crowd"]
+    if weather_ctx["is_raining"] or weather_ctx["is_extreme_heat"]:
+        crowd = max(10, int(crowd * 0.5))
+    safety = base_zone["safety"]
+    price = base_zone["price"]
+    review = base_zone["review"]
+    overall = int((safety * 0.4) + (weather_score * 0.2) + (review * 0.2) + (price * 0.1) + ((100 - crowd) * 0.1))
+    color = "green"
+    if overall < 40:
+        color = "red"
+    elif overall < 70:
+        color = "yellow"
+    return {
+        "name": base_zone["name"], "safetyScore": safety, "crowdScore": crowd, "weatherScore": weather_score,
+        "priceScore": price, "reviewScore": review, "color": color, "overallScore": overall
+    }
+
+def synthetic(n_zones: int, n_contexts: int, seed: int = 2):
+    rng = np.random.default_rng(seed)
+    cols = {k: rng.integers(0, 101, n_zones) for k in ("safety", "crowd", "price", "review")}
+    dicts = [{"name": f"Zone {i}", **{k: int(v[i]) for k, v in cols.items()}} for i in range(n_zones)]
+    zones = ZoneSet("bench", [str(i) for i in range(n_zones)], [d["name"] for d in dicts], cols["safety"], cols["crowd"], cols["price"], cols["review"])
+    contexts = [{"is_raining": bool(rng.random() < 0.3), "is_extreme_heat": bool(rng.random() < 0.2)} for _ in range(n_contexts)]
+    return dicts, zones, contexts
+
+def main():
+    for n_zones, n_contexts in ((6, 1), (1_000, 1), (10_000, 1), (1_000, 100), (10_000, 48)):
+        dicts, zones, contexts = synthetic(n_zones, n_contexts)
+
+        started = time.perf_counter()
+        legacy = [[legacy_score(z, w) for z in dicts] for w in contexts]
+        t_legacy = time.perf_counter() - started
+
+        started = time.perf_counter()
+        raining, heat = weather_flags(contexts)
+        scores = score_zones(zones, raining, heat)
+        t_score = time.perf_counter() - started
+        rows = [zone_rows(zones, scores, w) for w in range(n_contexts)]
+        t_rows = time.perf_counter() - started
+
+        for old, new in zip(legacy, rows):
+            assert old == [{k: v for k, v in r.items() if k != "id"} for r in new]
+        print(
+            f"{n_zones:>6} zones x {n_contexts:>3} contexts | legacy {t_legacy * 1e3:>8.2f} ms"
+            f" | vectorized scores {t_score * 1e3:>7.2f} ms (x{t_legacy / t_score:.0f})"
+            f" | + response dicts {t_rows * 1e3:>7.2f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import asyncio
+import sys
+
+from app.services.audio_cache import audio_cache
+from app.services.nvidia_client import nvidia_client, TTS_MODEL, TTS_VOICE
+
+# Greetings and confirmations every guest hears
+STOCK_PHRASES = [
+    "Welcome! I'm your AI concierge. How can I help you today?",
+    "Hello! How can I make your stay more comfortable?",
+    "Your taxi has been booked successfully.",
+    "Your booking is confirmed. Have a wonderful trip!",
+    "I've prepared your itinerary. Check the Itinerary tab for full details.",
+    "Here are some recommendations for you.",
+    "Sorry, I didn't catch that. Could you please repeat?",
+    "Where would you like to go?",
+    "Please confirm your booking details.",
+    "Thank you! Enjoy your stay.",
+]
+
+async def prewarm(phrases, voice: str = TTS_VOICE):
+    await nvidia_client.startup()
+    try:
+        for phrase in phrases:
+            key = audio_cache.key(phrase, voice, TTS_MODEL)
+            if await audio_cache.alookup(key):
+                print(f"cached   {phrase}")
+                continue
+            audio = await nvidia_client.synthesize_speech(text=phrase, voice=voice)
+            if not audio:
+                print(f"FAILED   {phrase}")
+                continue
+            await audio_cache.astore(key, audio)
+            print(f"stored   {phrase} ({len(audio)} bytes)")
+    finally:
+        await nvidia_client.shutdown()
+
+if __name__ == "__main__":
+    # Usage: python prewarm_tts.py [phrases.txt]   (one phrase per line; defaults to STOCK_PHRASES)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            phrases = [line.strip() for line in f if line.strip()]
+    else:
+        phrases = STOCK_PHRASES
+    asyncio.run(prewarm(phrases))
@@ -0,0 +1,6 @@
+import os
+
+# The app modules build their engines and caches at import time: point them at SQLite and keep
+# the caches in memory, so the tests run without Postgres or a cache directory
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("CACHE_DB_PATH", "")
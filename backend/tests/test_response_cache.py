@@ -0,0 +1,81 @@
+import pytest
+
+from app.services.response_cache import ResponseCache, normalize_message
+
+MODEL = ("meta/llama3-70b-instruct", 0.5, 1024)
+
+@pytest.fixture
+def cache():
+    return ResponseCache(max_bytes=1024 * 1024, ttl_seconds=60, geohash_precision=4)
+
+def key(cache, messages, hotel_id="H-100", booking=None, language="en-US", location="17.3850, 78.4867"):
+    return cache.key(hotel_id, messages, booking, language, location, *MODEL)
+
+def user(content):
+    return {"role": "user", "content": content}
+
+def bot(content):
+    return {"role": "bot", "content": content}
+
+def test_normalize_message():
+    assert normalize_message("  Top places in   HYDERABAD?! ") == "top places in hyderabad"
+
+def test_standalone_questions_share_a_key(cache):
+    assert key(cache, [user("Top places in Hyderabad?")]) == key(cache, [user("top places in hyderabad")])
+    # Same ~39 km cell
+    assert key(cache, [user("Top places")], location="17.3850, 78.4867") == key(cache, [user("Top places")], location="17.3871, 78.4912")
+
+@pytest.mark.parametrize("first, second", [
+    # Same follow-up after different bot offers
+    (
+        [user("Things to do in Jaipur"), bot("Would you like hotel recommendations?"), user("Yes please")],
+        [user("Things to do in Jaipur"), bot("Shall I book you a spa slot?"), user("Yes please")],
+    ),
+    (
+        [user("Plan a trip"), bot("How many people?"), user("2")],
+        [user("Plan a trip"), bot("How many days?"), user("2")],
+    ),
+    # Same follow-up about different cities
+    (
+        [user("Places in Jaipur"), bot("Hawa Mahal, Amber Fort"), user("What about food?")],
+        [user("Places in Delhi"), bot("Red Fort, Qutub Minar"), user("What about food?")],
+    ),
+    # A follow-up is never shared with the same standalone question
+    (
+        [user("Plan a trip"), bot("How many days?"), user("2")],
+        [user("2")],
+    ),
+])
+def test_follow_ups_in_different_contexts_do_not_collide(cache, first, second):
+    assert key(cache, first) != key(cache, second)
+
+@pytest.mark.parametrize("variant", [
+    {"hotel_id": "H-200"},
+    {"language": "hi-IN"},
+    {"location": "26.9124, 75.7873"},
+])
+def test_key_dimensions(cache, variant):
+    messages = [user("Top places nearby")]
+    assert key(cache, messages) != key(cache, messages, **variant)
+
+def test_no_key_without_hotel_message_or_with_booking(cache):
+    assert key(cache, [user("Top places")], hotel_id=None) is None
+    assert key(cache, [bot("Hello!")]) is None
+    assert key(cache, [user("Book a taxi")], booking="Service: taxi, Status: gathering_info") is None
+    assert cache.bypassed_booking == 1
+
+def test_booking_answers_are_not_stored(cache):
+    k = key(cache, [user("Book a taxi to the airport")])
+    cache.set(k, 'Sure! [BOOKING_STATE: {"type": "taxi", "status": "gathering_info"}]')
+    assert cache.get(k) is None
+    assert cache.uncacheable == 1
+
+def test_invalidate_drops_only_that_hotel(cache):
+    a = key(cache, [user("Top places")], hotel_id="H-100")
+    b = key(cache, [user("Top places")], hotel_id="H-200")
+    cache.set(a, "A")
+    cache.set(b, "B")
+    assert cache.invalidate("H-100") == 1
+    assert cache.get(a) is None
+    assert cache.get(b) == "B"
+    assert cache.stats()["invalidated"] == 1
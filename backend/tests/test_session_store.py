@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import async_database_url
+from app.models import BookingState
+from app.services import session_store as session_store_module
+from app.services.session_store import MemorySessionBackend, RedisSessionBackend, SessionStore
+
+KEY = "H-100:s-1"
+
+class GatedSession(AsyncSession):
+    """Commits wait for the test to open the gate (or fail when told to)."""
+    committing: asyncio.Event
+    gate: asyncio.Event
+    fail = False
+
+    async def commit(self):
+        type(self).committing.set()
+        await type(self).gate.wait()
+        if type(self).fail:
+            raise RuntimeError("database unavailable")
+        await super().commit()
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'sessions.sqlite3'}"
+    BookingState.metadata.create_all(create_engine(url), tables=[BookingState.__table__])
+    engine = create_async_engine(async_database_url(url))
+    GatedSession.committing = asyncio.Event()
+    GatedSession.gate = asyncio.Event()
+    GatedSession.gate.set()
+    GatedSession.fail = False
+    sessionmaker = async_sessionmaker(engine, class_=GatedSession, expire_on_commit=False)
+    monkeypatch.setattr(session_store_module, "AsyncSessionLocal", sessionmaker)
+    yield sessionmaker
+    asyncio.run(engine.dispose())
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    store = SessionStore(url=None, prefix="test:session:", ttl_seconds=60, grace_seconds=600, flush_interval_seconds=30)
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        store.backend = RedisSessionBackend(fakeredis.aioredis.FakeRedis(decode_responses=True), store.prefix)
+    else:
+        store.backend = MemorySessionBackend()
+    return store
+
+async def persisted(sessionmaker):
+    async with sessionmaker() as db:
+        return (await db.execute(select(BookingState.current_step))).scalars().all()
+
+async def save_ready(store):
+    await store.save_booking(KEY, "H-100", "taxi", "ready", {"type": "taxi", "status": "ready"})
+
+def after_expiry(store) -> float:
+    return time.time() + store.ttl_seconds + 1
+
+def test_turn_during_expiry_commit_starts_without_the_booking(store, database):
+    async def scenario():
+        await save_ready(store)
+        GatedSession.gate.clear()
+        flush = asyncio.create_task(store.flush_expired(now=after_expiry(store)))
+        await GatedSession.committing.wait()
+
+        # Claimed and being committed: a new turn must not see (or keep) the booking
+        assert await store.begin_turn(KEY, "H-100") is None
+        assert await store.get_booking(KEY) is None
+
+        GatedSession.gate.set()
+        assert await flush == 1
+        assert await persisted(database) == ["ready"]
+        assert await store.get_booking(KEY) is None
+
+        # The revived session expires again without a second copy of the booking
+        assert await store.flush_expired(now=after_expiry(store)) == 0
+        assert await persisted(database) == ["ready"]
+    asyncio.run(scenario())
+
+def test_failed_commit_puts_the_booking_back(store, database):
+    async def scenario():
+        await save_ready(store)
+        GatedSession.fail = True
+        with pytest.raises(RuntimeError):
+            await store.flush_expired(now=after_expiry(store))
+        assert (await store.get_booking(KEY)).current_step == "ready"
+        assert await persisted(database) == []
+
+        GatedSession.fail = False
+        assert await store.flush_expired(now=after_expiry(store)) == 1
+        assert await persisted(database) == ["ready"]
+        assert await store.get_booking(KEY) is None
+    asyncio.run(scenario())
+
+def test_turn_and_confirm_lookup_agree_before_the_flush(store, database):
+    async def scenario():
+        store.ttl_seconds = 0.05
+        await save_ready(store)
+        await asyncio.sleep(0.1)
+        # Past its TTL but not claimed yet: still the session's booking for both paths
+        assert (await store.get_booking(KEY)).current_step == "ready"
+        store.ttl_seconds = 60
+        assert (await store.begin_turn(KEY, "H-100")).current_step == "ready"
+        # The turn revived the session, so the flusher leaves it alone
+        assert await store.flush_expired() == 0
+        assert await persisted(database) == []
+        assert (await store.get_booking(KEY)).current_step == "ready"
+    asyncio.run(scenario())
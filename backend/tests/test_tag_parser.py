@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+from app.services.tag_parser import (
+    extract_tags, rebuild, render_tag, TagHoldback,
+    RECOMMENDATIONS, BOOKING_STATE, ITINERARY_PLAN
+)
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "temp_chat_response.txt")
+
+def sample_response() -> str:
+    with open(SAMPLE_PATH, encoding="utf-16") as f:
+        return f.read()
+
+ITINERARY = (
+    '[ITINERARY_PLAN: {"destination": "Hyderabad, Telangana", "days": 2, "budget_total": 15000, '
+    '"days_plan": [{"day": 1, "items": [{"time": "09:00", "activity": "Visit [the] Charminar", "cost": 25}]}]}]'
+)
+
+@pytest.mark.parametrize("text, expected", [
+    # (response text, [(tag name, valid)])
+    ("No tags here, just [brackets] and {braces}.", []),
+    ('Booking. [BOOKING_STATE: {"type": "taxi", "status": "ready"}]', [(BOOKING_STATE, True)]),
+    ('lower case [booking_state: {"type": "taxi"}]', [(BOOKING_STATE, True)]),
+    ('Null type [BOOKING_STATE: {"type": null, "pickup": "Lobby", "status": "gathering_info"}]', [(BOOKING_STATE, True)]),
+    ('Recs [RECOMMENDATIONS: [{"name": "A ] B", "detail": "has } and \\" inside"}]] done', [(RECOMMENDATIONS, True)]),
+    ("Plan. " + ITINERARY, [(ITINERARY_PLAN, True)]),
+    ('Broken [BOOKING_STATE: {"type": "taxi", "status": ready}] after', [(BOOKING_STATE, False)]),
+    ('Schema [ITINERARY_PLAN: {"days": "many"}]', [(ITINERARY_PLAN, False)]),
+    ('Truncated [RECOMMENDATIONS: [{"name": "A"}', []),
+    ('Wrong opener [BOOKING_STATE: ["taxi"]]', []),
+    ('Two [BOOKING_STATE: {"type": "taxi"}] and [RECOMMENDATIONS: []]', [(BOOKING_STATE, True), (RECOMMENDATIONS, True)]),
+])
+def test_extract_tags(text, expected):
+    tags = extract_tags(text)
+    assert [(t.name, t.valid) for t in tags] == expected
+    for tag in tags:
+        assert text[tag.start] == "[" and text[tag.end - 1] == "]"
+
+def test_extract_tags_sample_response():
+    text = sample_response()
+    tags = extract_tags(text)
+    assert [t.name for t in tags] == [RECOMMENDATIONS]
+    assert tags[0].valid
+    assert tags[0].end == len(text.rstrip())
+    assert len(tags[0].data) == len(json.loads(tags[0].raw))
+
+@pytest.mark.parametrize("text, dumped", [
+    ('[BOOKING_STATE: {"type": null, "pickup": "Lobby", "status": "ready"}]', {"type": None, "pickup": "Lobby", "status": "ready"}),
+    ('[BOOKING_STATE: {"type": "taxi"}]', {"type": "taxi"}),
+    ('[ITINERARY_PLAN: {"destination": "Jaipur", "days": 2, "budget_total": 15000}]', {"destination": "Jaipur", "days": 2, "budget_total": 15000}),
+    ('[RECOMMENDATIONS: [{"name": "A", "city": null, "vibe": "calm"}]]', [{"name": "A", "city": None, "vibe": "calm"}]),
+])
+def test_render_round_trip(text, dumped):
+    tag = extract_tags(text)[0]
+    assert tag.dump() == dumped
+    assert render_tag(tag) == f"[{tag.name}: {json.dumps(dumped, separators=(',', ':'))}]"
+    assert extract_tags(render_tag(tag))[0].dump() == dumped
+
+def test_rebuild_replaces_only_selected_tags():
+    text = 'a [BOOKING_STATE: {"type": "taxi"}] b [RECOMMENDATIONS: []] c'
+    tags = extract_tags(text)
+    assert rebuild(text, {}, tags) == text
+    assert rebuild(text, {1: "[RECOMMENDATIONS: [1]]"}, tags) == 'a [BOOKING_STATE: {"type": "taxi"}] b [RECOMMENDATIONS: [1]] c'
+    assert rebuild(text, {0: "X", 1: "Y"}, tags) == "a X b Y c"
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 40, 10_000])
+def test_tag_holdback_splits_text_and_tag(chunk_size):
+    text = sample_response()
+    start = extract_tags(text)[0].start
+    holdback = TagHoldback()
+    forwarded = "".join(holdback.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size))
+    forwarded += holdback.flush()
+    assert forwarded == holdback.text == text[:start]
+    assert holdback.tag == text[start:]
+
+@pytest.mark.parametrize("deltas, text, tag", [
+    (["Hello [", "world]"], "Hello [world]", ""),
+    (["See [BOOK", "ING_STATE: {}]"], "See ", "[BOOKING_STATE: {}]"),
+    (["Ends with [REC"], "Ends with [REC", ""),
+])
+def test_tag_holdback_partial_markers(deltas, text, tag):
+    holdback = TagHoldback()
+    for delta in deltas:
+        holdback.feed(delta)
+    holdback.flush()
+    assert (holdback.text, holdback.tag) == (text, tag)